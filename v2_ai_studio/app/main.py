@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -6,8 +8,11 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from app.routes import router as api_router
-from app.ui_routes import router as ui_router
+from app.ui_routes import router as ui_router, prewarm_pool
+from diagram.pipeline import shutdown_pools as shutdown_diagram_pools
 from utils.cleanup import cleanup_directories
+from services.audio_service import JOB_QUEUE_MODE
+from tts.whisper_pool import preload as preload_whisper
 
 # --------------------------------------------------
 # 🌍 ENV LOADING (DEPLOYMENT SAFE)
@@ -23,6 +28,42 @@ if ENV_FILE.exists():
 # Log (do NOT crash here)
 print("GROQ_API_KEY loaded:", bool(os.getenv("GROQ_API_KEY")))
 
+# --------------------------------------------------
+# 🧵 QUEUE WORKERS
+# --------------------------------------------------
+# Stage groups served by worker processes started with the app
+# (";"-separated). Each process runs several tasks at once (see
+# worker/runner.py, WORKER_SLOTS). Every web process starts its own
+# set: with `uvicorn --workers N` that is N sets (the in-flight limits
+# stay global). Set WORKER_GROUPS="" when running
+# `python -m worker.runner` separately.
+
+WORKER_GROUPS = os.getenv("WORKER_GROUPS", "tts,align;video")
+
+
+def start_workers() -> list[subprocess.Popen]:
+    if JOB_QUEUE_MODE != "queue":
+        return []
+
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "worker.runner", "--stages", group],
+            cwd=BASE_DIR
+        )
+        for group in WORKER_GROUPS.split(";")
+        if group.strip()
+    ]
+
+
+def stop_workers(workers: list[subprocess.Popen]):
+    for w in workers:
+        w.terminate()
+    for w in workers:
+        try:
+            w.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            w.kill()
+
 # --------------------------------------------------
 # 🔁 LIFESPAN
 # --------------------------------------------------
@@ -30,7 +71,15 @@ print("GROQ_API_KEY loaded:", bool(os.getenv("GROQ_API_KEY")))
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 AI Tutor Studio starting...")
+    # Alignment runs in this process only in inline mode; queue workers
+    # load their own model (see worker/runner.py)
+    if JOB_QUEUE_MODE != "queue" and os.getenv("WHISPER_PRELOAD", "0") == "1":
+        preload_whisper()
+    workers = start_workers()
     yield
+    prewarm_pool.shutdown(wait=False, cancel_futures=True)
+    shutdown_diagram_pools()
+    stop_workers(workers)
     print("🧹 Server shutting down — cleaning generated files")
 
     cleanup_directories(
@@ -41,6 +90,7 @@ async def lifespan(app: FastAPI):
             BASE_DIR / "static/frames",
             BASE_DIR / "static/videos",
             BASE_DIR / "static/audio",
+            BASE_DIR / "static/jobs",
         ],
         keep_latest=False
     )
@@ -1,22 +1,84 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
-
-from services.script_service import generate_script_from_file
-from tts.audio_generator import script_to_audio
-
-import os
-import uuid
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from llm.scheduler import scheduler
+from services.script_service import agenerate_script_from_file
+from services.audio_service import JOB_QUEUE_MODE, audio_error_status, produce_audio
+from tts.whisper_pool import whisper_pool
+from utils.jobs import new_job, JobWorkspace
+from worker.queue import get_queue
+from utils.uploads import save_upload, UploadTooLarge
+from utils.tracing import render_metrics, trace
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 
 # ---------------- HEALTH ----------------
 @router.get("/health")
 def health_check():
-    return {"status": "ok"}
+    # In queue mode alignment (and its Whisper pool) lives in the workers
+    if JOB_QUEUE_MODE == "queue":
+        whisper = {
+            worker: stats["whisper"]
+            for worker, stats in get_queue().worker_stats().items()
+            if "whisper" in stats
+        }
+    else:
+        whisper = whisper_pool.stats()
+
+    return {
+        "status": "ok",
+        "whisper": whisper,
+        "llm": scheduler.stats(),
+        "queue": get_queue().stage_counts()
+    }
+
+
+# ---------------- METRICS ----------------
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus scrape endpoint (stage latency histograms, LLM tokens).
+    Per process: with several web workers, scrape each one.
+    """
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# ---------------- JOB STATUS ----------------
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    try:
+        job = JobWorkspace(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    tasks = [
+        {
+            "id": t["id"],
+            "stage": t["stage"],
+            "status": t["status"],
+            "priority": t["priority"],
+            "attempts": t["attempts"],
+            "error": (t["error"] or "").splitlines()[0] if t["error"] else None,
+            "updated_at": t["updated_at"],
+        }
+        for t in get_queue().job_tasks(job_id)
+    ]
+
+    if not tasks and not job.exists():
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    return {
+        "job_id": job_id,
+        "tasks": tasks,
+        "video_ready": job.video_path.exists(),
+        "video_url": job.video_url
+    }
 
 
 # ---------------- SCRIPT GENERATION ----------------
@@ -33,21 +95,30 @@ async def generate_script_api(
             detail="Only PDF and PPTX files are supported"
         )
 
-    file_id = str(uuid.uuid4())
-    saved_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
+    job = await run_in_threadpool(new_job)
+
+    try:
+        upload = await save_upload(file, str(job.uploads))
+    except UploadTooLarge as e:
+        job.remove()
+        raise HTTPException(status_code=413, detail=str(e))
 
-    with open(saved_path, "wb") as f:
-        f.write(await file.read())
+    saved_path = upload["path"]
 
     try:
-        script = generate_script_from_file(saved_path)
+        with trace(job.job_id) as job_trace:
+            script = await agenerate_script_from_file(
+                saved_path, content_hash=upload["sha256"]
+            )
         return JSONResponse(
             status_code=200,
             content={
                 "status": "success",
                 "tone": tone,
-                "script": script
-            }
+                "script": script,
+                "timings": job_trace.summary()
+            },
+            headers={"Server-Timing": job_trace.server_timing()}
         )
 
     except ValueError as e:
@@ -59,8 +130,7 @@ async def generate_script_api(
         raise HTTPException(status_code=500, detail=str(e))
 
     finally:
-        if os.path.exists(saved_path):
-            os.remove(saved_path)
+        await run_in_threadpool(job.remove)
 
 
 # ---------------- AUDIO GENERATION ----------------
@@ -76,10 +146,24 @@ async def generate_audio_api(script: str):
             detail="Script text cannot be empty"
         )
 
-    audio_result = script_to_audio(script)
+    job = await run_in_threadpool(new_job)
+
+    try:
+        with trace(job.job_id) as job_trace:
+            # TTS + alignment in the workers (inline only if JOB_QUEUE_MODE=inline)
+            audio_result = await run_in_threadpool(produce_audio, job, script)
+    except Exception as e:
+        await run_in_threadpool(job.remove)
+        status = audio_error_status(e)
+        if status is None:
+            raise
+        raise HTTPException(status_code=status, detail=str(e).splitlines()[0])
 
+    # The workspace only has to live until the file is sent
     return FileResponse(
-        audio_result["audio_url"],
+        audio_result["audio_path"],
         media_type="audio/mpeg",
-        filename="tutorial_audio.mp3"
+        filename="tutorial_audio.mp3",
+        headers={"Server-Timing": job_trace.server_timing()},
+        background=BackgroundTask(job.remove)
     )
@@ -1,24 +1,24 @@
 from fastapi import APIRouter, Request, UploadFile, File, Form, BackgroundTasks
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 import os
-import uuid
 import re
 import json
 import logging
 
-from services.script_service import generate_script_from_file
-from llm.diagram_planner import generate_architecture_plan
-from diagram.frame_generator import progressive_frames, render_frame
-from tts.audio_generator import script_to_audio
+from services.script_service import astream_script_from_file
+from diagram.pipeline import SlideDiagramPipeline
+from services.audio_service import JOB_QUEUE_MODE, audio_error_status, produce_audio
+from tts.audio_generator import prewarm_slide
+from worker.queue import get_queue, PRIORITY_NORMAL
 from video.moviepy_builder import build_video_from_frames
-from utils.cleanup import cleanup_directories
-
-# 🔥 KEY IMPORTS (keyword-driven diagrams)
-from diagram.keyword_extractor import extract_keywords_from_slide
-from diagram.keyword_to_graph import keywords_to_graph
+from utils.jobs import new_job, get_job
+from utils.uploads import save_upload, UploadTooLarge
+from utils.tracing import bind, span, trace
 
 # --------------------------------------------------
 # LOGGING
@@ -34,11 +34,18 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
-UPLOAD_DIR = "uploads"
-FRAME_DIR = "static/frames"
+# Synthesize each slide's narration into the TTS segment cache as soon as
+# the slide is streamed, so /ui/audio mostly hits the cache
+TTS_PREWARM = os.getenv("TTS_PREWARM", "1") == "1"
+
+# Own bounded pool: prewarm work never competes with the default executor
+# that serves run_in_threadpool / asyncio.to_thread on the request path
+TTS_PREWARM_WORKERS = int(os.getenv("TTS_PREWARM_WORKERS", 2))
+prewarm_pool = ThreadPoolExecutor(
+    max_workers=max(1, TTS_PREWARM_WORKERS),
+    thread_name_prefix="tts-prewarm"
+)
 
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(FRAME_DIR, exist_ok=True)
 
 # --------------------------------------------------
 # HELPERS
@@ -68,6 +75,13 @@ def parse_slides_from_script(script: str) -> list[dict]:
     return slides
 
 
+def join_slides(slides: list[dict]) -> str:
+    """
+    Inverse of parse_slides_from_script.
+    """
+    return "\n\n".join(f"{s['title']}\n{s['text']}" for s in slides)
+
+
 def normalize_slides(slides: list[dict]) -> list[dict]:
     return [{
         "title": s.get("title", f"Slide {i+1}:"),
@@ -80,7 +94,23 @@ def normalize_slides(slides: list[dict]) -> list[dict]:
     } for i, s in enumerate(slides)]
 
 
-def attach_words_to_slides(slides: list[dict], words: list[dict]):
+def attach_words_to_slides(
+    slides: list[dict],
+    words: list[dict],
+    slide_times: list[dict] | None = None
+):
+    # Exact per-slide offsets from segmented TTS → assign words by time
+    if slide_times and len(slide_times) == len(slides):
+        for slide, times in zip(slides, slide_times):
+            slide["start"] = times["start"]
+            slide["end"] = times["end"]
+            slide["words"] = [
+                w for w in words
+                if times["start"] <= w["start"] < times["end"]
+            ]
+        return
+
+    # Fallback: guess boundaries from word counts
     word_idx = 0
     for slide in slides:
         wc = len(slide["text"].split())
@@ -96,6 +126,27 @@ def attach_words_to_slides(slides: list[dict], words: list[dict]):
     if slides and words:
         slides[-1]["end"] = words[-1]["end"]
 
+
+def schedule_video(job, slides: list[dict], audio_path: str, background_tasks: BackgroundTasks):
+    if JOB_QUEUE_MODE != "queue":
+        background_tasks.add_task(
+            build_video_from_frames,
+            slides=slides,
+            audio_path=audio_path,
+            output_path=str(job.video_path)
+        )
+        return
+
+    get_queue().enqueue(
+        job.job_id, "video",
+        {
+            "slides": slides,
+            "audio_path": audio_path,
+            "output_path": str(job.video_path)
+        },
+        priority=PRIORITY_NORMAL
+    )
+
 # --------------------------------------------------
 # ROUTES
 # --------------------------------------------------
@@ -105,13 +156,6 @@ def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-SLIDE_COMPLEXITY = {
-    0: 2,
-    1: 4,
-    2: 5,
-    3: 6,
-}
-
 # --------------------------------------------------
 # SCRIPT + DIAGRAM GENERATION
 # --------------------------------------------------
@@ -127,82 +171,71 @@ async def generate_script_ui(
             {"request": request, "error": "Only PDF and PPTX files are supported."}
         )
 
-    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
-
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    # Every request gets its own workspace (uploads, frames, audio, video)
+    job = await run_in_threadpool(new_job)
 
     try:
-        # 1️⃣ Generate narration script (for audio ONLY)
-        script = generate_script_from_file(file_path)
-        if not script.strip():
-            raise RuntimeError("Generated script is empty")
-
-        # 2️⃣ Slides (used for BOTH script + diagrams)
-        slides = normalize_slides(parse_slides_from_script(script))
-
-        # 3️⃣ Cleanup old frames
-        cleanup_directories([FRAME_DIR], keep_latest=False)
-        global_frame_counter = 1
-
-        # 4️⃣ Generate diagrams PER SLIDE (KEYWORD-DRIVEN)
-        for slide in slides:
-            slide_index = slide["slide_index"]
-            slide_text = slide["text"]
-
-            # 🔑 A) Extract keywords/components from slide text
-            keyword_data = extract_keywords_from_slide(slide_text)
-
-            # 🔑 B) Convert keywords → architecture graph
-            keyword_graph = keywords_to_graph(keyword_data)
-
-            # 🔁 C) Fallback ONLY if keyword extraction fails
-            if not keyword_graph.get("nodes"):
-                logger.warning(
-                    "Keyword graph empty, falling back to architecture planner"
-                )
-                keyword_graph = generate_architecture_plan(
-                    slide_text,
-                    max_nodes=SLIDE_COMPLEXITY.get(slide_index, 6),
-                    slide_index=slide_index
-                )
-
-            # 🔑 D) Generate progressive frames
-            slide_frames = progressive_frames(
-                keyword_graph,
-                mode="architecture"
-            )
-
-            slide["frames"] = []
-
-            for frame_plan in slide_frames:
-                try:
-                    frame_path = render_frame(frame_plan, global_frame_counter)
-                    if frame_path:
-                        slide["frames"].append(
-                            "/" + frame_path.replace("\\", "/")
-                        )
-                        global_frame_counter += 1
-                except Exception as e:
-                    logger.error(f"Frame render failed: {e}")
-
-    except Exception as e:
-        logger.exception("Script / diagram generation failed")
+        upload = await save_upload(file, str(job.uploads))
+    except UploadTooLarge as e:
+        job.remove()
         return templates.TemplateResponse(
             "index.html",
             {"request": request, "error": str(e)}
         )
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+
+    file_path = upload["path"]
+
+    pipeline = SlideDiagramPipeline(frames_dir=str(job.frames))
+    prewarms = []
+    slides = []
+
+    with trace(job.job_id) as job_trace:
+        try:
+            # 1️⃣ Stream the narration script slide by slide
+            async for slide in astream_script_from_file(
+                file_path, content_hash=upload["sha256"]
+            ):
+                # 2️⃣ Slides (used for BOTH script + diagrams)
+                slide = normalize_slides([slide])[0]
+                slides.append(slide)
+
+                # 3️⃣ Diagrams + narration start while later slides generate
+                pipeline.add(slide)
+                if TTS_PREWARM:
+                    prewarms.append(prewarm_pool.submit(bind(prewarm_slide), slide["text"]))
+
+            if not slides:
+                raise RuntimeError("Generated script is empty")
+
+            script = join_slides(slides)
+
+            with span("diagrams_wait"):
+                await run_in_threadpool(pipeline.finish)
+
+        except Exception as e:
+            logger.exception("Script / diagram generation failed")
+            pipeline.cancel()
+            for future in prewarms:
+                future.cancel()
+            return templates.TemplateResponse(
+                "index.html",
+                {"request": request, "error": str(e)}
+            )
+        finally:
+            await run_in_threadpool(job.remove_uploads)
+
+    timings = job_trace.summary()
+    logger.info("Job %s script timings: %s", job.job_id, timings)
 
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
+            "job_id": job.job_id,
             "script": script,
             "slides": slides,
-            "slides_json": json.dumps(slides)
+            "slides_json": json.dumps(slides),
+            "timings": timings
         }
     )
 
@@ -215,21 +248,43 @@ def generate_audio_ui(
     request: Request,
     background_tasks: BackgroundTasks,
     script: str = Form(...),
-    slides_json: Optional[str] = Form(None)
+    slides_json: Optional[str] = Form(None),
+    job_id: str = Form(...)
 ):
+    try:
+        job = get_job(job_id)
+    except ValueError as e:
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "error": str(e)}
+        )
+
     slides = json.loads(slides_json)
 
-    audio_result = script_to_audio(script)
-    audio_url = audio_result["audio_url"]
-    words = audio_result["timestamps"]
+    # Video runs in the background / a worker, after this response
+    with trace(job.job_id) as job_trace:
+        try:
+            with span("audio"):
+                audio_result = produce_audio(job, script)
+        except Exception as e:
+            status = audio_error_status(e)
+            if status is None:
+                raise
+            logger.error("Job %s audio failed: %s", job.job_id, e)
+            return templates.TemplateResponse(
+                "index.html",
+                {"request": request, "error": f"Audio generation failed: {str(e).splitlines()[0]}"},
+                status_code=status
+            )
+        audio_url = audio_result["audio_url"]
+        words = audio_result["timestamps"]
 
-    attach_words_to_slides(slides, words)
+        attach_words_to_slides(slides, words, audio_result.get("slides"))
 
-    background_tasks.add_task(
-        build_video_from_frames,
-        slides=slides,
-        audio_path=audio_url.lstrip("/")
-    )
+        schedule_video(job, slides, audio_result["audio_path"], background_tasks)
+
+    timings = job_trace.summary()
+    logger.info("Job %s audio timings: %s", job.job_id, timings)
 
     return templates.TemplateResponse(
         "player.html",
@@ -237,6 +292,7 @@ def generate_audio_ui(
             "request": request,
             "audio_url": audio_url,
             "slides": slides,
-            "video_url": "/static/videos/final_demo.mp4"
+            "video_url": job.video_url,
+            "timings": timings
         }
     )
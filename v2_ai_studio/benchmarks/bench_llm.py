@@ -0,0 +1,85 @@
+# benchmarks/bench_llm.py
+"""
+Scheduler behaviour against the local mock Groq server: mixed-priority
+load, server-side 429s, latency per priority class.
+
+Run from the project root:
+    python -m benchmarks.bench_llm --requests 60 --rpm 40 --window 5 --fail-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_groq import start_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=24)
+    parser.add_argument("--rpm", type=int, default=40)
+    parser.add_argument("--tpm", type=int, default=200000)
+    parser.add_argument("--window", type=float, default=5.0, help="mock rate window in seconds")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, counters = start_server(
+        rpm=args.rpm,
+        tpm=args.tpm,
+        window=args.window,
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        injected_retry_after=0.5,
+    )
+
+    # The client reads its config at import time
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock")
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    # Client budget matches the mock's (scaled) window
+    os.environ.setdefault("LLM_RPM", str(args.rpm * 60 / args.window))
+    os.environ.setdefault("LLM_TPM", str(args.tpm * 60 / args.window))
+
+    from llm.groq_client import generate, scheduler_stats
+    from llm.scheduler import PRIORITY_SCRIPT, PRIORITY_NORMAL, PRIORITY_FALLBACK
+
+    classes = [PRIORITY_FALLBACK, PRIORITY_NORMAL, PRIORITY_SCRIPT]
+    latencies = {p: [] for p in classes}
+    failures = []
+
+    def call(i: int):
+        priority = classes[i % len(classes)]
+        start = time.perf_counter()
+        try:
+            generate(f"request {i}", max_tokens=50, priority=priority)
+        except Exception as e:
+            failures.append(repr(e))
+            return
+        latencies[priority].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(json.dumps({
+        "requests": args.requests,
+        "seconds": round(elapsed, 3),
+        "failed": len(failures),
+        "server": {k: v for k, v in counters.items() if k != "lock"},
+        "mean_latency_by_priority": {
+            str(p): round(sum(v) / len(v), 3) if v else None
+            for p, v in latencies.items()
+        },
+        "scheduler": scheduler_stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
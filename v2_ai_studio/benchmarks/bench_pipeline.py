@@ -0,0 +1,276 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline timings, fully offline: script → diagrams → audio →
+video on a synthetic PDF / PPTX, with every external service replaced
+by a deterministic local stand-in of configurable latency:
+
+- Groq   → benchmarks/mock_groq.py (answers script and keyword prompts)
+- gTTS   → the offline TTS backend (silent MP3 at speaking rate)
+- d2 CLI → a fake `d2` on PATH that sleeps and copies a PNG
+           (or --diagram-backend native for the in-process renderer)
+
+Reports wall time, CPU time (own + child processes) and peak RSS per
+stage as JSON. --runs 2 shows the warm-cache run next to the cold one.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --format pdf --pages 40 --llm-latency 0.3
+    python -m benchmarks.bench_pipeline --format pptx --slides 30 --runs 2 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from PIL import Image, ImageDraw
+
+from benchmarks.mock_groq import start_server
+from benchmarks.synthetic import make_pdf, make_pptx
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+MAXRSS_UNIT = 1 if platform.system() == "Darwin" else 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# ---------------- MEASUREMENT ----------------
+
+def current_rss() -> int | None:
+    """
+    Resident set size in bytes (Linux /proc), None elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _mb(value: float) -> float:
+    return round(value / (1024 * 1024), 1)
+
+
+class StageRecorder:
+    """
+    Per-stage wall time, CPU time and peak RSS.
+
+    Peak RSS is sampled every sample_interval seconds during the stage;
+    max_rss_mb is the process-lifetime high-water mark after it.
+    """
+
+    def __init__(self, sample_interval: float = 0.01):
+        self.sample_interval = sample_interval
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        record = {"stage": name}
+        peak = [current_rss() or 0]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.sample_interval):
+                rss = current_rss()
+                if rss:
+                    peak[0] = max(peak[0], rss)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = repr(e)
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall, 3)
+            record["cpu_s"] = round(time.process_time() - cpu, 3)
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            record["child_cpu_s"] = round(
+                (after.ru_utime + after.ru_stime)
+                - (children.ru_utime + children.ru_stime), 3
+            )
+
+            done.set()
+            sampler.join()
+            if peak[0]:
+                record["peak_rss_mb"] = _mb(peak[0])
+            record["max_rss_mb"] = _mb(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT
+            )
+            self.stages.append(record)
+
+
+# ---------------- STAND-INS ----------------
+
+def install_fake_d2(bin_dir: str, latency: float) -> str:
+    """
+    `d2 <input.d2> <output.png>` that sleeps `latency` seconds and
+    copies a fixed PNG. Prepended to PATH.
+    """
+    template = os.path.abspath(os.path.join(bin_dir, "frame.png"))
+    image = Image.new("RGB", (1280, 720), "#ffffff")
+    ImageDraw.Draw(image).rectangle((440, 300, 840, 420), outline="#0d32b2", width=4)
+    image.save(template)
+
+    script = os.path.join(bin_dir, "d2")
+    with open(script, "w") as f:
+        f.write(f'#!/bin/sh\nsleep {latency}\ncp "{template}" "$2"\n')
+    os.chmod(script, os.stat(script).st_mode | stat.S_IEXEC)
+
+    os.environ["PATH"] = os.path.abspath(bin_dir) + os.pathsep + os.environ["PATH"]
+    return script
+
+
+def configure(args, root: str, server_port: int):
+    """
+    Points every backend and cache at the stand-ins / scratch root.
+    Must run before the app modules are imported (they read env at import).
+    """
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server_port}"
+    os.environ["GROQ_API_KEY"] = "mock"
+    os.environ.setdefault("LLM_RPM", "0")
+    os.environ.setdefault("LLM_TPM", "0")
+
+    os.environ["TTS_BACKEND"] = "offline"
+    os.environ["TTS_OFFLINE_LATENCY"] = str(args.tts_latency)
+
+    os.environ["DIAGRAM_BACKEND"] = "native" if args.diagram_backend == "native" else "d2"
+
+    for var, sub in (
+        ("LLM_CACHE_DIR", "llm"),
+        ("SECTION_CACHE_DIR", "sections"),
+        ("KEYWORD_CACHE_DIR", "keywords"),
+        ("FRAME_CACHE_DIR", "frames"),
+        ("PREPARED_CACHE_DIR", "prepared"),
+        ("TTS_CACHE_DIR", "tts"),
+        ("VIDEO_SEGMENT_CACHE_DIR", "video_segments"),
+    ):
+        os.environ[var] = os.path.join(root, "cache", sub)
+
+
+# ---------------- RUN ----------------
+
+def run_once(args, root: str, input_path: str, run: int) -> list[dict]:
+    from services.script_service import generate_script_from_file
+    from llm.script_generator import parse_script
+    from diagram.pipeline import build_slide_diagrams
+    from tts.audio_generator import script_to_audio
+    from video.moviepy_builder import build_video_from_frames
+
+    work = os.path.join(root, f"run{run}")
+    dirs = {name: os.path.join(work, name) for name in ("frames", "audio", "meta", "video")}
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+
+    recorder = StageRecorder()
+    script = slides = audio = None
+
+    with recorder.stage("script") as record:
+        script = generate_script_from_file(input_path)
+        record["chars"] = len(script)
+
+    if script:
+        with recorder.stage("diagrams") as record:
+            slides = [
+                {**s, "frames": [], "start": 0.0, "end": 0.0}
+                for s in parse_script(script)
+            ]
+            build_slide_diagrams(slides, frames_dir=dirs["frames"])
+            record["slides"] = len(slides)
+            record["frames"] = sum(len(s["frames"]) for s in slides)
+
+        with recorder.stage("audio") as record:
+            audio = script_to_audio(script, audio_dir=dirs["audio"], meta_dir=dirs["meta"])
+            record["seconds_of_audio"] = audio["duration"]
+
+    if slides and audio:
+        for slide, times in zip(slides, audio["slides"]):
+            slide["start"], slide["end"] = times["start"], times["end"]
+
+        with recorder.stage("video") as record:
+            output = os.path.join(dirs["video"], "final.mp4")
+            build_video_from_frames(slides, audio["audio_path"], output, engine=args.video_engine)
+            record["bytes"] = os.path.getsize(output)
+
+    return recorder.stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["pdf", "pptx"], default="pdf")
+    parser.add_argument("--pages", type=int, default=20, help="PDF pages")
+    parser.add_argument("--slides", type=int, default=20, help="PPTX slides")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=1, help="runs sharing one cache (2 = cold + warm)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="mock Groq seconds per request")
+    parser.add_argument("--llm-stream-delay", type=float, default=0.005)
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="seconds per TTS segment")
+    parser.add_argument("--diagram-backend", choices=["fake-d2", "native"], default="fake-d2")
+    parser.add_argument("--d2-latency", type=float, default=0.05, help="fake d2 seconds per frame")
+    parser.add_argument("--video-engine", default=None, help="moviepy | ffmpeg | segmented (default: VIDEO_ENGINE)")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    server, counters = start_server(
+        rpm=0,
+        tpm=0,
+        latency=args.llm_latency,
+        echo_slides=True,
+        stream_delay=args.llm_stream_delay,
+    )
+
+    # Frame / audio paths are served as URLs relative to the project
+    # root, so scratch space lives under it
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_", dir=".") as tmp:
+        root = os.path.relpath(tmp)
+        configure(args, root, server.server_port)
+        if args.diagram_backend == "fake-d2":
+            bin_dir = os.path.join(root, "bin")
+            os.makedirs(bin_dir)
+            install_fake_d2(bin_dir, args.d2_latency)
+
+        recorder = StageRecorder()
+        with recorder.stage("input") as record:
+            if args.format == "pdf":
+                input_path = make_pdf(os.path.join(root, "input.pdf"), args.pages, args.seed)
+            else:
+                input_path = make_pptx(os.path.join(root, "input.pptx"), args.slides, args.seed)
+            record["bytes"] = os.path.getsize(input_path)
+
+        runs = []
+        for run in range(1, args.runs + 1):
+            stages = run_once(args, root, input_path, run)
+            runs.append({
+                "run": run,
+                "wall_s": round(sum(s["wall_s"] for s in stages), 3),
+                "stages": stages,
+            })
+
+    server.shutdown()
+
+    report = {
+        "config": {
+            k: v for k, v in vars(args).items() if k != "output"
+        },
+        "input": recorder.stages[0],
+        "runs": runs,
+        "llm_server": {k: v for k, v in counters.items() if k != "lock"},
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
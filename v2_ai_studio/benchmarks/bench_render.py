@@ -0,0 +1,77 @@
+# benchmarks/bench_render.py
+"""
+Frames/sec of the d2 CLI backend vs the native in-process renderer.
+
+Run from the project root:
+    python -m benchmarks.bench_render --frames 60
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from diagram.frame_generator import RENDER_BACKENDS, progressive_frames
+
+SAMPLE_PLAN = {
+    "title": "System Architecture",
+    "nodes": [
+        {"id": "user_data", "label": "User Data", "role": "input"},
+        {"id": "feature_store", "label": "Feature Store", "role": "storage"},
+        {"id": "ml_platform", "label": "ML Platform", "role": "core"},
+        {"id": "training", "label": "Training Jobs", "role": "process"},
+        {"id": "predictions", "label": "Predictions", "role": "output"},
+        {"id": "monitoring", "label": "Monitoring", "role": "external"},
+    ],
+    "edges": [
+        {"from": "user_data", "to": "feature_store"},
+        {"from": "feature_store", "to": "ml_platform"},
+        {"from": "ml_platform", "to": "training"},
+        {"from": "training", "to": "predictions"},
+        {"from": "predictions", "to": "monitoring"},
+    ],
+}
+
+
+def bench_backend(backend: str, frames: int) -> dict:
+    plans = progressive_frames(SAMPLE_PLAN)
+
+    # Scratch output: never leave bench PNGs in static/frames
+    with tempfile.TemporaryDirectory(prefix="bench_render_") as tmp:
+        start = time.perf_counter()
+        rendered = 0
+        for i in range(frames):
+            # backend directly → bypasses the frame cache
+            path = RENDER_BACKENDS[backend](plans[i % len(plans)], f"bench_{backend}_{i}", Path(tmp))
+            if path:
+                rendered += 1
+        elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "frames": rendered,
+        "seconds": round(elapsed, 4),
+        "frames_per_sec": round(rendered / elapsed, 2) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--backends", default="d2,native")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends.split(","):
+        if backend == "d2" and not shutil.which("d2"):
+            results.append({"backend": "d2", "skipped": "d2 CLI not on PATH"})
+            continue
+        results.append(bench_backend(backend, args.frames))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_video.py
+"""
+Encode time per minute of output: MoviePy compose vs ffmpeg engines.
+
+Run from the project root:
+    python -m benchmarks.bench_video --slides 10 --frames-per-slide 3 --seconds-per-slide 6
+
+Run it twice to see the segment cache: the second segmented run only
+concatenates.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from tts.backends import OfflineBackend
+
+
+def make_frames(out_dir: str, slides: int, frames_per_slide: int, seconds: float) -> list[dict]:
+    result = []
+    for s in range(slides):
+        frames = []
+        for f in range(frames_per_slide):
+            path = os.path.join(out_dir, f"bench_{s}_{f}.png")
+            image = Image.new("RGB", (1479, 146), "#ffffff")
+            ImageDraw.Draw(image).rectangle((40 + 200 * f, 40, 200 + 200 * f, 106), outline="#0d32b2", width=2)
+            image.save(path)
+            frames.append("/" + os.path.relpath(path))  # app-style URL path
+        result.append({
+            "frames": frames,
+            "start": s * seconds,
+            "end": (s + 1) * seconds,
+        })
+    return result
+
+
+def make_audio(out_dir: str, seconds: float) -> str:
+    path = os.path.join(out_dir, "bench_audio.mp3")
+    words = " ".join(["word"] * int(seconds * 2.5))
+    with open(path, "wb") as f:
+        f.write(OfflineBackend().synthesize(words))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slides", type=int, default=10)
+    parser.add_argument("--frames-per-slide", type=int, default=3)
+    parser.add_argument("--seconds-per-slide", type=float, default=6.0)
+    parser.add_argument("--engines", default="moviepy,ffmpeg,segmented")
+    args = parser.parse_args()
+
+    results = []
+    # Frames are addressed like static URLs (relative to the project root)
+    with tempfile.TemporaryDirectory(dir=".") as tmp:
+        slides = make_frames(tmp, args.slides, args.frames_per_slide, args.seconds_per_slide)
+        output_minutes = args.slides * args.seconds_per_slide / 60
+        audio = make_audio(tmp, args.slides * args.seconds_per_slide)
+
+        for engine in args.engines.split(","):
+            try:
+                from video.moviepy_builder import build_video_from_frames
+            except ImportError as e:
+                results.append({"engine": engine, "skipped": str(e)})
+                continue
+
+            output = os.path.join(tmp, f"bench_{engine}.mp4")
+            start = time.perf_counter()
+            try:
+                build_video_from_frames(slides, audio, output, engine=engine)
+            except Exception as e:
+                results.append({"engine": engine, "skipped": str(e)})
+                continue
+            elapsed = time.perf_counter() - start
+
+            results.append({
+                "engine": engine,
+                "output_minutes": round(output_minutes, 3),
+                "seconds": round(elapsed, 3),
+                "seconds_per_output_minute": round(elapsed / output_minutes, 3),
+                "bytes": os.path.getsize(output),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# benchmarks/mock_groq.py
+"""
+Local stand-in for the Groq chat completions endpoint.
+
+Enforces a requests/min and tokens/min window, answers with the same
+x-ratelimit-* / retry-after headers Groq sends, and can inject random
+429s. Point the app at it with GROQ_BASE_URL:
+
+    python -m benchmarks.mock_groq --port 8765 --rpm 30 --latency 0.2
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=mock uvicorn app.main:app
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+SLIDE_INPUT = re.compile(
+    r"^Slide \d+ CONTENT:\n(.*?)(?=^Slide \d+ CONTENT:|^FINAL REMINDERS:|\Z)",
+    re.MULTILINE | re.DOTALL
+)
+ECHO_WORDS = 40
+KEYWORD_BATCH_INPUT = re.compile(r'^SLIDE (\d+):\n"""(.*?)"""', re.MULTILINE | re.DOTALL)
+KEYWORD_SINGLE_INPUT = re.compile(r'^TEXT:\n"""(.*?)"""', re.MULTILINE | re.DOTALL)
+NAME = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*")
+COMPONENT_TYPES = ["service", "storage", "compute", "platform", "subsystem"]
+
+
+def echo_script(prompt: str) -> str | None:
+    """
+    A well-formed slide-wise script with one block per "Slide N CONTENT:"
+    section of a script prompt, narrating the first words of its content.
+    """
+    contents = SLIDE_INPUT.findall(prompt)
+    if not contents:
+        return None
+    count = len(contents)
+    return "\n\n".join(
+        f"Slide {n}:\nNarration for slide {n} of {count}. "
+        + " ".join(content.split()[:ECHO_WORDS])
+        for n, content in enumerate(contents, start=1)
+    )
+
+
+def _components(text: str) -> dict:
+    """
+    Keyword-extractor answer for one slide: its capitalized names as
+    components, chained in order of appearance.
+    """
+    names = list(dict.fromkeys(NAME.findall(text)))[:5] or ["Component"]
+    return {
+        "components": [
+            {"name": name, "type": COMPONENT_TYPES[i % len(COMPONENT_TYPES)]}
+            for i, name in enumerate(names)
+        ],
+        "relations": [
+            {"from": a, "to": b, "relation": "flows_to"}
+            for a, b in zip(names, names[1:])
+        ],
+    }
+
+
+def echo_keywords(prompt: str) -> str | None:
+    """
+    JSON for a batched ("SLIDE i:") or single-slide ("TEXT:") keyword prompt.
+    """
+    batch = KEYWORD_BATCH_INPUT.findall(prompt)
+    if batch:
+        return json.dumps({i: _components(text) for i, text in batch})
+
+    single = KEYWORD_SINGLE_INPUT.search(prompt)
+    if single:
+        return json.dumps(_components(single.group(1)))
+    return None
+
+
+class RateWindow:
+    """
+    Sliding window of (timestamp, tokens) over the last `window` seconds.
+    """
+
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self.events and self.events[0][0] <= now - self.window:
+            self.events.popleft()
+
+    def admit(self, tokens: int) -> tuple[bool, dict]:
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            used_requests = len(self.events)
+            used_tokens = sum(t for _, t in self.events)
+            allowed = (
+                (not self.rpm or used_requests < self.rpm)
+                and (not self.tpm or used_tokens + tokens <= self.tpm)
+            )
+            if allowed:
+                self.events.append((now, tokens))
+                used_requests += 1
+                used_tokens += tokens
+
+            reset = (
+                self.events[0][0] + self.window - now
+                if self.events else 0.0
+            )
+
+            headers = {}
+            for kind, limit, used in (
+                ("requests", self.rpm, used_requests),
+                ("tokens", self.tpm, used_tokens),
+            ):
+                if limit:  # 0 = unlimited, no headers
+                    headers[f"x-ratelimit-limit-{kind}"] = str(limit)
+                    headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, limit - used))
+                    headers[f"x-ratelimit-reset-{kind}"] = f"{reset:.2f}s"
+            if not allowed:
+                headers["retry-after"] = f"{max(reset, 0.01):.2f}"
+
+            return allowed, headers
+
+
+def make_handler(args, window: RateWindow, counters: dict):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, request: dict, completion: str, usage: dict, headers: dict):
+            """
+            Server-sent events, one chunk per stream_chunk characters;
+            usage rides on the last chunk under x_groq like Groq's.
+            """
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+            pieces = [
+                completion[i:i + args.stream_chunk]
+                for i in range(0, len(completion), args.stream_chunk)
+            ]
+
+            def event(delta: dict, finish: str | None = None, extra: dict | None = None):
+                body = {
+                    "id": chunk_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    **(extra or {}),
+                }
+                self.wfile.write(f"data: {json.dumps(body)}\n\n".encode())
+                self.wfile.flush()
+
+            event({"role": "assistant", "content": ""})
+            for piece in pieces:
+                time.sleep(args.stream_delay)
+                event({"content": piece})
+            event({}, "stop", {"x_groq": {"id": chunk_id, "usage": usage}})
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def do_POST(self):
+            if self.path != COMPLETIONS_PATH:
+                self._send(404, {"error": {"message": "not found"}}, {})
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+            prompt_tokens = sum(
+                len(m.get("content", "")) // 4 + 1 for m in request.get("messages", [])
+            )
+            completion = args.content
+            if args.echo_slides:
+                prompt = request["messages"][-1]["content"]
+                completion = echo_script(prompt) or echo_keywords(prompt) or completion
+            completion_tokens = len(completion) // 4 + 1
+            total = prompt_tokens + completion_tokens
+
+            allowed, headers = window.admit(total)
+            injected = allowed and random.random() < args.fail_rate
+            if injected:
+                headers["retry-after"] = f"{args.injected_retry_after:.2f}"
+
+            with counters["lock"]:
+                counters["requests"] += 1
+                counters["rate_limited"] += not allowed or injected
+                counters["in_flight"] += 1
+                counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+
+            try:
+                if not allowed or injected:
+                    self._send(429, {"error": {
+                        "message": "Rate limit reached",
+                        "type": "tokens",
+                        "code": "rate_limit_exceeded",
+                    }}, headers)
+                    return
+
+                time.sleep(args.latency)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": total,
+                }
+                if request.get("stream"):
+                    self._stream(request, completion, usage, headers)
+                    return
+
+                self._send(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": completion},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                }, headers)
+            finally:
+                with counters["lock"]:
+                    counters["in_flight"] -= 1
+
+    return Handler
+
+
+def start_server(
+    port: int = 0,
+    rpm: int = 30,
+    tpm: int = 6000,
+    window: float = 60.0,
+    latency: float = 0.2,
+    fail_rate: float = 0.0,
+    injected_retry_after: float = 1.0,
+    content: str = "mock completion",
+    echo_slides: bool = False,
+    stream_chunk: int = 16,
+    stream_delay: float = 0.01
+) -> tuple[ThreadingHTTPServer, dict]:
+    """
+    Starts the mock in a daemon thread. Returns (server, counters);
+    the base URL is http://127.0.0.1:<server.server_port>.
+    """
+    args = argparse.Namespace(
+        latency=latency,
+        fail_rate=fail_rate,
+        injected_retry_after=injected_retry_after,
+        content=content,
+        echo_slides=echo_slides,
+        stream_chunk=stream_chunk,
+        stream_delay=stream_delay,
+    )
+    counters = {
+        "lock": threading.Lock(),
+        "requests": 0,
+        "rate_limited": 0,
+        "in_flight": 0,
+        "max_in_flight": 0,
+    }
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port),
+        make_handler(args, RateWindow(rpm, tpm, window), counters)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--tpm", type=int, default=6000)
+    parser.add_argument("--window", type=float, default=60.0, help="rate window in seconds")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="random 429 probability")
+    parser.add_argument("--injected-retry-after", type=float, default=1.0)
+    parser.add_argument("--content", default="mock completion")
+    parser.add_argument("--echo-slides", action="store_true", help="answer script and keyword prompts slide for slide")
+    parser.add_argument("--stream-chunk", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--stream-delay", type=float, default=0.01, help="seconds between chunks")
+    args = parser.parse_args()
+
+    server, _ = start_server(
+        port=args.port,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        window=args.window,
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        injected_retry_after=args.injected_retry_after,
+        content=args.content,
+        echo_slides=args.echo_slides,
+        stream_chunk=args.stream_chunk,
+        stream_delay=args.stream_delay,
+    )
+    print(f"Mock Groq on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
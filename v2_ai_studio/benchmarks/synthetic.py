@@ -0,0 +1,138 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic inputs: text PDFs and PPTX decks of any size,
+with the running headers / footers real documents have.
+"""
+
+import random
+
+from pptx import Presentation
+
+COMPONENTS = [
+    "Ingestion Service", "Feature Store", "Training Cluster", "Model Registry",
+    "Inference Gateway", "Monitoring Stack", "Message Queue", "Data Lake",
+    "Vector Index", "Batch Scheduler", "API Gateway", "Cache Layer",
+]
+VERBS = ["feeds", "reads from", "publishes to", "is monitored by", "scales with", "stores data in"]
+FILLER = [
+    "under peak load", "for every tenant", "with at-least-once delivery",
+    "behind a load balancer", "in near real time", "once per hour",
+]
+
+PDF_LINES_PER_PAGE = 40
+
+
+def sentence(rng: random.Random) -> str:
+    a, b = rng.sample(COMPONENTS, 2)
+    return f"The {a} {rng.choice(VERBS)} the {b} {rng.choice(FILLER)}."
+
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+# ---------------- PDF ----------------
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text: str, width: int = 90) -> list[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def make_pdf(path: str, pages: int, seed: int = 0) -> str:
+    """
+    Text-only PDF (Helvetica, one content stream per page) written by
+    hand, so no PDF library is needed to produce it.
+    """
+    rng = random.Random(seed)
+
+    streams = []
+    for n in range(1, pages + 1):
+        lines = ["Synthetic Systems Handbook"]
+        while len(lines) < PDF_LINES_PER_PAGE - 2:
+            lines.extend(_wrap(paragraph(rng, rng.randint(3, 6))))
+            lines.append("")
+        lines = lines[:PDF_LINES_PER_PAGE - 2]
+        lines += ["Confidential - internal use only", f"Page {n} of {pages}"]
+
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 780 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        streams.append("\n".join(ops).encode("latin-1"))
+
+    # Object numbers: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for stream in streams:
+        page_no = len(objects) + 1
+        kids.append(f"{page_no} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_no + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+# ---------------- PPTX ----------------
+
+def make_pptx(path: str, slides: int, seed: int = 0, notes: bool = True) -> str:
+    """
+    Title + bullet slides; every 10th slide repeats the agenda.
+    """
+    rng = random.Random(seed)
+    prs = Presentation()
+    layout = prs.slide_layouts[1]  # title and content
+
+    agenda = "\n".join(rng.sample(COMPONENTS, 5))
+
+    for n in range(slides):
+        slide = prs.slides.add_slide(layout)
+        if n % 10 == 0:
+            slide.shapes.title.text = "Agenda"
+            slide.placeholders[1].text = agenda
+        else:
+            slide.shapes.title.text = rng.choice(COMPONENTS)
+            slide.placeholders[1].text = "\n".join(
+                sentence(rng) for _ in range(rng.randint(3, 5))
+            )
+        if notes:
+            slide.notes_slide.notes_text_frame.text = paragraph(rng, 2)
+
+    prs.save(path)
+    return path
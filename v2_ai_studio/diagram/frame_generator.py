@@ -1,23 +1,47 @@
 from pathlib import Path
+import os
 import subprocess
 
+from diagram.native_renderer import render_png
+from utils.disk_cache import DiskCache, hash_key
+from utils.tracing import span
+
 FRAMES_DIR = Path("static/frames")
 FRAMES_DIR.mkdir(parents=True, exist_ok=True)
 
+# "d2"     → d2 CLI subprocess per frame
+# "native" → in-process layered layout + Pillow (diagram/native_renderer.py)
+DIAGRAM_BACKEND = os.getenv("DIAGRAM_BACKEND", "d2")
+
+# Content-addressed PNG store: identical frames (across slides, requests
+# and restarts) are rendered once and shared.
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", "static/frame_cache")
+FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", 512))
+FRAME_CACHE_DISABLED = os.getenv("FRAME_CACHE_DISABLED", "0") == "1"
+
+frame_cache = DiskCache(
+    FRAME_CACHE_DIR,
+    max_bytes=FRAME_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".png"
+)
+
 
 # --------------------------------------------------
 # NODE STYLING (NEW ✅)
 # --------------------------------------------------
 
+ROLE_COLORS = {
+    "core": ("#e0f2fe", "#0369a1"),
+    "input": ("#dcfce7", "#166534"),
+    "output": ("#fee2e2", "#991b1b"),
+    "external": ("#ede9fe", "#5b21b6"),
+}
+
+
 def node_style(role: str) -> str:
-    if role == "core":
-        return 'style.fill: "#e0f2fe"; style.stroke: "#0369a1"'
-    if role == "input":
-        return 'style.fill: "#dcfce7"; style.stroke: "#166534"'
-    if role == "output":
-        return 'style.fill: "#fee2e2"; style.stroke: "#991b1b"'
-    if role == "external":
-        return 'style.fill: "#ede9fe"; style.stroke: "#5b21b6"'
+    if role in ROLE_COLORS:
+        fill, stroke = ROLE_COLORS[role]
+        return f'style.fill: "{fill}"; style.stroke: "{stroke}"'
     return ""
 
 # --------------------------------------------------
@@ -96,14 +120,14 @@ def plan_to_d2(plan: dict) -> str:
     return "\n".join(lines)
 
 # --------------------------------------------------
-# FRAME RENDERING (D2 CLI ✅)
+# FRAME RENDERING (D2 CLI ✅ / NATIVE)
 # --------------------------------------------------
 
-def render_frame(plan: dict, frame_id: int) -> str:
+def render_frame_d2(plan: dict, frame_id: int | str, frames_dir: Path = FRAMES_DIR) -> str:
     d2_text = plan_to_d2(plan)
 
-    d2_path = FRAMES_DIR / f"frame_{frame_id}.d2"
-    png_path = FRAMES_DIR / f"frame_{frame_id}.png"
+    d2_path = frames_dir / f"frame_{frame_id}.d2"
+    png_path = frames_dir / f"frame_{frame_id}.png"
 
     d2_path.write_text(d2_text)
 
@@ -119,3 +143,94 @@ def render_frame(plan: dict, frame_id: int) -> str:
         return ""
 
     return png_path.as_posix()
+
+
+def render_frame_native(plan: dict, frame_id: int | str, frames_dir: Path = FRAMES_DIR) -> str:
+    png_path = frames_dir / f"frame_{frame_id}.png"
+    return render_png(plan, png_path, role_colors=ROLE_COLORS)
+
+
+RENDER_BACKENDS = {
+    "d2": render_frame_d2,
+    "native": render_frame_native,
+}
+
+
+# --------------------------------------------------
+# FRAME CACHE
+# --------------------------------------------------
+
+def _normalize_label(label) -> str:
+    return " ".join(str(label).split())
+
+
+def canonical_plan(plan: dict) -> dict:
+    """
+    Render-relevant content of a plan, used as the cache key.
+
+    - title / focus are dropped (never drawn)
+    - labels are whitespace-normalized
+    - roles without a style collapse to ""
+    - duplicate nodes / edges are dropped; order is kept, it drives the layout
+    """
+    nodes = {}
+    for n in plan.get("nodes", []):
+        role = n.get("role", "")
+        nodes[n["id"]] = {
+            "id": n["id"],
+            "label": _normalize_label(n.get("label", n["id"])),
+            "role": role if role in ROLE_COLORS else "",
+        }
+
+    edges = dict.fromkeys((e["from"], e["to"]) for e in plan.get("edges", []))
+
+    return {
+        "nodes": list(nodes.values()),
+        "edges": [{"from": a, "to": b} for a, b in edges],
+    }
+
+
+def frame_key(plan: dict, backend: str) -> str:
+    return hash_key("frame", backend, canonical_plan(plan))
+
+
+def frame_cache_stats() -> dict:
+    return frame_cache.stats()
+
+
+def render_frame(
+    plan: dict,
+    frame_id: int | str,
+    backend: str | None = None,
+    frames_dir: str | Path | None = None
+) -> str:
+    """
+    Renders (or reuses) the PNG for a frame plan.
+
+    Returns frames_dir/frame_<frame_id>.png: a cache hit is hardlinked
+    (or copied) there, a miss is rendered there and shared with the
+    cache. The job's file therefore survives cache eviction
+    (use a per-job frames_dir).
+    """
+    backend = backend or DIAGRAM_BACKEND
+    frames_dir = Path(frames_dir) if frames_dir else FRAMES_DIR
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown diagram backend: {backend}")
+
+    if FRAME_CACHE_DISABLED:
+        with span(f"render_{backend}"):
+            return RENDER_BACKENDS[backend](plan, frame_id, frames_dir)
+
+    key = frame_key(plan, backend)
+
+    png_path = frame_cache.export(key, frames_dir / f"frame_{frame_id}.png")
+    if png_path is not None:
+        return png_path.as_posix()
+
+    with span(f"render_{backend}"):
+        png_path = RENDER_BACKENDS[backend](plan, frame_id, frames_dir)
+    if not png_path:
+        return ""
+
+    frame_cache.put_file(key, png_path, keep=True)
+    return png_path
@@ -1,38 +1,254 @@
-import json
-from llm.groq_client import generate
+import logging
+import os
+from llm.groq_client import MODEL
+from llm.structured import generate_json, validate
+from processing.chunker import count_tokens
+from utils.disk_cache import DiskCache, hash_key
 
-def extract_keywords_from_slide(text: str) -> dict:
-    """
-    Extracts system components and their implicit relationships
-    from PPT slide text. No sentences, only entities.
-    """
+logger = logging.getLogger(__name__)
 
-    prompt = f"""
-From the text below, extract SYSTEM COMPONENTS only.
+# --------------------------------------------------
+# BATCHING LIMITS
+# --------------------------------------------------
+# One request per K slides instead of one per slide: the instruction block
+# is paid once per batch. Batch size is bounded by the estimated prompt
+# tokens and by the completion budget each slide needs.
+
+KEYWORD_BATCH_MAX_SLIDES = int(os.getenv("KEYWORD_BATCH_MAX_SLIDES", 8))
+KEYWORD_BATCH_PROMPT_TOKENS = int(os.getenv("KEYWORD_BATCH_PROMPT_TOKENS", 3000))
+KEYWORD_TOKENS_PER_SLIDE = int(os.getenv("KEYWORD_TOKENS_PER_SLIDE", 250))
+KEYWORD_BATCH_MAX_TOKENS = int(os.getenv("KEYWORD_BATCH_MAX_TOKENS", 4000))
+
+# Per-slide results, independent of which batch a slide landed in:
+# an unchanged slide keeps its graph (and its cached frames) even when
+# its neighbours change.
+KEYWORD_CACHE_DIR = os.getenv("KEYWORD_CACHE_DIR", "cache/keywords")
+KEYWORD_CACHE_MAX_MB = int(os.getenv("KEYWORD_CACHE_MAX_MB", 32))
+
+keyword_cache = DiskCache(
+    KEYWORD_CACHE_DIR,
+    max_bytes=KEYWORD_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".json"
+)
 
+RULES = """
 Rules:
 - Return ONLY named components or services
 - No explanations
 - No sentences
 - Preserve logical order if implied
 - Group related components
+"""
 
-Return JSON ONLY in this format:
-{{
+FORMAT = """{
   "components": [
-    {{ "name": "Component Name", "type": "platform|subsystem|compute|storage|service" }}
+    { "name": "Component Name", "type": "platform|subsystem|compute|storage|service" }
   ],
   "relations": [
-    {{ "from": "A", "to": "B", "relation": "contains|flows_to|uses" }}
+    { "from": "A", "to": "B", "relation": "contains|flows_to|uses" }
   ]
-}}
+}"""
+
+EMPTY = {"components": [], "relations": []}
+
+KEYWORD_SCHEMA = {
+    "type": "object",
+    "required": ["components"],
+    "properties": {
+        "components": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {"name": {"type": "string"}}
+            }
+        },
+        "relations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["from", "to"],
+                "properties": {"from": {"type": "string"}, "to": {"type": "string"}}
+            }
+        }
+    }
+}
+
+
+def extract_keywords_from_slide(text: str) -> dict:
+    """
+    Extracts system components and their implicit relationships
+    from PPT slide text. No sentences, only entities.
+    """
+
+    prompt = f"""
+From the text below, extract SYSTEM COMPONENTS only.
+{RULES}
+
+Return JSON ONLY in this format:
+{FORMAT}
 
 TEXT:
 \"\"\"{text}\"\"\"
 """
 
     try:
-        response = generate(prompt)
-        return json.loads(response)
-    except Exception:
-        return {"components": [], "relations": []}
+        data = generate_json(prompt, KEYWORD_SCHEMA, "keywords")
+    except Exception as e:
+        logger.warning(f"Keyword extraction failed, using empty graph: {e!r}")
+        return dict(EMPTY)
+
+    return data if data is not None else dict(EMPTY)
+
+# --------------------------------------------------
+# BATCHED MODE
+# --------------------------------------------------
+
+def plan_keyword_batches(texts: list[str]) -> list[list[int]]:
+    """
+    Greedily packs slide indices into batches that fit the prompt
+    token budget, the completion budget and the max batch size.
+    """
+    overhead = count_tokens(RULES + FORMAT) + 100
+    max_slides = max(1, min(
+        KEYWORD_BATCH_MAX_SLIDES,
+        KEYWORD_BATCH_MAX_TOKENS // KEYWORD_TOKENS_PER_SLIDE
+    ))
+
+    batches = []
+    current = []
+    used = overhead
+
+    for i, text in enumerate(texts):
+        cost = count_tokens(text) + 10
+
+        if current and (
+            len(current) >= max_slides
+            or used + cost > KEYWORD_BATCH_PROMPT_TOKENS
+        ):
+            batches.append(current)
+            current = []
+            used = overhead
+
+        current.append(i)
+        used += cost
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def _valid_entry(entry) -> bool:
+    return not validate(entry, KEYWORD_SCHEMA)
+
+
+def _request_batch(texts: list[str]) -> dict:
+    sections = "\n".join(
+        f'SLIDE {i}:\n\"\"\"{text}\"\"\"\n'
+        for i, text in enumerate(texts)
+    )
+
+    prompt = f"""
+For EACH slide below, extract SYSTEM COMPONENTS only.
+{RULES}
+
+Return ONE JSON object keyed by slide number ("0", "1", ...).
+Each value MUST use this format:
+{FORMAT}
+
+Return JSON ONLY:
+{{
+  "0": {{ "components": [...], "relations": [...] }},
+  "1": {{ "components": [...], "relations": [...] }}
+}}
+
+{sections}
+"""
+
+    max_tokens = min(
+        KEYWORD_BATCH_MAX_TOKENS,
+        KEYWORD_TOKENS_PER_SLIDE * len(texts) + 100
+    )
+
+    # Entries are validated one by one: a bad entry costs one single-slide
+    # call, not a re-request of the whole batch
+    try:
+        data = generate_json(
+            prompt,
+            {"type": "object"},
+            "keywords_batch",
+            max_rerequests=0,
+            max_tokens=max_tokens
+        )
+    except Exception as e:
+        logger.warning(f"Batched keyword extraction failed ({len(texts)} slides): {e!r}")
+        return {}
+
+    return data or {}
+
+
+def keyword_key(text: str) -> str:
+    return hash_key("keywords", MODEL, RULES, FORMAT, text)
+
+
+def extract_keywords_for_batch(texts: list[str]) -> list[dict]:
+    """
+    One batched request for the slides not in the keyword cache
+    (no further splitting).
+    """
+    keys = [keyword_key(t) for t in texts]
+    results = [keyword_cache.get_json(k) for k in keys]
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing:
+        return results
+
+    fresh = _extract_uncached([texts[i] for i in missing])
+    for i, data in zip(missing, fresh):
+        results[i] = data
+        if data.get("components"):
+            keyword_cache.put_json(keys[i], data)
+
+    return results
+
+
+def _extract_uncached(texts: list[str]) -> list[dict]:
+    """
+    Falls back to a single-slide call ONLY for entries that are
+    missing or invalid in the batch response.
+    """
+    if len(texts) == 1:
+        return [extract_keywords_from_slide(texts[0])]
+
+    data = _request_batch(texts)
+    results = []
+
+    for i, text in enumerate(texts):
+        entry = data.get(str(i))
+        if _valid_entry(entry):
+            results.append({
+                "components": entry["components"],
+                "relations": entry.get("relations", [])
+            })
+        else:
+            results.append(extract_keywords_from_slide(text))
+
+    return results
+
+
+def extract_keywords_batch(texts: list[str]) -> list[dict]:
+    """
+    Batched extract_keywords_from_slide.
+
+    - Sends up to K slides per request (see plan_keyword_batches)
+    - Returns one {components, relations} dict per input text, in order
+    """
+    results = [None] * len(texts)
+
+    for batch in plan_keyword_batches(texts):
+        batch_results = extract_keywords_for_batch([texts[i] for i in batch])
+        for i, data in zip(batch, batch_results):
+            results[i] = data
+
+    return results
@@ -0,0 +1,266 @@
+# diagram/native_renderer.py
+"""
+In-process renderer for small architecture graphs (≤ ~6 nodes).
+
+Replaces the per-frame `d2` subprocess: layered left→right layout
+(same as `direction: right`) + Pillow rasterizer using the role colours
+from frame_generator.ROLE_COLORS.
+"""
+
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+# ---------------- STYLE ----------------
+
+DEFAULT_FILL = "#f7f8fe"
+DEFAULT_STROKE = "#0d32b2"
+EDGE_COLOR = "#0d32b2"
+TEXT_COLOR = "#0a0f25"
+BACKGROUND = "#ffffff"
+
+SCALE = 2            # supersampling for crisp edges
+FONT_SIZE = 16
+NODE_PAD_X = 24
+NODE_HEIGHT = 66
+MIN_NODE_WIDTH = 110
+LAYER_GAP = 110
+ROW_GAP = 50
+MARGIN = 40
+
+FONT_CANDIDATES = [
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "Arial.ttf",
+]
+
+
+def _load_font(size: int):
+    for name in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+_FONT = None
+
+
+def _font():
+    global _FONT
+    if _FONT is None:
+        _FONT = _load_font(FONT_SIZE * SCALE)
+    return _FONT
+
+# --------------------------------------------------
+# GRAPH NORMALIZATION
+# --------------------------------------------------
+
+def _normalize(plan: dict) -> tuple[list[dict], list[tuple[str, str]]]:
+    """
+    Mirrors d2 semantics:
+    - duplicate node ids collapse into one node (last definition wins)
+    - edges to undeclared ids create implicit nodes labelled by id
+    """
+    nodes = {}
+    for n in plan.get("nodes", []):
+        nodes[n["id"]] = {
+            "id": n["id"],
+            "label": str(n.get("label", n["id"])).replace("\n", " ").strip(),
+            "role": n.get("role", ""),
+        }
+
+    edges = []
+    for e in plan.get("edges", []):
+        src, dst = e["from"], e["to"]
+        for node_id in (src, dst):
+            nodes.setdefault(node_id, {"id": node_id, "label": node_id, "role": ""})
+        edges.append((src, dst))
+
+    return list(nodes.values()), edges
+
+# --------------------------------------------------
+# LAYERED LAYOUT
+# --------------------------------------------------
+
+def _layers(nodes: list[dict], edges: list[tuple[str, str]]) -> list[list[str]]:
+    """
+    Longest-path layering. Back edges (cycles) are ignored for ranking.
+    Within a layer, nodes are ordered by the barycenter of their parents.
+    """
+    order = [n["id"] for n in nodes]
+    succ = {n: [] for n in order}
+    for src, dst in edges:
+        if src != dst:
+            succ[src].append(dst)
+
+    # DFS to drop back edges → DAG
+    state = {}
+    dag = {n: [] for n in order}
+
+    def visit(u):
+        state[u] = 1
+        for v in succ[u]:
+            if state.get(v) == 1:
+                continue  # back edge
+            dag[u].append(v)
+            if v not in state:
+                visit(v)
+        state[u] = 2
+
+    for n in order:
+        if n not in state:
+            visit(n)
+
+    preds = {n: [] for n in order}
+    for u, vs in dag.items():
+        for v in vs:
+            preds[v].append(u)
+
+    rank = {}
+
+    def rank_of(n):
+        if n not in rank:
+            rank[n] = 1 + max((rank_of(p) for p in preds[n]), default=-1)
+        return rank[n]
+
+    for n in order:
+        rank_of(n)
+
+    layers = [[] for _ in range(max(rank.values(), default=-1) + 1)]
+    for n in order:
+        layers[rank[n]].append(n)
+
+    position = {}
+    for depth, layer in enumerate(layers):
+        if depth > 0:
+            def barycenter(n):
+                ps = [position[p] for p in preds[n] if p in position]
+                return sum(ps) / len(ps) if ps else float(order.index(n))
+            layer.sort(key=barycenter)
+        for i, n in enumerate(layer):
+            position[n] = i
+
+    return layers
+
+
+def layout(plan: dict) -> dict:
+    """
+    Returns pixel geometry (unscaled):
+    {"width", "height", "boxes": {id: (x0, y0, x1, y1)}, "nodes", "edges"}
+    """
+    nodes, edges = _normalize(plan)
+    if not nodes:
+        return {"width": 2 * MARGIN, "height": 2 * MARGIN, "boxes": {}, "nodes": [], "edges": []}
+
+    font = _font()
+    by_id = {n["id"]: n for n in nodes}
+
+    widths = {}
+    for n in nodes:
+        text_w = font.getlength(n["label"]) / SCALE
+        widths[n["id"]] = max(MIN_NODE_WIDTH, int(text_w) + 2 * NODE_PAD_X)
+
+    layers = _layers(nodes, edges)
+    column_widths = [max(widths[n] for n in layer) for layer in layers]
+    tallest = max(len(layer) for layer in layers)
+    canvas_h = 2 * MARGIN + tallest * NODE_HEIGHT + (tallest - 1) * ROW_GAP
+    canvas_w = 2 * MARGIN + sum(column_widths) + (len(layers) - 1) * LAYER_GAP
+
+    boxes = {}
+    x = MARGIN
+    for layer, col_w in zip(layers, column_widths):
+        layer_h = len(layer) * NODE_HEIGHT + (len(layer) - 1) * ROW_GAP
+        y = (canvas_h - layer_h) / 2
+        for n in layer:
+            w = widths[n]
+            x0 = x + (col_w - w) / 2
+            boxes[n] = (x0, y, x0 + w, y + NODE_HEIGHT)
+            y += NODE_HEIGHT + ROW_GAP
+        x += col_w + LAYER_GAP
+
+    return {
+        "width": int(canvas_w),
+        "height": int(canvas_h),
+        "boxes": boxes,
+        "nodes": [by_id[n] for layer in layers for n in layer],
+        "edges": edges,
+    }
+
+# --------------------------------------------------
+# RASTERIZER
+# --------------------------------------------------
+
+def _anchor(box, other):
+    """
+    Point on the box border facing `other`'s center.
+    """
+    x0, y0, x1, y1 = box
+    ox0, oy0, ox1, oy1 = other
+    cy = (y0 + y1) / 2
+
+    if ox0 >= x1:
+        return x1, cy
+    if ox1 <= x0:
+        return x0, cy
+    cx = (x0 + x1) / 2
+    return (cx, y1) if oy0 >= y1 else (cx, y0)
+
+
+def _arrow(draw, start, end, width):
+    draw.line([start, end], fill=EDGE_COLOR, width=width)
+
+    (sx, sy), (ex, ey) = start, end
+    dx, dy = ex - sx, ey - sy
+    length = (dx * dx + dy * dy) ** 0.5 or 1.0
+    ux, uy = dx / length, dy / length
+    head = 10 * SCALE
+    half = 5 * SCALE
+
+    base_x, base_y = ex - ux * head, ey - uy * head
+    draw.polygon(
+        [
+            (ex, ey),
+            (base_x - uy * half, base_y + ux * half),
+            (base_x + uy * half, base_y - ux * half),
+        ],
+        fill=EDGE_COLOR,
+    )
+
+
+def render_png(plan: dict, png_path: str | Path, role_colors: dict | None = None) -> str:
+    role_colors = role_colors or {}
+    geo = layout(plan)
+
+    w, h = geo["width"] * SCALE, geo["height"] * SCALE
+    image = Image.new("RGB", (w, h), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = _font()
+
+    boxes = {
+        n: tuple(v * SCALE for v in box)
+        for n, box in geo["boxes"].items()
+    }
+
+    for src, dst in geo["edges"]:
+        if src == dst:
+            continue
+        start = _anchor(boxes[src], boxes[dst])
+        end = _anchor(boxes[dst], boxes[src])
+        _arrow(draw, start, end, width=2 * SCALE)
+
+    for node in geo["nodes"]:
+        fill, stroke = role_colors.get(node["role"], (DEFAULT_FILL, DEFAULT_STROKE))
+        box = boxes[node["id"]]
+        draw.rounded_rectangle(box, radius=4 * SCALE, fill=fill, outline=stroke, width=2 * SCALE)
+
+        cx = (box[0] + box[2]) / 2
+        cy = (box[1] + box[3]) / 2
+        draw.text((cx, cy), node["label"], fill=TEXT_COLOR, font=font, anchor="mm")
+
+    image = image.resize((geo["width"], geo["height"]), Image.LANCZOS)
+
+    png_path = Path(png_path)
+    image.save(png_path, format="PNG", optimize=False)
+    return png_path.as_posix()
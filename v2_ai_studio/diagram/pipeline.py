@@ -0,0 +1,243 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from llm.diagram_planner import generate_architecture_plan
+from diagram.frame_generator import progressive_frames, render_frame
+from diagram.keyword_extractor import (
+    extract_keywords_for_batch,
+    plan_keyword_batches,
+)
+from diagram.keyword_to_graph import keywords_to_graph
+from utils.tracing import bind, span
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# CONCURRENCY LIMITS
+# --------------------------------------------------
+# LLM stage is network-bound (Groq), render stage is d2 subprocesses.
+# They get separate bounds so slow LLM calls never starve rendering.
+# The pools are shared by every job in the process: the bounds are
+# global, not per request.
+
+LLM_WORKERS = int(os.getenv("DIAGRAM_LLM_WORKERS", 4))
+RENDER_WORKERS = int(os.getenv("DIAGRAM_RENDER_WORKERS", os.cpu_count() or 2))
+
+llm_pool = ThreadPoolExecutor(max_workers=max(1, LLM_WORKERS), thread_name_prefix="diagram-llm")
+render_pool = ThreadPoolExecutor(max_workers=max(1, RENDER_WORKERS), thread_name_prefix="diagram-render")
+
+# Streamed slides are grouped into keyword batches of at most this many
+# (smaller than the offline batch size so the first slide is not held
+# back waiting for K neighbours)
+STREAM_BATCH_SLIDES = int(os.getenv("DIAGRAM_STREAM_BATCH_SLIDES", 2))
+
+SLIDE_COMPLEXITY = {
+    0: 2,
+    1: 4,
+    2: 5,
+    3: 6,
+}
+
+# --------------------------------------------------
+# STAGES
+# --------------------------------------------------
+
+def fallback_plan(slide: dict) -> dict:
+    """
+    LLM stage (fallback): used ONLY if keyword extraction fails.
+    """
+    slide_index = slide["slide_index"]
+    return generate_architecture_plan(
+        slide["text"],
+        max_nodes=SLIDE_COMPLEXITY.get(slide_index, 6),
+        slide_index=slide_index
+    )
+
+
+def _render(frame_plan: dict, frame_id: str, frames_dir: str | None) -> str:
+    try:
+        return render_frame(frame_plan, frame_id, frames_dir=frames_dir)
+    except Exception as e:
+        logger.error(f"Frame render failed: {e}")
+        return ""
+
+# --------------------------------------------------
+# PIPELINE
+# --------------------------------------------------
+
+class SlideDiagramPipeline:
+    """
+    Keywords → graph → frames → render, fed one slide (or batch) at a
+    time so rendering can start while later slides are still arriving.
+
+    - Each slide enters the render pool as soon as ITS graph is ready
+    - Frame ids are slide-scoped ("<slide>_<frame>"), so naming is
+      deterministic regardless of completion order
+    - finish() fills slide["frames"] in slide order and frame order
+    """
+
+    def __init__(
+        self,
+        frames_dir: str | None = None,
+        stream_batch: int = STREAM_BATCH_SLIDES
+    ):
+        self.frames_dir = frames_dir
+        self.stream_batch = max(1, stream_batch)
+        self.slides = []
+
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._llm_futures = []
+        self._render_futures = {}
+        self._buffer = []
+
+    # ---------------- FEEDING ----------------
+
+    def add(self, slide: dict):
+        """
+        Streaming entry point: buffers slides into keyword batches of
+        up to stream_batch slides (or fewer, if the token budget is hit).
+        """
+        self._track(slide)
+        self._buffer.append(slide)
+
+        batches = plan_keyword_batches([s["text"] for s in self._buffer])
+        for batch in batches[:-1]:
+            self._submit_keywords([self._buffer[i] for i in batch])
+        self._buffer = [self._buffer[i] for i in batches[-1]]
+
+        if len(self._buffer) >= self.stream_batch:
+            self.flush()
+
+    def add_batch(self, slides: list[dict]):
+        for slide in slides:
+            self._track(slide)
+        self._submit_keywords(slides)
+
+    def flush(self):
+        if self._buffer:
+            self._submit_keywords(self._buffer)
+            self._buffer = []
+
+    def _track(self, slide: dict):
+        self.slides.append(slide)
+        with self._lock:
+            self._render_futures[slide["slide_index"]] = []
+
+    def _submit_llm(self, fn, *args):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._llm_futures.append(llm_pool.submit(bind(fn), *args))
+
+    def _submit_keywords(self, slides: list[dict]):
+        self._submit_llm(self._keywords_stage, slides)
+
+    # ---------------- STAGES ----------------
+
+    def _keywords_stage(self, slides: list[dict]):
+        with span("keywords"):
+            results = extract_keywords_for_batch([s["text"] for s in slides])
+
+        for slide, keyword_data in zip(slides, results):
+            keyword_graph = keywords_to_graph(keyword_data)
+
+            if keyword_graph.get("nodes"):
+                self._submit_renders(slide, keyword_graph)
+            else:
+                logger.warning(
+                    "Keyword graph empty, falling back to architecture planner"
+                )
+                self._submit_llm(self._fallback_stage, slide)
+
+    def _fallback_stage(self, slide: dict):
+        with span("diagram_fallback"):
+            plan = fallback_plan(slide)
+        self._submit_renders(slide, plan)
+
+    def _submit_renders(self, slide: dict, graph: dict):
+        # 🔑 Generate progressive frames → render pool
+        frame_plans = progressive_frames(graph, mode="architecture")
+        with self._lock:
+            if self._cancelled:
+                return
+            self._render_futures[slide["slide_index"]].extend(
+                render_pool.submit(
+                    bind(_render), frame_plan, f"{slide['slide_index'] + 1}_{n}", self.frames_dir
+                )
+                for n, frame_plan in enumerate(frame_plans, start=1)
+            )
+
+    # ---------------- RESULTS ----------------
+
+    def finish(self) -> list[dict]:
+        """
+        Waits for every stage (including fallbacks submitted late) and
+        attaches frame URLs to the slides.
+
+        A planning error (e.g. the LLM rejecting our credentials) fails
+        the whole job instead of yielding blank diagrams; only single
+        frame renders are allowed to fail.
+        """
+        self.flush()
+
+        try:
+            waited = 0
+            while True:
+                with self._lock:
+                    futures = self._llm_futures[waited:]
+                if not futures:
+                    break
+                for future in futures:
+                    future.result()
+                waited += len(futures)
+
+            for slide in self.slides:
+                slide["frames"] = [
+                    "/" + path.replace("\\", "/")
+                    for path in (f.result() for f in self._render_futures[slide["slide_index"]])
+                    if path
+                ]
+        except Exception:
+            logger.exception("Diagram planning failed")
+            self.cancel()
+            raise
+
+        return self.slides
+
+    def cancel(self):
+        """
+        Drops this job's queued work; the shared pools keep serving others.
+        Stages already running finish but submit nothing new.
+        """
+        with self._lock:
+            self._cancelled = True
+            futures = self._llm_futures + [
+                f for slide_futures in self._render_futures.values() for f in slide_futures
+            ]
+        for future in futures:
+            future.cancel()
+
+
+def shutdown_pools():
+    llm_pool.shutdown(wait=False, cancel_futures=True)
+    render_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_slide_diagrams(
+    slides: list[dict],
+    frames_dir: str | None = None
+) -> list[dict]:
+    """
+    Runs keywords → graph → frames → render for every slide concurrently.
+    Keyword extraction is batched (K slides per LLM request).
+    """
+    pipeline = SlideDiagramPipeline(frames_dir)
+
+    for batch in plan_keyword_batches([s["text"] for s in slides]):
+        pipeline.add_batch([slides[i] for i in batch])
+
+    pipeline.finish()
+    return slides
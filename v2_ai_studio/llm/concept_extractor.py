@@ -1,5 +1,24 @@
-import json
-from llm.groq_client import generate
+import logging
+
+from llm.structured import generate_json
+
+logger = logging.getLogger(__name__)
+
+CONCEPT_SCHEMA = {
+    "type": "object",
+    "required": ["concepts"],
+    "properties": {
+        "concepts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "label"],
+                "properties": {"id": {"type": "string"}, "label": {"type": "string"}}
+            }
+        },
+        "relations": {"type": "array", "items": {"type": "object"}}
+    }
+}
 
 def extract_concepts(script: str, max_concepts: int = 6) -> dict:
     prompt = f"""
@@ -33,15 +52,10 @@ TEXT:
 \"\"\"{script}\"\"\"
 """
 
-    response = generate(prompt)
+    data = generate_json(prompt, CONCEPT_SCHEMA, "concepts")
 
-    print("===== RAW CONCEPT RESPONSE =====")
-    print(response)
+    logger.debug("Parsed concept response: %s", data)
 
-    try:
-        data = json.loads(response)
-        if len(data.get("concepts", [])) < 4:
-            return {}
-        return data
-    except Exception:
+    if data is None or len(data["concepts"]) < 4:
         return {}
+    return data
@@ -1,5 +1,33 @@
-import json
-from llm.groq_client import generate
+from llm.scheduler import PRIORITY_FALLBACK
+from llm.structured import generate_json
+
+NODE_SCHEMA = {
+    "type": "object",
+    "required": ["id", "label"],
+    "properties": {"id": {"type": "string"}, "label": {"type": "string"}}
+}
+
+# A bare node list is accepted too and normalized below
+PLAN_SCHEMA = {
+    "anyOf": [
+        {
+            "type": "object",
+            "required": ["nodes"],
+            "properties": {
+                "nodes": {"type": "array", "items": NODE_SCHEMA},
+                "edges": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["from", "to"],
+                        "properties": {"from": {"type": "string"}, "to": {"type": "string"}}
+                    }
+                }
+            }
+        },
+        {"type": "array", "items": NODE_SCHEMA}
+    ]
+}
 
 def generate_architecture_plan(
     script: str,
@@ -70,11 +98,13 @@ Return ONLY valid JSON.
     # ----------------------------
     # LLM Call
     # ----------------------------
-    response = generate(prompt)
+    # JSON mode still applies: the object shape is the one asked for
+    plan = generate_json(
+        prompt, PLAN_SCHEMA, "diagram_plan",
+        json_mode=True, priority=PRIORITY_FALLBACK
+    )
 
-    try:
-        plan = json.loads(response)
-    except Exception:
+    if plan is None:
         return {
             "title": f"Slide {slide_index + 1}" if slide_index is not None else "Architecture",
             "nodes": [{"id": "core", "label": fallback_label}],
@@ -90,12 +120,6 @@ Return ONLY valid JSON.
             "edges": []
         }
 
-    if not isinstance(plan, dict):
-        plan = {
-            "nodes": [],
-            "edges": []
-        }
-
     nodes = plan.get("nodes", [])
     edges = plan.get("edges", [])
 
@@ -1,29 +1,456 @@
+import asyncio
+import json
+import logging
 import os
-from groq import Groq
+import time
+from typing import AsyncIterator, Iterator
+
+import httpx
+from groq import (
+    Groq,
+    AsyncGroq,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+)
 from dotenv import load_dotenv
 
+from llm.scheduler import (
+    scheduler,
+    parse_duration,
+    PRIORITY_NORMAL,
+)
+from processing.chunker import count_tokens
+from utils.disk_cache import DiskCache, hash_key
+from utils.tracing import atimed, record_tokens, span, timed
+
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("GROQ_API_KEY not set")
 
-client = Groq(api_key=GROQ_API_KEY)
+# ---------------- HTTP POOL ----------------
+# One keep-alive connection pool per process for each client flavour,
+# so slides/requests reuse TLS connections instead of reconnecting.
+
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", 60))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", 10))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 20))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", 10))
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # e.g. benchmarks/mock_groq.py
+
+# ---------------- RETRIES ----------------
+# The SDK's own retries are disabled so every attempt (and every 429)
+# goes through llm/scheduler.py. 429s wait for retry-after, connection
+# errors and 5xx back off exponentially.
+
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 5))
+GROQ_BACKOFF_SECONDS = float(os.getenv("GROQ_BACKOFF_SECONDS", 1))
+GROQ_BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", 30))
+
+_timeout = httpx.Timeout(GROQ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT)
+_limits = httpx.Limits(
+    max_connections=GROQ_MAX_CONNECTIONS,
+    max_keepalive_connections=GROQ_MAX_KEEPALIVE
+)
+
+client = Groq(
+    api_key=GROQ_API_KEY,
+    base_url=GROQ_BASE_URL,
+    max_retries=0,
+    http_client=httpx.Client(timeout=_timeout, limits=_limits)
+)
+
+async_client = AsyncGroq(
+    api_key=GROQ_API_KEY,
+    base_url=GROQ_BASE_URL,
+    max_retries=0,
+    http_client=httpx.AsyncClient(timeout=_timeout, limits=_limits)
+)
 
 MODEL = os.getenv(
     "GROQ_MODEL",
     "llama-3.1-8b-instant"  # 🔥 best for scripts
 )
 
-def generate(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": "You are an expert technical educator."},
+SYSTEM_PROMPT = "You are an expert technical educator."
+
+# ---------------- RESPONSE CACHE ----------------
+# Identical (model, system, prompt, temperature, max_tokens) → same answer.
+# Re-uploading a deck should not pay for the same completions twice.
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "cache/llm")
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", 256))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "0") == "1"
+
+response_cache = DiskCache(
+    LLM_CACHE_DIR,
+    max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+    ttl=LLM_CACHE_TTL or None,
+    suffix=".json"
+)
+
+
+def cache_key(
+    prompt: str,
+    system: str,
+    temperature: float,
+    max_tokens: int,
+    model: str = MODEL,
+    response_format: dict | None = None
+) -> str:
+    parts = [model, system, prompt, temperature, max_tokens]
+    if response_format:
+        # Plain-text keys stay as they were
+        parts.append(json.dumps(response_format, sort_keys=True))
+    return hash_key(*parts)
+
+
+def cache_stats() -> dict:
+    return response_cache.stats()
+
+
+def scheduler_stats() -> dict:
+    return scheduler.stats()
+
+
+def _request(
+    prompt: str,
+    system: str,
+    temperature: float,
+    max_tokens: int,
+    response_format: dict | None = None
+) -> dict:
+    request = {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": system},
             {"role": "user", "content": prompt},
         ],
-        temperature=0.3,
-        max_tokens=1200,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if response_format:
+        request["response_format"] = response_format
+    return request
+
+
+def _retry_delay(error: Exception, attempt: int) -> float | None:
+    """
+    Seconds to wait before the next attempt, or None if the error is final.
+    """
+    if attempt >= GROQ_MAX_RETRIES:
+        return None
+
+    backoff = min(GROQ_BACKOFF_MAX_SECONDS, GROQ_BACKOFF_SECONDS * 2 ** attempt)
+
+    if isinstance(error, RateLimitError):
+        retry_after = parse_duration(error.response.headers.get("retry-after"))
+        return retry_after if retry_after is not None else backoff
+
+    if isinstance(error, (APIConnectionError, InternalServerError)):
+        return backoff
+
+    return None
+
+
+def _backoff(error: Exception, attempt: int, outcome: dict) -> float:
+    """
+    Delay before retrying `error`; re-raises it when it is final.
+    """
+    delay = _retry_delay(error, attempt)
+    if delay is None:
+        raise error
+
+    logger.warning(
+        f"Groq request failed ({type(error).__name__}), "
+        f"retry {attempt + 1}/{GROQ_MAX_RETRIES} in {delay:.1f}s"
+    )
+    if outcome["value"] == "rate_limited":
+        scheduler.pause(delay)
+    return delay
+
+
+def _reserve(request: dict) -> int:
+    return count_tokens(
+        "".join(m["content"] for m in request["messages"])
+    ) + request["max_tokens"]
+
+
+def _on_error(error: Exception, outcome: dict):
+    if isinstance(error, RateLimitError):
+        outcome["value"] = "rate_limited"
+        scheduler.observe_headers(error.response.headers)
+
+
+def _usage(obj):
+    # Groq reports stream usage on the last chunk under x_groq
+    return getattr(obj, "usage", None) or getattr(
+        getattr(obj, "x_groq", None), "usage", None
     )
 
-    return response.choices[0].message.content.strip()
+
+def _usage_tokens(obj) -> int | None:
+    return getattr(_usage(obj), "total_tokens", None)
+
+
+def _on_response(headers, response, reserved: int, outcome: dict):
+    scheduler.observe_headers(headers)
+    scheduler.settle(reserved, _usage_tokens(response))
+    record_tokens(_usage(response))
+    outcome["value"] = "ok"
+    return response
+
+
+def _delta(chunk) -> str:
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def _complete(request: dict, priority: int):
+    """
+    One chat completion through the scheduler, with retries.
+    """
+    reserved = _reserve(request)
+
+    attempt = 0
+    with span("llm"):
+        while True:
+            with scheduler.slot(priority, reserved) as outcome:
+                try:
+                    raw = client.chat.completions.with_raw_response.create(**request)
+                    return _on_response(raw.headers, raw.parse(), reserved, outcome)
+                except Exception as e:
+                    _on_error(e, outcome)
+                    error = e
+
+            time.sleep(_backoff(error, attempt, outcome))
+            attempt += 1
+
+
+async def _acomplete(request: dict, priority: int):
+    reserved = _reserve(request)
+
+    attempt = 0
+    with span("llm"):
+        while True:
+            async with scheduler.aslot(priority, reserved) as outcome:
+                try:
+                    raw = await async_client.chat.completions.with_raw_response.create(**request)
+                    return _on_response(raw.headers, await raw.parse(), reserved, outcome)
+                except Exception as e:
+                    _on_error(e, outcome)
+                    error = e
+
+            await asyncio.sleep(_backoff(error, attempt, outcome))
+            attempt += 1
+
+
+def _complete_stream(request: dict, priority: int) -> Iterator[str]:
+    """
+    Streaming _complete(): yields text deltas. Only opening the stream
+    is retried; the scheduler slot is held until the stream ends.
+    The "llm" span covers the stream's own time, not the consumer's.
+    """
+    return timed(_stream(request, priority), "llm")
+
+
+def _stream(request: dict, priority: int) -> Iterator[str]:
+    request = {**request, "stream": True}
+    reserved = _reserve(request)
+
+    attempt = 0
+    while True:
+        with scheduler.slot(priority, reserved) as outcome:
+            try:
+                raw = client.chat.completions.with_raw_response.create(**request)
+            except Exception as e:
+                _on_error(e, outcome)
+                error = e
+            else:
+                scheduler.observe_headers(raw.headers)
+                usage = None
+                for chunk in raw.parse():
+                    usage = _usage(chunk) or usage
+                    if delta := _delta(chunk):
+                        yield delta
+                scheduler.settle(reserved, getattr(usage, "total_tokens", None))
+                record_tokens(usage)
+                outcome["value"] = "ok"
+                return
+
+        time.sleep(_backoff(error, attempt, outcome))
+        attempt += 1
+
+
+def _acomplete_stream(request: dict, priority: int) -> AsyncIterator[str]:
+    return atimed(_astream(request, priority), "llm")
+
+
+async def _astream(request: dict, priority: int) -> AsyncIterator[str]:
+    request = {**request, "stream": True}
+    reserved = _reserve(request)
+
+    attempt = 0
+    while True:
+        async with scheduler.aslot(priority, reserved) as outcome:
+            try:
+                raw = await async_client.chat.completions.with_raw_response.create(**request)
+            except Exception as e:
+                _on_error(e, outcome)
+                error = e
+            else:
+                scheduler.observe_headers(raw.headers)
+                usage = None
+                async for chunk in await raw.parse():
+                    usage = _usage(chunk) or usage
+                    if delta := _delta(chunk):
+                        yield delta
+                scheduler.settle(reserved, getattr(usage, "total_tokens", None))
+                record_tokens(usage)
+                outcome["value"] = "ok"
+                return
+
+        await asyncio.sleep(_backoff(error, attempt, outcome))
+        attempt += 1
+
+
+def generate(
+    prompt: str,
+    system: str = SYSTEM_PROMPT,
+    temperature: float = 0.3,
+    max_tokens: int = 1200,
+    use_cache: bool = True,
+    priority: int = PRIORITY_NORMAL,
+    response_format: dict | None = None
+) -> str:
+    use_cache = use_cache and not LLM_CACHE_DISABLED
+    key = cache_key(prompt, system, temperature, max_tokens, response_format=response_format)
+
+    if use_cache:
+        cached = response_cache.get_json(key)
+        if cached is not None:
+            return cached["content"]
+
+    response = _complete(
+        _request(prompt, system, temperature, max_tokens, response_format),
+        priority
+    )
+
+    content = response.choices[0].message.content.strip()
+
+    if use_cache and content:
+        response_cache.put_json(key, {"model": MODEL, "content": content})
+
+    return content
+
+
+async def agenerate(
+    prompt: str,
+    system: str = SYSTEM_PROMPT,
+    temperature: float = 0.3,
+    max_tokens: int = 1200,
+    use_cache: bool = True,
+    priority: int = PRIORITY_NORMAL,
+    response_format: dict | None = None
+) -> str:
+    """
+    Async generate(): same cache, non-blocking HTTP on the shared pool.
+    """
+    use_cache = use_cache and not LLM_CACHE_DISABLED
+    key = cache_key(prompt, system, temperature, max_tokens, response_format=response_format)
+
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get_json, key)
+        if cached is not None:
+            return cached["content"]
+
+    response = await _acomplete(
+        _request(prompt, system, temperature, max_tokens, response_format),
+        priority
+    )
+
+    content = response.choices[0].message.content.strip()
+
+    if use_cache and content:
+        await asyncio.to_thread(
+            response_cache.put_json, key, {"model": MODEL, "content": content}
+        )
+
+    return content
+
+
+def generate_stream(
+    prompt: str,
+    system: str = SYSTEM_PROMPT,
+    temperature: float = 0.3,
+    max_tokens: int = 1200,
+    use_cache: bool = True,
+    priority: int = PRIORITY_NORMAL
+) -> Iterator[str]:
+    """
+    generate() as a stream of text deltas. A cache hit arrives as one
+    delta; a completed stream is cached like a normal response.
+    """
+    use_cache = use_cache and not LLM_CACHE_DISABLED
+    key = cache_key(prompt, system, temperature, max_tokens)
+
+    if use_cache:
+        cached = response_cache.get_json(key)
+        if cached is not None:
+            yield cached["content"]
+            return
+
+    parts = []
+    for delta in _complete_stream(
+        _request(prompt, system, temperature, max_tokens),
+        priority
+    ):
+        parts.append(delta)
+        yield delta
+
+    content = "".join(parts).strip()
+
+    if use_cache and content:
+        response_cache.put_json(key, {"model": MODEL, "content": content})
+
+
+async def agenerate_stream(
+    prompt: str,
+    system: str = SYSTEM_PROMPT,
+    temperature: float = 0.3,
+    max_tokens: int = 1200,
+    use_cache: bool = True,
+    priority: int = PRIORITY_NORMAL
+) -> AsyncIterator[str]:
+    """
+    Async generate_stream().
+    """
+    use_cache = use_cache and not LLM_CACHE_DISABLED
+    key = cache_key(prompt, system, temperature, max_tokens)
+
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get_json, key)
+        if cached is not None:
+            yield cached["content"]
+            return
+
+    parts = []
+    async for delta in _acomplete_stream(
+        _request(prompt, system, temperature, max_tokens),
+        priority
+    ):
+        parts.append(delta)
+        yield delta
+
+    content = "".join(parts).strip()
+
+    if use_cache and content:
+        await asyncio.to_thread(
+            response_cache.put_json, key, {"model": MODEL, "content": content}
+        )
@@ -0,0 +1,347 @@
+# llm/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+from utils.tracing import observe
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CONFIG ----------------
+# One scheduler per process sits in front of every Groq call.
+# - Token buckets for requests/min and tokens/min, re-synced from the
+#   x-ratelimit-* response headers. The tokens/min capacity follows
+#   x-ratelimit-limit-tokens, so it is unlimited only until the first
+#   response tells us the account's real limit. LLM_TPM / LLM_RPM are
+#   optional local ceilings (0 = none). Groq's limit-requests header is
+#   per DAY, so it only pauses us when remaining-requests hits 0.
+# - Adaptive concurrency (AIMD): +1 slot per window of successes,
+#   halved on every 429
+# - Priority classes: a waiting script request is always admitted
+#   before keyword batches, which go before diagram fallbacks
+
+LLM_RPM = float(os.getenv("LLM_RPM", 0))
+LLM_TPM = float(os.getenv("LLM_TPM", 0))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", 1))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_START_CONCURRENCY = int(os.getenv("LLM_START_CONCURRENCY", 4))
+
+PRIORITY_SCRIPT = 0
+PRIORITY_NORMAL = 5
+PRIORITY_FALLBACK = 9
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """
+    Groq reset headers: "7.66s", "2m59.56s", "120ms" or plain seconds.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _header_number(headers, name: str) -> float | None:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Refills continuously at capacity per minute. Not thread-safe on
+    its own; the scheduler holds its lock around every call.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        # A request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        if self.enabled:
+            self._refill(now)
+            self.level -= amount
+
+    def give(self, amount: float, now: float):
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.capacity, self.level + amount)
+
+    def resize(self, per_minute: float, now: float):
+        """
+        New capacity (e.g. from x-ratelimit-limit-tokens). A bucket that
+        was unlimited starts full.
+        """
+        if per_minute <= 0 or per_minute == self.capacity:
+            return
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.level, per_minute)
+        else:
+            self.level = per_minute
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = now
+
+    def sync(self, remaining: float, now: float):
+        """
+        Server-reported remaining budget wins if it is lower.
+        """
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        min_concurrency: int = LLM_MIN_CONCURRENCY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        start_concurrency: int = LLM_START_CONCURRENCY
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.tpm_ceiling = tpm
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(
+            max(start_concurrency, self.min_concurrency),
+            self.max_concurrency
+        ))
+
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+
+        self.counters = {
+            "admitted": 0,
+            "rate_limited": 0,
+            "errors": 0,
+            "wait_seconds": 0.0,
+        }
+
+    # ---------------- ADMISSION ----------------
+
+    def _delay(self, ticket: tuple, tokens: int) -> float | None:
+        """
+        0 → admit now, float → re-check after that many seconds,
+        None → wait for another request to finish or leave the queue.
+        """
+        if self._waiting[0] != ticket or self._in_flight >= int(self.limit):
+            return None
+
+        now = time.monotonic()
+        return max(
+            0.0,
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now)
+        )
+
+    def _admit(self, tokens: int):
+        now = time.monotonic()
+        heapq.heappop(self._waiting)
+        self._in_flight += 1
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        self.counters["admitted"] += 1
+        # The next waiter may fit as well
+        self._cond.notify_all()
+
+    def _leave(self, ticket: tuple):
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    def acquire(self, priority: int, tokens: int):
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while (delay := self._delay(ticket, tokens)) != 0:
+                    self._cond.wait(timeout=delay)
+            except BaseException:
+                self._leave(ticket)
+                raise
+            self._admit(tokens)
+            self.counters["wait_seconds"] += time.monotonic() - started
+
+    async def aacquire(self, priority: int, tokens: int, poll: float = 0.05):
+        """
+        acquire() for the event loop: polls instead of blocking a thread.
+        """
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._delay(ticket, tokens)
+                    if delay == 0:
+                        self._admit(tokens)
+                        self.counters["wait_seconds"] += time.monotonic() - started
+                        return
+                await asyncio.sleep(min(delay, 1.0) if delay else poll)
+        except BaseException:
+            with self._cond:
+                self._leave(ticket)
+            raise
+
+    def release(self, outcome: str):
+        """
+        outcome: "ok" (additive increase), "rate_limited" (halve),
+        anything else leaves the limit unchanged.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            elif outcome == "rate_limited":
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.counters["rate_limited"] += 1
+            else:
+                self.counters["errors"] += 1
+            self._cond.notify_all()
+
+    # ---------------- FEEDBACK ----------------
+
+    def settle(self, reserved: int, used: int | None):
+        """
+        Refunds (or charges) the difference between the estimated and
+        the reported token usage.
+        """
+        if used is None:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if used < reserved:
+                self.tokens.give(reserved - used, now)
+            else:
+                self.tokens.take(used - reserved, now)
+            self._cond.notify_all()
+
+    def observe_headers(self, headers):
+        """
+        Applies x-ratelimit-limit-tokens, x-ratelimit-remaining-* /
+        reset-* and retry-after.
+        """
+        if not headers:
+            return
+
+        with self._cond:
+            now = time.monotonic()
+
+            limit = _header_number(headers, "x-ratelimit-limit-tokens")
+            if limit:
+                if self.tpm_ceiling > 0:
+                    limit = min(limit, self.tpm_ceiling)
+                self.tokens.resize(limit, now)
+
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                bucket.sync(remaining, now)
+                if remaining < 1:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self._paused_until = max(self._paused_until, now + reset)
+
+            retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    # ---------------- SLOTS ----------------
+
+    @contextmanager
+    def slot(self, priority: int, tokens: int):
+        start = time.perf_counter()
+        self.acquire(priority, tokens)
+        observe("llm_queue", start, time.perf_counter() - start)
+        outcome = {"value": "error"}
+        try:
+            yield outcome
+        finally:
+            self.release(outcome["value"])
+
+    @asynccontextmanager
+    async def aslot(self, priority: int, tokens: int):
+        start = time.perf_counter()
+        await self.aacquire(priority, tokens)
+        observe("llm_queue", start, time.perf_counter() - start)
+        outcome = {"value": "error"}
+        try:
+            yield outcome
+        finally:
+            self.release(outcome["value"])
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "paused_for": round(max(0.0, self._paused_until - now), 2),
+                "request_budget": round(self.requests.level, 1) if self.requests.enabled else None,
+                "token_budget": round(self.tokens.level, 1) if self.tokens.enabled else None,
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.counters.items()},
+            }
+
+
+scheduler = LLMScheduler()
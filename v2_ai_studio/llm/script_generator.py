@@ -1,12 +1,63 @@
 # llm/script_generator.py
-from llm.groq_client import generate
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
+
+from llm.groq_client import (
+    MODEL,
+    generate,
+    agenerate,
+    generate_stream,
+    agenerate_stream,
+)
+from llm.scheduler import PRIORITY_SCRIPT
+from processing.chunker import count_tokens
+from utils.disk_cache import DiskCache, hash_key
+from utils.tracing import bind
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 
 REF_SLIDES_PATH = BASE_DIR / "assets/examples/reference_ppt.txt"
 REF_SCRIPT_PATH = BASE_DIR / "assets/examples/reference_script.txt"
 
+SLIDE_MARKER = re.compile(r"(Slide\s+\d+\s*:)", re.IGNORECASE)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# ---------------- MAP-REDUCE WINDOWS ----------------
+# "windows" → slides are packed into windows that each fit one prompt and
+#             one completion budget; windows are generated in parallel,
+#             each seeing an extractive summary of the previous window,
+#             then merged and renumbered
+# "single"  → one prompt for the whole document (legacy)
+
+SCRIPT_MODE = os.getenv("SCRIPT_MODE", "windows")
+SCRIPT_WINDOW_MAX_SLIDES = int(os.getenv("SCRIPT_WINDOW_MAX_SLIDES", 6))
+SCRIPT_WINDOW_PROMPT_TOKENS = int(os.getenv("SCRIPT_WINDOW_PROMPT_TOKENS", 3000))
+SCRIPT_TOKENS_PER_SLIDE = int(os.getenv("SCRIPT_TOKENS_PER_SLIDE", 250))
+SCRIPT_WINDOW_MAX_TOKENS = int(os.getenv("SCRIPT_WINDOW_MAX_TOKENS", 2000))
+SCRIPT_CONTEXT_WORDS = int(os.getenv("SCRIPT_CONTEXT_WORDS", 60))
+SCRIPT_WINDOW_WORKERS = int(os.getenv("SCRIPT_WINDOW_WORKERS", 4))
+
+# ---------------- SECTION CACHE ----------------
+# Structured slides (PPTX) carry a content hash. The narration generated
+# for a slide is cached under that hash, so an edited deck only sends
+# its changed slides to the LLM.
+
+SECTION_CACHE_DIR = os.getenv("SECTION_CACHE_DIR", "cache/sections")
+SECTION_CACHE_MAX_MB = int(os.getenv("SECTION_CACHE_MAX_MB", 64))
+
+section_cache = DiskCache(
+    SECTION_CACHE_DIR,
+    max_bytes=SECTION_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".json"
+)
+
 
 def _load_text(path: Path) -> str:
     return path.read_text().strip() if path.exists() else ""
@@ -52,24 +103,32 @@ def _split_single_slide_into_sections(
 
 # ---------------- MAIN GENERATOR ----------------
 
-def generate_slidewise_script(
+def expand_slides(slides: list[dict]) -> list[dict]:
+    if not slides:
+        raise ValueError("No slide content provided")
+
+    # 🔥 HARD FALLBACK: dynamic split if extractor collapsed slides
+    if len(slides) == 1:
+        return _split_single_slide_into_sections(slides[0])
+
+    return slides
+
+
+def build_slidewise_prompt(
     slides: list[dict],
-    tone: str = "educational"
+    tone: str = "educational",
+    context: str = "",
+    expand: bool = True
 ) -> str:
     """
-    Generates a STRICT slide-wise teaching script.
+    Builds the prompt for a STRICT slide-wise teaching script.
 
-    GUARANTEES:
-    - Output slide count == logical slide count
-    - LLM does NOT invent, merge, or skip slides
+    context: summary of the preceding slides (map-reduce windows),
+    given for continuity only.
     """
 
-    if not slides:
-        raise ValueError("No slide content provided")
-
-    # 🔥 HARD FALLBACK: dynamic split if extractor collapsed slides
-    if len(slides) == 1:
-        slides = _split_single_slide_into_sections(slides[0])
+    if expand:
+        slides = expand_slides(slides)
 
     slide_count = len(slides)
 
@@ -114,6 +173,12 @@ Slides:
 
 Ideal Slide-wise Script:
 {ref_script}
+"""
+
+    if context:
+        prompt += f"""
+PREVIOUS SLIDES (CONTEXT ONLY — already explained, do NOT repeat or number them):
+{context}
 """
 
     prompt += "\nNOW GENERATE THE SCRIPT FOR THESE SLIDES:\n"
@@ -131,4 +196,454 @@ FINAL REMINDERS:
 - Do NOT add anything before or after
 """
 
-    return generate(prompt)
+    return prompt
+
+
+# ---------------- STREAMING ----------------
+
+class SlideStreamParser:
+    """
+    Incremental app.ui_routes.parse_slides_from_script: feed text deltas,
+    get each "Slide X:" block back once the next marker (or the end of
+    the stream) closes it.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pending = ""
+        self._title = None
+        self._count = 0
+
+    def _slide(self, text: str) -> dict:
+        slide = {
+            "title": self._title,
+            "text": text.strip(),
+            "slide_index": self._count
+        }
+        self._count += 1
+        return slide
+
+    def feed(self, delta: str) -> list[dict]:
+        self.text += delta
+        self._pending += delta
+
+        slides = []
+        start = None
+        for match in SLIDE_MARKER.finditer(self._pending):
+            # Text before the first marker is dropped, like the batch parser
+            if self._title is not None:
+                slides.append(self._slide(self._pending[start:match.start()]))
+            self._title = match.group(1).strip()
+            start = match.end()
+
+        if start is not None:
+            self._pending = self._pending[start:]
+
+        return slides
+
+    def close(self) -> list[dict]:
+        if self._title is None:
+            # No markers at all → the whole script is one slide
+            if not self.text.strip():
+                return []
+            self._title = "Slide 1:"
+            return [self._slide(self.text)]
+
+        return [self._slide(self._pending)]
+
+
+def parse_script(text: str) -> list[dict]:
+    parser = SlideStreamParser()
+    return parser.feed(text) + parser.close()
+
+
+# ---------------- SECTIONS ----------------
+
+def _template_key(tone: str) -> str:
+    # Prompt template + tone + model: a template change invalidates sections
+    return hash_key(
+        MODEL,
+        build_slidewise_prompt([{"slide": 1, "content": ""}], tone=tone, expand=False)
+    )
+
+
+def _section_key(slide: dict, template: str) -> str | None:
+    if not slide.get("hash"):
+        return None
+    return hash_key("section", template, slide["hash"])
+
+
+def _store_sections(slides: list[dict], request: dict, texts: list[str], template: str):
+    for pos, text in zip(request["positions"], texts):
+        key = _section_key(slides[pos], template)
+        if key:
+            section_cache.put_json(key, {"text": text})
+
+
+# ---------------- MAP-REDUCE ----------------
+
+def plan_script_windows(slides: list[dict]) -> list[list[int]]:
+    """
+    Greedily packs consecutive slide indices into windows bounded by the
+    prompt token budget, the completion budget and the max slides per window.
+    """
+    if not slides:
+        return []
+
+    if SCRIPT_MODE == "single":
+        return [list(range(len(slides)))]
+
+    overhead = count_tokens(
+        build_slidewise_prompt([{"slide": 1, "content": ""}] * 2, expand=False)
+    ) + SCRIPT_CONTEXT_WORDS * 2
+    max_slides = max(1, min(
+        SCRIPT_WINDOW_MAX_SLIDES,
+        (SCRIPT_WINDOW_MAX_TOKENS - 100) // SCRIPT_TOKENS_PER_SLIDE
+    ))
+
+    windows = []
+    current = []
+    used = overhead
+
+    for i, slide in enumerate(slides):
+        cost = count_tokens(slide["content"]) + 10
+
+        if current and (
+            len(current) >= max_slides
+            or used + cost > SCRIPT_WINDOW_PROMPT_TOKENS
+        ):
+            windows.append(current)
+            current = []
+            used = overhead
+
+        current.append(i)
+        used += cost
+
+    if current:
+        windows.append(current)
+
+    return windows
+
+
+def summarize_slides(slides: list[dict], max_words: int = SCRIPT_CONTEXT_WORDS) -> str:
+    """
+    Extractive summary: the lead sentence of each slide, newest last,
+    trimmed to max_words from the end (the closest context matters most).
+    """
+    leads = [
+        SENTENCE_END.split(s["content"].strip(), maxsplit=1)[0]
+        for s in slides
+        if s["content"].strip()
+    ]
+    words = " ".join(leads).split()
+    return " ".join(words[-max_words:]) if max_words > 0 else ""
+
+
+def _window_request(slides: list[dict], positions: list[int], tone: str) -> dict:
+    local = [
+        {"slide": n, "content": slides[pos]["content"]}
+        for n, pos in enumerate(positions, start=1)
+    ]
+
+    if SCRIPT_MODE == "single":
+        context = ""
+        max_tokens = 1200
+    else:
+        first = positions[0]
+        context = summarize_slides(slides[max(0, first - SCRIPT_WINDOW_MAX_SLIDES):first])
+        max_tokens = min(
+            SCRIPT_WINDOW_MAX_TOKENS,
+            SCRIPT_TOKENS_PER_SLIDE * len(local) + 100
+        )
+
+    return {
+        "prompt": build_slidewise_prompt(local, tone=tone, context=context, expand=False),
+        "max_tokens": max_tokens,
+        "expected": len(local),
+        "sources": local,
+        "positions": positions
+    }
+
+
+def plan_script(slides: list[dict], tone: str) -> tuple[list[dict], dict, list[dict], str]:
+    """
+    Splits the work into cached sections and LLM windows.
+
+    Returns (slides, {position: cached text}, window requests, template key).
+    Structured slides (with a "hash") keep their boundaries; anything
+    else goes through expand_slides first.
+    """
+    if not slides:
+        raise ValueError("No slide content provided")
+
+    if not all(s.get("hash") for s in slides):
+        slides = expand_slides(slides)
+
+    template = _template_key(tone)
+
+    cached = {}
+    for pos, slide in enumerate(slides):
+        key = _section_key(slide, template)
+        hit = section_cache.get_json(key) if key else None
+        if hit is not None:
+            cached[pos] = hit["text"]
+
+    missing = [pos for pos in range(len(slides)) if pos not in cached]
+    requests = [
+        _window_request(slides, [missing[i] for i in window], tone)
+        for window in plan_script_windows([slides[pos] for pos in missing])
+    ]
+
+    if cached:
+        logger.info(f"Script sections: {len(cached)} cached, {len(missing)} to generate")
+
+    return slides, cached, requests, template
+
+
+def fit_window(texts: list[str], sources: list[dict]) -> list[str]:
+    """
+    Enforces one output slide per input slide: overflow blocks are folded
+    into the last slide, missing slides fall back to their source text.
+    """
+    expected = len(sources)
+
+    if len(texts) > expected:
+        texts = texts[:expected - 1] + [" ".join(texts[expected - 1:])]
+
+    if len(texts) < expected:
+        logger.warning(
+            f"Script window returned {len(texts)}/{expected} slides, "
+            f"using source text for the rest"
+        )
+        texts = texts + [s["content"] for s in sources[len(texts):]]
+
+    return texts
+
+
+# Second attempt on a slide-count mismatch uses a different temperature
+# (and therefore a different cache entry)
+WINDOW_TEMPERATURES = (0.3, 0.6)
+
+
+def _map_window(request: dict) -> tuple[list[str], bool]:
+    """
+    Returns the window's slide texts and whether the count matched
+    (only exact windows are safe to cache per slide).
+    """
+    texts = []
+    for temperature in WINDOW_TEMPERATURES:
+        texts = [s["text"] for s in parse_script(generate(
+            request["prompt"],
+            temperature=temperature,
+            max_tokens=request["max_tokens"],
+            priority=PRIORITY_SCRIPT
+        ))]
+        if len(texts) == request["expected"]:
+            return texts, True
+
+    return fit_window(texts, request["sources"]), False
+
+
+async def _amap_window(request: dict) -> tuple[list[str], bool]:
+    texts = []
+    for temperature in WINDOW_TEMPERATURES:
+        texts = [s["text"] for s in parse_script(await agenerate(
+            request["prompt"],
+            temperature=temperature,
+            max_tokens=request["max_tokens"],
+            priority=PRIORITY_SCRIPT
+        ))]
+        if len(texts) == request["expected"]:
+            return texts, True
+
+    return fit_window(texts, request["sources"]), False
+
+
+def merge_sections(texts: list[str]) -> str:
+    """
+    Reduce step: numbers slides globally and joins them.
+    """
+    return "\n\n".join(
+        f"Slide {n}:\n{text}"
+        for n, text in enumerate(texts, start=1)
+    )
+
+
+def generate_slidewise_script(
+    slides: list[dict],
+    tone: str = "educational"
+) -> str:
+    """
+    Generates a STRICT slide-wise teaching script.
+
+    GUARANTEES:
+    - Output slide count == logical slide count
+    - LLM does NOT invent, merge, or skip slides
+    - Windows run in parallel: latency follows the widest window
+    - Unchanged structured slides reuse their cached section
+    """
+    slides, texts, requests, template = plan_script(slides, tone)
+
+    with ThreadPoolExecutor(max_workers=max(1, SCRIPT_WINDOW_WORKERS)) as pool:
+        for request, (window_texts, exact) in zip(requests, pool.map(bind(_map_window), requests)):
+            if exact:
+                _store_sections(slides, request, window_texts, template)
+            texts.update(zip(request["positions"], window_texts))
+
+    return merge_sections([texts[pos] for pos in range(len(slides))])
+
+
+async def agenerate_slidewise_script(
+    slides: list[dict],
+    tone: str = "educational"
+) -> str:
+    """
+    Async generate_slidewise_script (same windows, same guarantees).
+    """
+    slides, texts, requests, template = await asyncio.to_thread(plan_script, slides, tone)
+
+    results = await asyncio.gather(*(_amap_window(r) for r in requests))
+    for request, (window_texts, exact) in zip(requests, results):
+        if exact:
+            await asyncio.to_thread(_store_sections, slides, request, window_texts, template)
+        texts.update(zip(request["positions"], window_texts))
+
+    return merge_sections([texts[pos] for pos in range(len(slides))])
+
+
+def _slide(index: int, text: str) -> dict:
+    return {
+        "title": f"Slide {index + 1}:",
+        "text": text.strip(),
+        "slide_index": index
+    }
+
+
+class WindowStream:
+    """
+    Streams one window's slides as (position, text). The window's last
+    slide is held back until close() so overflow can be folded in.
+    """
+
+    def __init__(self, request: dict):
+        self.request = request
+        self.parser = SlideStreamParser()
+        self.texts = []
+        self.exact = False
+
+    def _emit(self, blocks: list[dict]) -> list[tuple[int, str]]:
+        out = []
+        for block in blocks:
+            self.texts.append(block["text"])
+            n = len(self.texts) - 1
+            if n < self.request["expected"] - 1:
+                out.append((self.request["positions"][n], block["text"]))
+        return out
+
+    def feed(self, delta: str) -> list[tuple[int, str]]:
+        return self._emit(self.parser.feed(delta))
+
+    def close(self) -> list[tuple[int, str]]:
+        out = self._emit(self.parser.close())
+        self.exact = len(self.texts) == self.request["expected"]
+
+        emitted = min(len(self.texts), self.request["expected"] - 1)
+        self.texts = fit_window(self.texts, self.request["sources"])
+        return out + [
+            (self.request["positions"][n], self.texts[n])
+            for n in range(emitted, self.request["expected"])
+        ]
+
+
+def stream_slidewise_script(
+    slides: list[dict],
+    tone: str = "educational"
+) -> Iterator[dict]:
+    """
+    generate_slidewise_script, yielding {title, text, slide_index}
+    per slide as soon as it is complete.
+
+    Cached sections are yielded immediately (in order); the first window
+    is streamed token by token while later windows run in parallel.
+    """
+    slides, texts, requests, template = plan_script(slides, tone)
+
+    with ThreadPoolExecutor(max_workers=max(1, SCRIPT_WINDOW_WORKERS)) as pool:
+        later = [pool.submit(bind(_map_window), r) for r in requests[1:]]
+
+        def generated() -> Iterator[tuple[int, str]]:
+            if not requests:
+                return
+
+            first = WindowStream(requests[0])
+            for delta in generate_stream(
+                requests[0]["prompt"],
+                max_tokens=requests[0]["max_tokens"],
+                priority=PRIORITY_SCRIPT
+            ):
+                yield from first.feed(delta)
+            yield from first.close()
+            if first.exact:
+                _store_sections(slides, requests[0], first.texts, template)
+
+            for request, future in zip(requests[1:], later):
+                window_texts, exact = future.result()
+                if exact:
+                    _store_sections(slides, request, window_texts, template)
+                yield from zip(request["positions"], window_texts)
+
+        try:
+            pending = generated()
+            for pos in range(len(slides)):
+                if pos not in texts:
+                    _, texts[pos] = next(pending)
+                yield _slide(pos, texts[pos])
+        finally:
+            for future in later:
+                future.cancel()
+
+
+async def astream_slidewise_script(
+    slides: list[dict],
+    tone: str = "educational"
+) -> AsyncIterator[dict]:
+    """
+    Async stream_slidewise_script.
+    """
+    slides, texts, requests, template = await asyncio.to_thread(plan_script, slides, tone)
+
+    later = [asyncio.create_task(_amap_window(r)) for r in requests[1:]]
+
+    async def generated() -> AsyncIterator[tuple[int, str]]:
+        if not requests:
+            return
+
+        first = WindowStream(requests[0])
+        async for delta in agenerate_stream(
+            requests[0]["prompt"],
+            max_tokens=requests[0]["max_tokens"],
+            priority=PRIORITY_SCRIPT
+        ):
+            for item in first.feed(delta):
+                yield item
+        for item in first.close():
+            yield item
+        if first.exact:
+            await asyncio.to_thread(_store_sections, slides, requests[0], first.texts, template)
+
+        for request, task in zip(requests[1:], later):
+            window_texts, exact = await task
+            if exact:
+                await asyncio.to_thread(_store_sections, slides, request, window_texts, template)
+            for item in zip(request["positions"], window_texts):
+                yield item
+
+    try:
+        pending = generated()
+        for pos in range(len(slides)):
+            if pos not in texts:
+                _, texts[pos] = await anext(pending)
+            yield _slide(pos, texts[pos])
+    finally:
+        for task in later:
+            task.cancel()
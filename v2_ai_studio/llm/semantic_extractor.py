@@ -1,6 +1,18 @@
 # llm/semantic_extractor.py
-import json
-from llm.groq_client import generate
+from llm.structured import generate_json
+
+ROLE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["id", "label", "role"],
+        "properties": {
+            "id": {"type": "string"},
+            "label": {"type": "string"},
+            "role": {"enum": ["input", "core", "output", "storage", "external"]}
+        }
+    }
+}
 
 def extract_semantic_roles(text: str) -> list[dict]:
     """
@@ -29,13 +41,8 @@ TEXT:
 """
 
     try:
-        response = generate(prompt)
-        roles = json.loads(response)
-
-        if not isinstance(roles, list):
-            return []
-
-        return roles
-
+        roles = generate_json(prompt, ROLE_SCHEMA, "semantic_roles")
     except Exception:
         return []
+
+    return roles or []
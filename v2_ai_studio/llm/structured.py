@@ -0,0 +1,352 @@
+# llm/structured.py
+import json
+import logging
+import os
+import re
+
+from groq import BadRequestError
+
+from llm.groq_client import generate
+from utils.tracing import Counter, register
+
+logger = logging.getLogger(__name__)
+
+# ---------------- STRUCTURED OUTPUT ----------------
+# One path for every extractor that wants JSON back:
+#   1️⃣ JSON mode (response_format=json_object) when the schema is an
+#      object and the backend accepts it
+#   2️⃣ tolerant parsing: markdown fences, prose around the JSON,
+#      trailing commas, Python literals, truncated output
+#   3️⃣ schema check; only a still-invalid answer is re-requested
+#      (STRUCTURED_MAX_REREQUESTS), with the problems spelled out
+# A repair costs nothing; before this, any fence or trailing sentence
+# meant an empty result and a second, full fallback LLM call.
+
+STRUCTURED_JSON_MODE = os.getenv("STRUCTURED_JSON_MODE", "1") == "1"
+STRUCTURED_MAX_REREQUESTS = int(os.getenv("STRUCTURED_MAX_REREQUESTS", 1))
+
+JSON_OBJECT = {"type": "json_object"}
+
+FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+LITERAL = re.compile(r"\b(True|False|None)\b")
+
+OUTCOMES = register(Counter(
+    "ai_studio_structured_outputs_total",
+    "Structured LLM answers by extractor and outcome "
+    "(clean, repaired, rerequested, failed).",
+    ("extractor", "outcome")
+))
+
+# Flipped off the first time the backend rejects response_format
+_json_mode_available = STRUCTURED_JSON_MODE
+
+
+# ---------------- EXTRACTION + REPAIR ----------------
+
+def _balanced(text: str, start: int) -> int | None:
+    """
+    End offset of the JSON value opening at text[start], or None if it
+    never closes (truncated output).
+    """
+    stack = []
+    in_string = escaped = False
+
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if not stack or stack.pop() != c:
+                return None
+            if not stack:
+                return i + 1
+    return None
+
+
+def _close(text: str) -> str:
+    """
+    Closes an unterminated string and every open bracket of truncated JSON.
+    """
+    stack = []
+    in_string = escaped = False
+
+    for c in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    return text + "".join(reversed(stack))
+
+
+def _fix(text: str) -> str:
+    # Outside strings: Python literals, trailing commas
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = LITERAL.sub(lambda m: PY_LITERALS[m.group(1)], parts[i])
+        parts[i] = TRAILING_COMMA.sub(r"\1", parts[i])
+    return "".join(parts)
+
+
+def _truncated(text: str):
+    """
+    Truncated output: drop the unfinished last element, then close the
+    brackets. Closing the text as-is is the last resort.
+    """
+    cuts = [m.start() for m in re.finditer(r"[,\[{]", text)][-20:]
+    heads = [text[:cut] for cut in reversed(cuts)] + [text]
+    for head in heads:
+        try:
+            return json.loads(_fix(_close(head)))
+        except ValueError:
+            continue
+    raise ValueError("unrepairable truncated JSON")
+
+
+def _decode(body: str):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return json.loads(_fix(body))
+
+
+def extract_json(text: str):
+    """
+    Parses an LLM answer as JSON. Returns (value, repaired).
+
+    Raises ValueError if no JSON value can be recovered.
+    """
+    text = (text or "").strip()
+
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    candidates = [m.group(1).strip() for m in FENCE.finditer(text)]
+    candidates.append(text)
+
+    for candidate in candidates:
+        # Every bracket can open the value: "Note [1]: {...}" must not
+        # stop at "[1]". The longest value wins, a truncated one (repaired)
+        # included: its nested values are complete but only parts of it.
+        found, unclosed = [], []
+        i = 0
+        while i < len(candidate):
+            if candidate[i] not in "{[":
+                i += 1
+                continue
+            end = _balanced(candidate, i)
+            if end is None:
+                unclosed.append(i)
+                i += 1
+                continue
+            try:
+                found.append((end - i, _decode(candidate[i:end])))
+                i = end
+            except ValueError:
+                i += 1
+
+        longest = max(found, key=lambda f: f[0]) if found else (0, None)
+
+        for start in unclosed[:3]:
+            if len(candidate) - start <= longest[0]:
+                break
+            try:
+                return _truncated(candidate[start:]), True
+            except ValueError:
+                continue
+
+        if found:
+            return longest[1], True
+
+    raise ValueError("no JSON value found in response")
+
+
+# ---------------- SCHEMA ----------------
+# A small JSON-Schema subset: type, enum, required, properties,
+# additionalProperties (schema), items, minItems, maxItems, minLength, anyOf.
+
+TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def validate(value, schema: dict, path: str = "$") -> list[str]:
+    """
+    Problems with value under schema (empty list = valid).
+    """
+    if "anyOf" in schema:
+        if any(not validate(value, option, path) for option in schema["anyOf"]):
+            return []
+        return [f"{path}: does not match any allowed shape"]
+
+    expected = schema.get("type")
+    if expected and not TYPES[expected](value):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: must be one of {schema['enum']}"]
+
+    errors = []
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required key '{key}'")
+        properties = schema.get("properties", {})
+        extra = schema.get("additionalProperties")
+        for key, item in value.items():
+            sub = properties.get(key, extra if isinstance(extra, dict) else None)
+            if sub:
+                errors.extend(validate(item, sub, f"{path}.{key}"))
+
+    elif isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: needs at least {schema['minItems']} items")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: at most {schema['maxItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    elif isinstance(value, str):
+        if len(value) < schema.get("minLength", 0):
+            errors.append(f"{path}: shorter than {schema['minLength']}")
+
+    return errors
+
+
+# ---------------- GENERATION ----------------
+
+REREQUEST_PROMPT = """{prompt}
+
+Your previous answer could not be used:
+{problems}
+
+Previous answer:
+{answer}
+
+Return ONLY the corrected JSON. No markdown, no explanation."""
+
+
+def _error_body(error: BadRequestError) -> dict:
+    body = error.body if isinstance(error.body, dict) else {}
+    body = body.get("error", body)
+    return body if isinstance(body, dict) else {}
+
+
+def _failed_generation(error: BadRequestError) -> str | None:
+    # Groq JSON mode returns the rejected text as error.failed_generation
+    return _error_body(error).get("failed_generation")
+
+
+def _json_mode_unsupported(error: BadRequestError) -> bool:
+    # Only a complaint about response_format means JSON mode itself is the problem;
+    # other 400s (e.g. context length) belong to this one prompt
+    body = _error_body(error)
+    if body.get("param") == "response_format":
+        return True
+    message = str(body.get("message") or error).lower()
+    return "response_format" in message or "json mode" in message
+
+
+def _ask(prompt: str, json_mode: bool, **kwargs) -> str:
+    global _json_mode_available
+
+    if json_mode and _json_mode_available:
+        try:
+            return generate(prompt, response_format=JSON_OBJECT, **kwargs)
+        except BadRequestError as e:
+            failed = _failed_generation(e)
+            if failed is not None:
+                return failed  # model answered, JSON mode rejected it: repair locally
+            if not _json_mode_unsupported(e):
+                raise
+            logger.warning(f"JSON mode rejected by the backend, disabling it: {e!r}")
+            _json_mode_available = False
+
+    return generate(prompt, **kwargs)
+
+
+def _parse(answer: str, schema: dict) -> tuple[object, bool, list[str]]:
+    try:
+        value, repaired = extract_json(answer)
+    except ValueError as e:
+        return None, False, [str(e)]
+    return value, repaired, validate(value, schema)
+
+
+def generate_json(
+    prompt: str,
+    schema: dict,
+    name: str,
+    max_rerequests: int = STRUCTURED_MAX_REREQUESTS,
+    json_mode: bool | None = None,
+    **kwargs
+):
+    """
+    generate() for a JSON answer matching schema, or None if even the
+    re-requests fail (callers keep their own fallback for that case).
+
+    name labels the extractor in the outcome counters; kwargs go to
+    generate() (max_tokens, priority, ...).
+    """
+    if json_mode is None:
+        # JSON mode only produces objects
+        json_mode = schema.get("type") == "object"
+
+    answer = _ask(prompt, json_mode, **kwargs)
+    value, repaired, problems = _parse(answer, schema)
+
+    if not problems:
+        OUTCOMES.inc(extractor=name, outcome="repaired" if repaired else "clean")
+        return value
+
+    for _ in range(max_rerequests):
+        logger.info(f"{name}: re-requesting structured output ({'; '.join(problems[:3])})")
+        answer = _ask(
+            REREQUEST_PROMPT.format(
+                prompt=prompt,
+                problems="\n".join(f"- {p}" for p in problems[:10]),
+                answer=answer[:4000]
+            ),
+            json_mode,
+            **kwargs
+        )
+        value, repaired, problems = _parse(answer, schema)
+        if not problems:
+            OUTCOMES.inc(extractor=name, outcome="rerequested")
+            return value
+
+    OUTCOMES.inc(extractor=name, outcome="failed")
+    logger.warning(f"{name}: no valid structured output ({'; '.join(problems[:3])})")
+    return None
@@ -1,19 +1,99 @@
-import pdfplumber
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
+
+import pdfplumber
+
+# Large PDFs fan out to a process pool (pdfplumber is pure-Python, so
+# threads would serialize on the GIL). Small ones stay in-process.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 8))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 32))
+
+# The pool is created inside a threaded server (HTTP pools, scheduler,
+# Whisper): forking it could copy a lock held by another thread, so
+# workers start fresh
+MP_CONTEXT = multiprocessing.get_context("spawn")
 
 
-def load_pdf(path: str) -> str:
+def _check_path(path: str) -> Path:
     pdf_path = Path(path)
 
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found at: {pdf_path}")
 
-    text = ""
+    return pdf_path
+
+
+def count_pages(path: str) -> int:
+    with pdfplumber.open(_check_path(path)) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_range(path: str, start: int, stop: int) -> list[str]:
+    """
+    Worker task: text of pages [start, stop). Each process opens its own handle.
+    """
+    with pdfplumber.open(path) as pdf:
+        return [
+            pdf.pages[i].extract_text() or ""
+            for i in range(start, stop)
+        ]
+
+
+def iter_pdf_pages(
+    path: str,
+    pages: range | None = None,
+    workers: int | None = None
+) -> Iterator[tuple[int, str]]:
+    """
+    Yields (page_index, text) in page order as pages become available.
+
+    Args:
+        path (str): PDF file
+        pages (range): 0-based page indices to extract (default: all)
+        workers (int): process count; 1 forces in-process extraction
+    """
+    pdf_path = _check_path(path)
+    workers = workers or PDF_WORKERS
+
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += (page.extract_text() or "") + "\n"
+        total = len(pdf.pages)
+        pages = range(total) if pages is None else range(
+            max(pages.start, 0), min(pages.stop, total)
+        )
+
+        if workers <= 1 or len(pages) < PDF_PARALLEL_MIN_PAGES:
+            for i in pages:
+                yield i, pdf.pages[i].extract_text() or ""
+            return
+
+    # ---------------- PROCESS POOL ----------------
+    starts = list(range(pages.start, pages.stop, PDF_PAGES_PER_TASK))
+    stops = [min(s + PDF_PAGES_PER_TASK, pages.stop) for s in starts]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=MP_CONTEXT) as pool:
+        # map() hands back results in submission order → ordered reassembly
+        for start, texts in zip(
+            starts,
+            pool.map(_extract_range, [str(pdf_path)] * len(starts), starts, stops)
+        ):
+            for offset, text in enumerate(texts):
+                yield start + offset, text
+
+
+def load_pdf(
+    path: str,
+    pages: range | None = None,
+    workers: int | None = None
+) -> str:
+    text = "\n".join(
+        page_text for _, page_text in iter_pdf_pages(path, pages, workers)
+    )
 
     if not text.strip():
         raise ValueError("No readable text found in PDF")
 
-    return text
+    return text + "\n"
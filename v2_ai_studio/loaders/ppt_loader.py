@@ -1,27 +1,84 @@
 # loaders/ppt_loader.py
 from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
 from pathlib import Path
+from typing import Iterator
 
+from utils.disk_cache import hash_key
 
-def load_ppt(path: str) -> str:
+# Master-driven footers repeat on every slide and carry no content
+SKIPPED_PLACEHOLDERS = {
+    PP_PLACEHOLDER.FOOTER,
+    PP_PLACEHOLDER.SLIDE_NUMBER,
+    PP_PLACEHOLDER.DATE,
+}
+
+
+def _open(path: str) -> Presentation:
     ppt_path = Path(path)
 
     if not ppt_path.exists():
         raise FileNotFoundError(f"PPT file not found at: {ppt_path}")
 
-    prs = Presentation(ppt_path)
-    slides_text = []
+    return Presentation(ppt_path)
+
+
+def slide_record(index: int, title: str, body: str, notes: str) -> dict:
+    """
+    One slide: real boundaries kept, hash over everything the script
+    depends on (an edit to title, body or notes changes it).
+    """
+    return {
+        "index": index,
+        "title": title,
+        "body": body,
+        "notes": notes,
+        "hash": hash_key("pptx-slide", title, body, notes)
+    }
+
+
+def _is_footer(shape) -> bool:
+    return (
+        shape.is_placeholder
+        and shape.placeholder_format.type in SKIPPED_PLACEHOLDERS
+    )
 
-    for slide in prs.slides:
-        slide_content = []
-        for shape in slide.shapes:
-            if hasattr(shape, "text"):
-                slide_content.append(shape.text)
 
-        if slide_content:
-            slides_text.append(" ".join(slide_content))
+def iter_ppt_slides(path: str) -> Iterator[dict]:
+    """
+    Yields {index, title, body, notes, hash} per slide that has text.
+    """
+    prs = _open(path)
+
+    for index, slide in enumerate(prs.slides):
+        title_shape = slide.shapes.title
+        title = title_shape.text.strip() if title_shape is not None else ""
+        title_id = title_shape.shape_id if title_shape is not None else None
+
+        body = "\n".join(
+            shape.text.strip()
+            for shape in slide.shapes
+            if hasattr(shape, "text")
+            and shape.shape_id != title_id
+            and not _is_footer(shape)
+            and shape.text.strip()
+        )
+
+        notes = ""
+        if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+            notes = slide.notes_slide.notes_text_frame.text.strip()
+
+        if title or body or notes:
+            yield slide_record(index, title, body, notes)
+
+
+def load_ppt(path: str) -> str:
+    slides_text = [
+        " ".join(part for part in (r["title"], r["body"]) if part)
+        for r in iter_ppt_slides(path)
+    ]
 
-    text = "\n".join(slides_text)
+    text = "\n".join(t for t in slides_text if t)
 
     if not text.strip():
         raise ValueError("No readable text found in PPT")
@@ -1,7 +1,208 @@
 # processing/chunker.py
+import os
+import re
+from typing import Iterable, Iterator
+
+# ---------------- BUDGET ----------------
+# Chunks are packed to a MODEL-TOKEN budget (local approximation, no
+# tokenizer download) and cut at the best boundary that still fills at
+# least CHUNK_MIN_FILL of the budget: paragraph > sentence > word.
+# Chunks are (start, end) offsets into the source text, not copies.
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 1000))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 0))
+CHUNK_MIN_FILL = float(os.getenv("CHUNK_MIN_FILL", 0.5))
+
+# Legacy word budgets → token budgets (chunk_text)
+TOKENS_PER_WORD = 1.3
+
+TOKEN = re.compile(r"\w+|[^\w\s]")
+NON_SPACE = re.compile(r"\S")
+SENTENCE_END = ".!?"
+
+
+def token_cost(length: int) -> int:
+    """
+    Approximate BPE cost of one regex token: punctuation is one token,
+    common words are one token, long words split every ~7 characters.
+    """
+    return 1 if length == 1 else 1 + length // 7
+
+
+def count_tokens(text: str, start: int = 0, end: int | None = None) -> int:
+    end = len(text) if end is None else end
+    return sum(
+        token_cost(m.end() - m.start())
+        for m in TOKEN.finditer(text, start, end)
+    )
+
+
+def check_budget(max_tokens: int, overlap_tokens: int):
+    """
+    An overlap that fills the budget would advance one token per chunk.
+    """
+    if max_tokens <= 0:
+        raise ValueError(f"Chunk budget must be positive, got {max_tokens}")
+    if overlap_tokens >= max_tokens:
+        raise ValueError(
+            f"Chunk overlap ({overlap_tokens} tokens) must be smaller than "
+            f"the chunk budget ({max_tokens} tokens)"
+        )
+
+
+check_budget(CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+
+
+def _cut(
+    text: str,
+    start: int,
+    max_tokens: int,
+    overlap_tokens: int
+) -> tuple[int, int] | None:
+    """
+    Packs tokens from start until the budget is full.
+
+    Returns (end of this chunk, start of the next chunk), or None if the
+    text runs out before the budget does.
+    """
+    cost = 0
+    prev_end = None
+    paragraph = sentence = None  # (offset, cost up to it)
+    marks = []  # (token start, cost before it, starts a sentence)
+
+    for m in TOKEN.finditer(text, start):
+        boundary = False
+        if prev_end is not None:
+            if text.count("\n", prev_end, m.start()) >= 2:
+                paragraph = (prev_end, cost)
+                boundary = True
+            elif text[prev_end - 1] in SENTENCE_END and m.start() > prev_end:
+                sentence = (prev_end, cost)
+                boundary = True
+
+        c = token_cost(m.end() - m.start())
+
+        if prev_end is not None and cost + c > max_tokens:
+            min_fill = max_tokens * CHUNK_MIN_FILL
+            if paragraph and paragraph[1] >= min_fill:
+                end, end_cost = paragraph
+            elif sentence and sentence[1] >= min_fill:
+                end, end_cost = sentence
+            else:
+                end, end_cost = prev_end, cost
+
+            following = NON_SPACE.search(text, end)
+            next_start = following.start() if following else len(text)
+
+            if overlap_tokens > 0:
+                # Earliest sentence start inside the overlap window,
+                # else the earliest token inside it
+                window = [
+                    (pos, is_sentence) for pos, before, is_sentence in marks
+                    if start < pos < end and end_cost - before <= overlap_tokens
+                ]
+                sentences = [pos for pos, is_sentence in window if is_sentence]
+                if sentences:
+                    next_start = sentences[0]
+                elif window:
+                    next_start = window[0][0]
+
+            return end, next_start
+
+        if overlap_tokens > 0:
+            marks.append((m.start(), cost, boundary))
+        cost += c
+        prev_end = m.end()
+
+    return None
+
+
+def _pack(
+    text: str,
+    pos: int,
+    max_tokens: int,
+    overlap_tokens: int,
+    final: bool
+) -> tuple[list[tuple[int, int]], int]:
+    """
+    Spans of text[pos:] plus the offset where unfinished text begins.
+    With final=False the trailing, under-budget chunk is left pending.
+    """
+    spans = []
+
+    while True:
+        m = NON_SPACE.search(text, pos)
+        if not m:
+            return spans, len(text)
+
+        start = m.start()
+        cut = _cut(text, start, max_tokens, overlap_tokens)
+
+        if cut is None:
+            if not final:
+                return spans, start
+            spans.append((start, len(text.rstrip())))
+            return spans, len(text)
+
+        end, pos = cut
+        spans.append((start, end))
+
+
+def chunk_spans(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+) -> Iterator[tuple[int, int]]:
+    """
+    Yields (start, end) offsets of token-budgeted chunks of text.
+    """
+    check_budget(max_tokens, overlap_tokens)
+    spans, _ = _pack(text, 0, max_tokens, overlap_tokens, final=True)
+    yield from spans
+
+
+def stream_chunks(
+    pages: Iterable[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    separator: str = "\n\n"
+) -> Iterator[tuple[int, int, str]]:
+    """
+    Streaming chunk_spans over a page iterator (e.g. the PDF loader).
+
+    Pages are joined with separator (a paragraph boundary). Only the
+    unfinished tail is buffered; each chunk is yielded as soon as the
+    budget closes it, as (start, end, text) with offsets into the joined
+    document.
+    """
+    check_budget(max_tokens, overlap_tokens)
+    buffer = ""  # document[base:]
+    base = 0
+    started = False
+
+    for page in pages:
+        if not page or not page.strip():
+            continue
+
+        buffer += (separator if started else "") + page
+        started = True
+
+        spans, resume = _pack(buffer, 0, max_tokens, overlap_tokens, final=False)
+        for start, end in spans:
+            yield base + start, base + end, buffer[start:end]
+
+        base += resume
+        buffer = buffer[resume:]
+
+    spans, _ = _pack(buffer, 0, max_tokens, overlap_tokens, final=True)
+    for start, end in spans:
+        yield base + start, base + end, buffer[start:end]
+
+
 def chunk_text(text: str, max_words: int = 800, overlap: int = 100):
     """
-    Splits text into overlapping word chunks for LLM processing.
+    Splits text into overlapping chunks for LLM processing.
+    Compatibility wrapper over chunk_spans (word budgets → token budgets).
 
     Args:
         text (str): Input text
@@ -11,11 +212,12 @@ def chunk_text(text: str, max_words: int = 800, overlap: int = 100):
 
     if not text or not text.strip():
         raise ValueError("Cannot chunk empty text")
+    if overlap >= max_words:
+        raise ValueError(f"overlap ({overlap}) must be smaller than max_words ({max_words})")
 
-    words = text.split()
-    start = 0
-
-    while start < len(words):
-        end = start + max_words
-        yield " ".join(words[start:end])
-        start = end - overlap if end - overlap > 0 else end
+    for start, end in chunk_spans(
+        text,
+        max_tokens=int(max_words * TOKENS_PER_WORD),
+        overlap_tokens=int(overlap * TOKENS_PER_WORD)
+    ):
+        yield text[start:end]
@@ -1,5 +1,63 @@
 # processing/cleaner.py
+import hashlib
+import os
 import re
+from collections import Counter, deque
+from typing import Iterable, Iterator
+
+from processing.chunker import count_tokens
+
+# ---------------- BOILERPLATE ----------------
+# Running headers, footers, copyright lines and slide footers repeat on
+# every page and would otherwise be paid for in every chunk's prompt.
+# A line is boilerplate when the same normalized text sits in the same
+# edge zone (top / bottom CLEAN_EDGE_LINES lines) on at least
+# CLEAN_MIN_REPEATS pages AND on at least CLEAN_MIN_SHARE of the pages
+# seen so far. Pages with no more than 2 × CLEAN_EDGE_LINES lines are
+# all edge, so they are neither counted nor stripped. Pages stream
+# through with a lookahead of CLEAN_LOOKAHEAD_PAGES so repeats can be
+# confirmed before a page is emitted.
+
+CLEAN_EDGE_LINES = int(os.getenv("CLEAN_EDGE_LINES", 3))
+CLEAN_MIN_REPEATS = int(os.getenv("CLEAN_MIN_REPEATS", 3))
+CLEAN_MIN_SHARE = float(os.getenv("CLEAN_MIN_SHARE", 0.5))
+CLEAN_LOOKAHEAD_PAGES = int(os.getenv("CLEAN_LOOKAHEAD_PAGES", 6))
+
+SPACES = re.compile(r"\s+")
+
+# Only these change from page to page and are folded before hashing;
+# any other number ("Step 3", "Q4 results") is content
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+DATE = re.compile(
+    rf"\b\d{{1,4}}[-/.]\d{{1,2}}[-/.]\d{{1,4}}\b"
+    rf"|\b{MONTH}\s+\d{{1,2}}(?:,?\s+\d{{4}})?\b"
+    rf"|\b\d{{1,2}}\s+{MONTH}(?:\s+\d{{4}})?\b",
+    re.IGNORECASE
+)
+PAGE_NUMBER = re.compile(
+    r"^\W*\d+\W*$"
+    r"|\b(?:page|p\.|pg\.?)\s*\d+(?:\s*(?:of|/)\s*\d+)?\b"
+    r"|\b\d+\s*(?:of|/)\s*\d+\b",
+    re.IGNORECASE
+)
+
+# One pass for all inline artifacts (order matters: "Page N" before spaces)
+ARTIFACTS = re.compile(
+    r"(?P<page>\b(?:Page|page)\s+\d+\b)"
+    r"|(?P<sep>[_\-]{2,})"
+    r"|(?P<para>[^\S\n]*\n\s*\n\s*)"
+    r"|(?P<space>\s+)"
+)
+
+
+def _normalize_artifacts(text: str, keep_paragraphs: bool = False) -> str:
+    replacement = {
+        "page": "",
+        "sep": " ",
+        "para": "\n\n" if keep_paragraphs else " ",
+        "space": " ",
+    }
+    return ARTIFACTS.sub(lambda m: replacement[m.lastgroup], text).strip()
 
 
 def clean_text(text: str) -> str:
@@ -11,13 +69,120 @@ def clean_text(text: str) -> str:
     if not text or not text.strip():
         raise ValueError("Empty text cannot be cleaned")
 
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text)
+    return _normalize_artifacts(text)
+
+
+def line_key(line: str, zone: str) -> str:
+    """
+    Positional hash of a line. Page numbers and dates differ from page
+    to page, so they are folded before hashing.
+    """
+    normalized = PAGE_NUMBER.sub("#", DATE.sub("#", line.strip().lower()))
+    normalized = SPACES.sub(" ", normalized)
+    return hashlib.blake2b(f"{zone}|{normalized}".encode(), digest_size=8).hexdigest()
+
+
+def _edge_keys(lines: list[str], edge_lines: int) -> dict[int, str]:
+    """
+    {line index: key} for the non-empty top and bottom lines of a page,
+    or {} for a page too short to have a body between its edges.
+    """
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    if len(content) <= 2 * edge_lines:
+        return {}
+
+    keys = {}
+    for i in content[:edge_lines]:
+        keys[i] = line_key(lines[i], "top")
+    for i in content[-edge_lines:]:
+        keys.setdefault(i, line_key(lines[i], "bottom"))
+    return keys
+
+
+class PageCleaner:
+    """
+    Streaming cleaner: strips cross-page boilerplate lines, then inline
+    artifacts, page by page. stats reports what was removed.
+    """
+
+    def __init__(
+        self,
+        edge_lines: int = CLEAN_EDGE_LINES,
+        min_repeats: int = CLEAN_MIN_REPEATS,
+        min_share: float = CLEAN_MIN_SHARE,
+        lookahead: int = CLEAN_LOOKAHEAD_PAGES
+    ):
+        self.edge_lines = edge_lines
+        self.min_repeats = min_repeats
+        self.min_share = min_share
+        self.lookahead = lookahead
+        self.counts = Counter()
+        self.candidate_pages = 0  # pages long enough to have edges
+        self.stats = {
+            "pages": 0,
+            "boilerplate_lines": 0,
+            "chars_in": 0,
+            "chars_out": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+        }
+
+    def _boilerplate(self, key: str) -> bool:
+        count = self.counts[key]
+        return count >= self.min_repeats and count >= self.min_share * self.candidate_pages
+
+    def _emit(self, lines: list[str], keys: dict[int, str]) -> str:
+        kept = []
+        for i, line in enumerate(lines):
+            key = keys.get(i)
+            if key is not None and self._boilerplate(key):
+                self.stats["boilerplate_lines"] += 1
+                continue
+            kept.append(line)
+
+        # Paragraph breaks survive: the chunker prefers them as cut points
+        return _normalize_artifacts("\n".join(kept), keep_paragraphs=True)
+
+    def clean(self, pages: Iterable[str], keep_empty: bool = False) -> Iterator[str]:
+        """
+        Yields cleaned pages in order. Empty results are skipped unless
+        keep_empty (then "" keeps a 1:1 mapping with the input pages).
+        """
+        window = deque()
+
+        def release():
+            raw, lines, keys = window.popleft()
+            text = self._emit(lines, keys)
+
+            self.stats["pages"] += 1
+            self.stats["chars_in"] += len(raw)
+            self.stats["chars_out"] += len(text)
+            self.stats["tokens_in"] += count_tokens(raw)
+            self.stats["tokens_out"] += count_tokens(text)
+            return text
+
+        for raw in pages:
+            raw = raw or ""
+            lines = raw.splitlines()
+            keys = _edge_keys(lines, self.edge_lines)
+            if keys:
+                self.candidate_pages += 1
+                # A line counts once per page
+                self.counts.update(set(keys.values()))
+            window.append((raw, lines, keys))
 
-    # Remove common PDF artifacts
-    text = re.sub(r"\b(Page|page)\s+\d+\b", "", text)
+            if len(window) > self.lookahead:
+                text = release()
+                if text or keep_empty:
+                    yield text
 
-    # Remove repeated separators
-    text = re.sub(r"[_\-]{2,}", " ", text)
+        while window:
+            text = release()
+            if text or keep_empty:
+                yield text
 
-    return text.strip()
+    def report(self) -> dict:
+        stats = dict(self.stats)
+        stats["chars_removed"] = stats["chars_in"] - stats["chars_out"]
+        stats["tokens_removed"] = stats["tokens_in"] - stats["tokens_out"]
+        return stats
@@ -0,0 +1,217 @@
+# processing/dedup.py
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from processing.chunker import CHUNK_MAX_TOKENS, count_tokens
+
+# ---------------- NEAR-DUPLICATES ----------------
+# Recap / agenda slides, repeated boilerplate paragraphs and chunk overlap
+# send the same content to the model twice. Chunks are sketched with
+# one-permutation MinHash over word shingles (one hash per shingle,
+# DEDUP_BINS bins), candidates come from LSH banding (DEDUP_BANDS bands),
+# so the whole pass is linear in the input size. A candidate whose
+# estimated Jaccard similarity reaches DEDUP_THRESHOLD is a duplicate:
+# dropped, or with DEDUP_MODE=merge its unseen sentences are appended to
+# the chunk it duplicates (out of document order, and only while that
+# chunk stays within CHUNK_MAX_TOKENS; the rest is counted as truncated).
+# mode="contained" drops a duplicate only if it adds no shingle at all,
+# for slides that build on the previous one bullet by bullet.
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", 5))
+DEDUP_BINS = int(os.getenv("DEDUP_BINS", 64))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", 16))
+DEDUP_MODE = os.getenv("DEDUP_MODE", "drop")  # drop | merge | contained
+
+WORD = re.compile(r"\w+")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+HASH_SPACE = 1 << 64
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def shingles(text: str, shingle_words: int = DEDUP_SHINGLE_WORDS) -> Iterator[str]:
+    words = WORD.findall(text.lower())
+    if len(words) < shingle_words:
+        if words:
+            yield " ".join(words)
+        return
+    for i in range(len(words) - shingle_words + 1):
+        yield " ".join(words[i:i + shingle_words])
+
+
+def signature(
+    text: str,
+    shingle_words: int = DEDUP_SHINGLE_WORDS,
+    bins: int = DEDUP_BINS
+) -> tuple:
+    """
+    One-permutation MinHash: each shingle hash lands in one of `bins`
+    bins, the bin keeps its minimum. Empty bins are None.
+    """
+    width = HASH_SPACE // bins
+    mins = [None] * bins
+    for shingle in shingles(text, shingle_words):
+        h = _hash(shingle)
+        b, value = divmod(h, width)
+        b = min(b, bins - 1)
+        if mins[b] is None or value < mins[b]:
+            mins[b] = value
+    return tuple(mins)
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    filled = matched = 0
+    for x, y in zip(a, b):
+        if x is None and y is None:
+            continue
+        filled += 1
+        matched += x == y
+    return matched / filled if filled else 0.0
+
+
+class ChunkDeduper:
+    """
+    Near-duplicate filter over chunk texts (one pass). stats reports
+    what was dropped or merged and the tokens saved.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        mode: str = DEDUP_MODE,
+        shingle_words: int = DEDUP_SHINGLE_WORDS,
+        bins: int = DEDUP_BINS,
+        bands: int = DEDUP_BANDS,
+        max_tokens: int = CHUNK_MAX_TOKENS
+    ):
+        if mode not in ("merge", "drop", "contained"):
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        if bins % bands:
+            raise ValueError("DEDUP_BINS must be a multiple of DEDUP_BANDS")
+
+        self.threshold = threshold
+        self.mode = mode
+        self.shingle_words = shingle_words
+        self.bins = bins
+        self.bands = bands
+        self.rows = bins // bands
+        self.max_tokens = max_tokens
+
+        self.signatures = []  # per kept chunk
+        self.buckets = defaultdict(list)  # (band, rows) → kept chunk ids
+        self.stats = {
+            "chunks_in": 0,
+            "chunks_out": 0,
+            "dropped": 0,
+            "merged": 0,
+            "truncated_sentences": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+        }
+
+    def _bands(self, sig: tuple):
+        for band in range(self.bands):
+            rows = sig[band * self.rows:(band + 1) * self.rows]
+            if any(v is not None for v in rows):
+                yield band, rows
+
+    def _match(self, sig: tuple) -> int | None:
+        """
+        Kept chunk id this signature near-duplicates, if any.
+        """
+        seen = set()
+        best, best_score = None, self.threshold
+        for key in self._bands(sig):
+            for kept in self.buckets.get(key, ()):
+                if kept in seen:
+                    continue
+                seen.add(kept)
+                score = similarity(sig, self.signatures[kept])
+                if score >= best_score:
+                    best, best_score = kept, score
+        return best
+
+    def _keep(self, sig: tuple) -> int:
+        kept = len(self.signatures)
+        self.signatures.append(sig)
+        for key in self._bands(sig):
+            self.buckets[key].append(kept)
+        return kept
+
+    def _merge(self, base: str, duplicate: str) -> str:
+        """
+        base plus the sentences of duplicate it does not already
+        (nearly) contain, up to the chunk budget; novel sentences past
+        it are dropped and counted in stats["truncated_sentences"].
+        """
+        known = set(shingles(base, self.shingle_words))
+        tokens = count_tokens(base)
+        novel = []
+        full = False
+        for sentence in SENTENCE_SPLIT.split(duplicate):
+            parts = list(shingles(sentence, self.shingle_words))
+            if parts and sum(p in known for p in parts) / len(parts) < self.threshold:
+                cost = count_tokens(sentence)
+                full = full or tokens + cost > self.max_tokens
+                if full:
+                    self.stats["truncated_sentences"] += 1
+                    continue
+                novel.append(sentence.strip())
+                tokens += cost
+        return " ".join([base, *novel]) if novel else base
+
+    def _contained(self, base: str, duplicate: str) -> bool:
+        known = set(shingles(base, self.shingle_words))
+        return all(s in known for s in shingles(duplicate, self.shingle_words))
+
+    def dedupe(self, texts: Iterable[str]) -> list[tuple[int, str]]:
+        """
+        [(input index, text)] of the chunks to keep, in input order.
+        In merge mode a kept text may have grown by a duplicate's novel
+        sentences.
+        """
+        kept = []  # [input index, text] per kept chunk id
+
+        for index, text in enumerate(texts):
+            self.stats["chunks_in"] += 1
+            self.stats["tokens_in"] += count_tokens(text)
+
+            sig = signature(text, self.shingle_words, self.bins)
+            match = self._match(sig)
+
+            if match is None or (
+                self.mode == "contained" and not self._contained(kept[match][1], text)
+            ):
+                self._keep(sig)
+                kept.append([index, text])
+                continue
+
+            if self.mode == "merge":
+                merged = self._merge(kept[match][1], text)
+                if merged != kept[match][1]:
+                    kept[match][1] = merged
+                    self.stats["merged"] += 1
+                    continue
+            self.stats["dropped"] += 1
+
+        for _, text in kept:
+            self.stats["chunks_out"] += 1
+            self.stats["tokens_out"] += count_tokens(text)
+
+        return [(index, text) for index, text in kept]
+
+    def report(self) -> dict:
+        stats = dict(self.stats)
+        stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+        return stats
@@ -0,0 +1,61 @@
+import logging
+import os
+
+from tts.audio_generator import script_to_audio
+from tts.whisper_pool import WhisperPoolBusy
+from worker.queue import get_queue, NoWorkers, TaskFailed, PRIORITY_HIGH
+
+logger = logging.getLogger(__name__)
+
+# "queue"  → TTS / alignment / video run in worker processes (worker/runner.py)
+# "inline" → TTS + alignment in the request, video as a BackgroundTask
+JOB_QUEUE_MODE = os.getenv("JOB_QUEUE_MODE", "queue")
+AUDIO_STAGE_TIMEOUT = float(os.getenv("AUDIO_STAGE_TIMEOUT", 600))
+
+
+def produce_audio(job, script: str) -> dict:
+    """
+    TTS → alignment, in worker processes when the queue is enabled.
+
+    Raises NoWorkers right away if no live worker serves a stage,
+    TimeoutError / TaskFailed if a stage does not finish.
+    """
+    if JOB_QUEUE_MODE != "queue":
+        return script_to_audio(
+            script,
+            audio_dir=str(job.audio),
+            meta_dir=str(job.meta)
+        )
+
+    queue = get_queue()
+    queue.require_workers("tts", "align")
+
+    synth = _run_stage(
+        queue, job, "tts",
+        {"script": script, "audio_dir": str(job.audio)}
+    )
+    return _run_stage(
+        queue, job, "align",
+        {"synth": synth, "meta_dir": str(job.meta)}
+    )
+
+
+def _run_stage(queue, job, stage: str, payload: dict) -> dict:
+    task_id = queue.enqueue(job.job_id, stage, payload, priority=PRIORITY_HIGH)
+    try:
+        return queue.wait(task_id, timeout=AUDIO_STAGE_TIMEOUT)["result"]
+    except TimeoutError:
+        # Nobody will read the result: don't let a worker pick it up later
+        queue.cancel(task_id)
+        raise
+
+
+def audio_error_status(error: Exception) -> int | None:
+    """
+    HTTP status for an expected audio failure (None: unexpected, re-raise).
+    """
+    if isinstance(error, TimeoutError):
+        return 504
+    if isinstance(error, (NoWorkers, TaskFailed, WhisperPoolBusy)):
+        return 503
+    return None
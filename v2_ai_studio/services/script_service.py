@@ -1,33 +1,171 @@
-from loaders.pdf_loader import load_pdf
-from loaders.ppt_loader import load_ppt
-from processing.cleaner import clean_text
-from processing.chunker import chunk_text
-from llm.script_generator import generate_slidewise_script
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Iterator
 
+from loaders.pdf_loader import iter_pdf_pages
+from loaders.ppt_loader import iter_ppt_slides
+from processing import chunker, cleaner, dedup
+from processing.cleaner import PageCleaner, clean_text
+from processing.chunker import stream_chunks
+from processing.dedup import DEDUP_ENABLED, ChunkDeduper
+from utils.disk_cache import DiskCache, hash_key
+from utils.tracing import atimed, span, timed, traced
+from llm.script_generator import (
+    generate_slidewise_script,
+    agenerate_slidewise_script,
+    stream_slidewise_script,
+    astream_slidewise_script,
+)
 
-def generate_script_from_file(
+logger = logging.getLogger(__name__)
+
+# ---------------- PREPARED SLIDES CACHE ----------------
+# Uploads carry the SHA-256 of their content (utils/uploads.py). The
+# same document uploaded again skips load → clean → chunk → dedup; the
+# key also covers every setting those stages read.
+
+PREPARED_CACHE_DIR = os.getenv("PREPARED_CACHE_DIR", "cache/prepared")
+PREPARED_CACHE_MAX_MB = int(os.getenv("PREPARED_CACHE_MAX_MB", 64))
+PREPARED_CACHE_VERSION = 1  # bump when preparation output changes
+
+prepared_cache = DiskCache(
+    PREPARED_CACHE_DIR,
+    max_bytes=PREPARED_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".json"
+)
+
+
+def _prepared_key(content_hash: str, file_path: str, pages: range | None) -> str:
+    return hash_key(
+        "prepared",
+        PREPARED_CACHE_VERSION,
+        content_hash,
+        os.path.splitext(file_path)[1].lower(),
+        [pages.start, pages.stop, pages.step] if pages else None,
+        [chunker.CHUNK_MAX_TOKENS, chunker.CHUNK_OVERLAP_TOKENS, chunker.CHUNK_MIN_FILL],
+        [cleaner.CLEAN_EDGE_LINES, cleaner.CLEAN_MIN_REPEATS, cleaner.CLEAN_MIN_SHARE,
+         cleaner.CLEAN_LOOKAHEAD_PAGES],
+        [dedup.DEDUP_ENABLED, dedup.DEDUP_MODE, dedup.DEDUP_THRESHOLD,
+         dedup.DEDUP_SHINGLE_WORDS, dedup.DEDUP_BINS, dedup.DEDUP_BANDS],
+    )
+
+
+def iter_document_pages(
     file_path: str,
-    tone: str = "educational"
-) -> str:
-    # 1️⃣ Load document
+    pages: range | None = None
+) -> Iterator[str]:
+    """
+    Yields raw page texts as the loader produces them
+    (one "page" per slide for PPTX).
+    """
     if file_path.lower().endswith(".pdf"):
-        raw_text = load_pdf(file_path)
+        for _, page_text in iter_pdf_pages(file_path, pages=pages):
+            yield page_text
     elif file_path.lower().endswith(".pptx"):
-        raw_text = load_ppt(file_path)
+        for record in iter_ppt_slides(file_path):
+            yield slide_text(record)
     else:
         raise ValueError("Unsupported file format")
 
-    if not raw_text.strip():
+
+def slide_text(record: dict) -> str:
+    parts = [record["title"], record["body"]]
+    if record["notes"]:
+        parts.append(f"Speaker notes: {record['notes']}")
+    return "\n".join(p for p in parts if p)
+
+
+def prepare_ppt_slides(file_path: str) -> list[dict]:
+    """
+    PPTX keeps its real slide boundaries: one script slide per deck slide,
+    carrying the record (title, notes, hash) so unchanged slides can reuse
+    their cached script section.
+    """
+    slides = []
+
+    # No cross-slide line stripping here: slide bodies are too short to
+    # tell a footer from a repeated bullet, and the loader already skips
+    # footer / slide-number / date placeholders
+    for record in timed(iter_ppt_slides(file_path), "extract"):
+        text = slide_text(record)
+        if not text.strip():
+            continue
+
+        slides.append({
+            "slide": record["index"] + 1,
+            "content": clean_text(text),
+            "title": record["title"],
+            "notes": record["notes"],
+            "hash": record["hash"]
+        })
+
+    if not slides:
         raise ValueError("No readable text found in file")
 
-    # 2️⃣ Clean + chunk
-    cleaned_text = clean_text(raw_text)
-    chunks = list(chunk_text(cleaned_text))
+    # Repeated agenda / recap slides are narrated once. Merging would
+    # change a slide's content under its cached hash, and a progressive
+    # build slide (previous slide + one bullet) must keep its new bullet:
+    # only slides that add nothing to the one they repeat are dropped.
+    if DEDUP_ENABLED:
+        deduper = ChunkDeduper(mode="contained")
+        with span("dedup"):
+            kept = deduper.dedupe(s["content"] for s in slides)
+        slides = [slides[index] for index, _ in kept]
+        logger.info("PPTX dedup: %s", deduper.report())
+
+    return slides
+
+
+@traced("prepare")
+def prepare_slides(
+    file_path: str,
+    pages: range | None = None,
+    content_hash: str | None = None
+) -> list[dict]:
+    """
+    Load → clean → chunk → dedup → slide-wise structure (CPU / disk bound).
+    With the upload's content_hash, a document seen before is served
+    from the prepared slides cache.
+    """
+    if content_hash is None:
+        return _prepare_slides(file_path, pages)
+
+    key = _prepared_key(content_hash, file_path, pages)
+    slides = prepared_cache.get_json(key)
+    if slides is None:
+        slides = _prepare_slides(file_path, pages)
+        prepared_cache.put_json(key, slides)
+    return slides
+
+
+def _prepare_slides(file_path: str, pages: range | None) -> list[dict]:
+    if file_path.lower().endswith(".pptx"):
+        return prepare_ppt_slides(file_path)
+
+    # 1️⃣ Load + clean page by page (cleaning overlaps extraction);
+    # running headers / footers are stripped before they reach a prompt
+    cleaner = PageCleaner()
+    cleaned_pages = cleaner.clean(
+        timed(iter_document_pages(file_path, pages=pages), "extract")
+    )
+
+    # 2️⃣ Chunk to the token budget while pages stream in
+    chunks = [text for _, _, text in stream_chunks(cleaned_pages)]
 
     if not chunks:
-        raise ValueError("No meaningful content after processing")
+        raise ValueError("No readable text found in file")
+
+    logger.info("PDF cleaning: %s", cleaner.report())
+
+    # 3️⃣ Near-duplicate chunks are dropped or merged before any prompt
+    if DEDUP_ENABLED:
+        deduper = ChunkDeduper()
+        with span("dedup"):
+            chunks = [text for _, text in deduper.dedupe(chunks)]
+        logger.info("PDF dedup: %s", deduper.report())
 
-    # 3️⃣ Convert chunks → slide-wise structure
+    # 4️⃣ Convert chunks → slide-wise structure
     slides = [
         {
             "slide": idx + 1,
@@ -36,4 +174,55 @@ def generate_script_from_file(
         for idx, chunk in enumerate(chunks, start=1)
     ]
 
-    return generate_slidewise_script(slides, tone=tone)
\ No newline at end of file
+    return slides
+
+
+def generate_script_from_file(
+    file_path: str,
+    tone: str = "educational",
+    pages: range | None = None,
+    content_hash: str | None = None
+) -> str:
+    slides = prepare_slides(file_path, pages=pages, content_hash=content_hash)
+    with span("script"):
+        return generate_slidewise_script(slides, tone=tone)
+
+
+async def agenerate_script_from_file(
+    file_path: str,
+    tone: str = "educational",
+    pages: range | None = None,
+    content_hash: str | None = None
+) -> str:
+    """
+    Event-loop friendly variant: extraction runs in a worker thread,
+    the LLM call uses the async client.
+    """
+    slides = await asyncio.to_thread(prepare_slides, file_path, pages, content_hash)
+    with span("script"):
+        return await agenerate_slidewise_script(slides, tone=tone)
+
+
+def stream_script_from_file(
+    file_path: str,
+    tone: str = "educational",
+    pages: range | None = None,
+    content_hash: str | None = None
+) -> Iterator[dict]:
+    """
+    Yields {title, text, slide_index} per script slide as it completes.
+    """
+    slides = prepare_slides(file_path, pages=pages, content_hash=content_hash)
+    # Only time spent producing slides counts, not the caller's work between them
+    yield from timed(stream_slidewise_script(slides, tone=tone), "script")
+
+
+async def astream_script_from_file(
+    file_path: str,
+    tone: str = "educational",
+    pages: range | None = None,
+    content_hash: str | None = None
+) -> AsyncIterator[dict]:
+    slides = await asyncio.to_thread(prepare_slides, file_path, pages, content_hash)
+    async for slide in atimed(astream_slidewise_script(slides, tone=tone), "script"):
+        yield slide
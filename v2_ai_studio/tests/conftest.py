@@ -0,0 +1,60 @@
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Modules import each other top-level (llm.*, diagram.*) from the project root
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Env is read at import: no real key, no caches shared with a dev server
+os.environ.setdefault("GROQ_API_KEY", "test")
+_scratch = tempfile.mkdtemp(prefix="ai_studio_tests_")
+for var, sub in (
+    ("LLM_CACHE_DIR", "llm"),
+    ("KEYWORD_CACHE_DIR", "keywords"),
+    ("SECTION_CACHE_DIR", "sections"),
+    ("FRAME_CACHE_DIR", "frames"),
+    ("PREPARED_CACHE_DIR", "prepared"),
+):
+    os.environ.setdefault(var, os.path.join(_scratch, sub))
+
+
+# ---------------- TEXT BUILDERS ----------------
+# Deterministic prose for the processing tests. Owned by the tests (not
+# benchmarks/synthetic.py) so a benchmark change never changes what they
+# check.
+
+SUBJECTS = [
+    "ingestion service", "feature store", "training cluster", "model registry",
+    "inference gateway", "monitoring stack", "message queue", "data lake",
+    "vector index", "batch scheduler", "API gateway", "cache layer",
+]
+VERBS = ["feeds", "reads from", "publishes to", "is monitored by", "scales with", "stores data in"]
+MODIFIERS = [
+    "under peak load", "for every tenant", "with at-least-once delivery",
+    "behind a load balancer", "in near real time", "once per hour",
+]
+
+
+class TextBuilder:
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def sentence(self) -> str:
+        a, b = self.rng.sample(SUBJECTS, 2)
+        return f"The {a} {self.rng.choice(VERBS)} the {b} {self.rng.choice(MODIFIERS)}."
+
+    def paragraph(self, sentences: int) -> str:
+        return " ".join(self.sentence() for _ in range(sentences))
+
+
+@pytest.fixture
+def text():
+    """
+    TextBuilder factory: text(seed).paragraph(n)
+    """
+    return TextBuilder
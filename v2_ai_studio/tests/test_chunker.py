@@ -0,0 +1,93 @@
+import pytest
+
+from processing.chunker import (
+    chunk_spans,
+    chunk_text,
+    count_tokens,
+    stream_chunks,
+)
+
+
+def _document(text, seed: int = 0, paragraphs: int = 30, sentences: tuple = (2, 8)) -> list[str]:
+    builder = text(seed)
+    return [builder.paragraph(builder.rng.randint(*sentences)) for _ in range(paragraphs)]
+
+
+# ---------------- BUDGET CHECKS ----------------
+
+@pytest.mark.parametrize("overlap", [100, 200])
+def test_overlap_not_below_budget_is_rejected(overlap):
+    with pytest.raises(ValueError):
+        list(chunk_spans("a " * 1000, 100, overlap))
+    with pytest.raises(ValueError):
+        list(stream_chunks(["a " * 1000], 100, overlap))
+
+
+def test_chunk_text_rejects_overlap_not_below_max_words():
+    with pytest.raises(ValueError):
+        list(chunk_text("word " * 1000, max_words=100, overlap=100))
+
+
+def test_chunks_fit_the_budget(text):
+    doc = "\n\n".join(_document(text))
+    spans = list(chunk_spans(doc, 120))
+
+    assert len(spans) > 1
+    assert all(count_tokens(doc, start, end) <= 120 for start, end in spans)
+
+
+# ---------------- BOUNDARIES ----------------
+
+def test_prefers_paragraph_boundaries(text):
+    # Paragraphs well under half the budget: a paragraph break is always
+    # available past the minimum fill
+    doc = "\n\n".join(_document(text, sentences=(1, 3)))
+    spans = list(chunk_spans(doc, 150))
+
+    # Every cut but the last lands on a paragraph break
+    for _, end in spans[:-1]:
+        assert doc[end:end + 2] == "\n\n"
+
+
+def test_falls_back_to_sentence_boundaries(text):
+    # One paragraph, many sentences: cuts land after a full stop
+    doc = " ".join(_document(text, paragraphs=5))
+    spans = list(chunk_spans(doc, 80))
+
+    assert len(spans) > 1
+    for _, end in spans[:-1]:
+        assert doc[end - 1] == "."
+
+
+def test_falls_back_to_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(500))
+    spans = list(chunk_spans(text, 50))
+
+    assert len(spans) > 1
+    for start, end in spans:
+        assert text[start] != " " and text[end - 1] != " "
+        assert end == len(text) or text[end] == " "
+
+
+def test_overlap_repeats_the_tail(text):
+    doc = "\n\n".join(_document(text))
+    spans = list(chunk_spans(doc, 150, 40))
+
+    for (_, end), (next_start, _) in zip(spans, spans[1:]):
+        assert next_start < end
+        assert count_tokens(doc, next_start, end) <= 40
+
+
+# ---------------- STREAMING ----------------
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("overlap", [0, 30])
+def test_stream_equals_whole_document(text, seed, overlap):
+    pages = _document(text, seed)
+    doc = "\n\n".join(pages)
+
+    whole = [(start, end) for start, end in chunk_spans(doc, 120, overlap)]
+    streamed = list(stream_chunks(pages, 120, overlap))
+
+    assert [(start, end) for start, end, _ in streamed] == whole
+    assert all(doc[start:end] == chunk for start, end, chunk in streamed)
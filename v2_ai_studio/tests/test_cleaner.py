@@ -0,0 +1,99 @@
+from pptx import Presentation
+
+from processing.cleaner import PageCleaner, line_key
+
+
+def _clean(pages: list[str], **kwargs) -> list[str]:
+    return list(PageCleaner(**kwargs).clean(pages, keep_empty=True))
+
+
+def _words(texts: list[str]) -> list[list[str]]:
+    # Cleaning also folds single newlines into spaces
+    return [t.split() for t in texts]
+
+
+def _page(n: int, total: int, builder, body_lines: int = 12) -> str:
+    body = [builder.sentence() for _ in range(body_lines)]
+    return "\n".join([
+        "Synthetic Systems Handbook",
+        *body,
+        "Confidential - internal use only",
+        f"Page {n} of {total}",
+    ])
+
+
+# ---------------- KEEPS CONTENT ----------------
+
+def test_short_pages_are_left_alone():
+    bodies = [f"Step {i}: configure the cluster\nRun kubectl apply" for i in range(4)]
+    assert _words(_clean(bodies)) == _words(bodies)
+
+
+def test_single_line_pages_are_left_alone():
+    bodies = ["Python", "Python", "Python", "Java"]
+    assert _clean(bodies) == bodies
+
+
+def test_numbered_template_lines_are_content():
+    # Numbers other than page numbers / dates are not folded: "Step 3"
+    # and "Step 4" are different lines
+    pages = [
+        "\n".join(f"Step {page * 10 + i}: configure node {page}-{i}" for i in range(10))
+        for page in range(10)
+    ]
+    assert _words(_clean(pages)) == _words(pages)
+
+
+def test_line_on_a_small_share_of_pages_is_kept(text):
+    builder = text(0)
+    pages = [
+        "\n".join(
+            (["Appendix A"] if n < 3 else [])
+            + [builder.sentence() for _ in range(10)]
+        )
+        for n in range(20)
+    ]
+    cleaned = _clean(pages)
+
+    assert sum("Appendix A" in text for text in cleaned) == 3
+
+
+# ---------------- STRIPS BOILERPLATE ----------------
+
+def test_running_header_and_footer_are_stripped(text):
+    builder = text(1)
+    pages = [_page(n, 12, builder) for n in range(1, 13)]
+    cleaned = _clean(pages)
+
+    for page, text in zip(pages, cleaned):
+        assert "Synthetic Systems Handbook" not in text
+        assert "Confidential" not in text
+        assert "Page " not in text
+        # The whole body survives
+        for line in page.splitlines()[1:-2]:
+            assert line in text
+
+
+def test_page_numbers_and_dates_fold_to_one_key():
+    assert line_key("Page 3 of 10", "bottom") == line_key("Page 4 of 10", "bottom")
+    assert line_key("Report 2024-05-01", "top") == line_key("Report 2024-06-01", "top")
+    assert line_key("Step 3: configure", "top") != line_key("Step 4: configure", "top")
+
+
+# ---------------- PPTX ----------------
+
+def test_pptx_bodies_are_not_cross_slide_cleaned(tmp_path):
+    from services.script_service import prepare_ppt_slides
+
+    prs = Presentation()
+    for i, title in enumerate(["Setup", "Deploy", "Scale", "Monitor"]):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = title
+        slide.placeholders[1].text = f"Step {i}: configure the cluster\nRun kubectl apply"
+    path = tmp_path / "deck.pptx"
+    prs.save(path)
+
+    slides = prepare_ppt_slides(str(path))
+
+    assert len(slides) == 4
+    assert all("Run kubectl apply" in s["content"] for s in slides)
@@ -0,0 +1,71 @@
+from processing.chunker import count_tokens
+from processing.dedup import ChunkDeduper
+
+
+def _chunks(text, seed: int = 0, count: int = 6) -> list[str]:
+    builder = text(seed)
+    return [builder.paragraph(8) for _ in range(count)]
+
+
+def test_drop_is_the_default_and_keeps_order(text):
+    chunks = _chunks(text)
+    texts = chunks + [chunks[1], chunks[3] + " An extra closing sentence here."]
+
+    kept = ChunkDeduper().dedupe(texts)
+
+    assert [index for index, _ in kept] == list(range(len(chunks)))
+    assert [text for _, text in kept] == chunks
+
+
+def test_merge_stays_within_the_chunk_budget(text):
+    base = _chunks(text, 1, 1)[0]
+    extra = ". ".join(_chunks(text, 2, 1)[0].split(". ")[:6]) + "."
+    # Near-duplicate: the base plus several new sentences
+    duplicate = base + " " + extra
+    budget = count_tokens(base) + count_tokens(extra) // 2
+
+    deduper = ChunkDeduper(mode="merge", threshold=0.5, max_tokens=budget)
+    kept = deduper.dedupe([base, duplicate])
+
+    assert len(kept) == 1
+    merged = kept[0][1]
+    assert merged.startswith(base) and merged != base
+    assert count_tokens(merged) <= budget
+
+
+BASE = (
+    "Gradient descent updates the weights in the direction that lowers the loss. "
+    "The learning rate controls how large each update step is. "
+    "Too large a rate makes training diverge, too small a rate makes it crawl. "
+    "Momentum smooths the updates by averaging recent gradients together."
+)
+FIRST = "Adam keeps a running estimate of the second moment for every parameter."
+SECOND = "Weight decay pulls every weight slightly toward zero after each step."
+
+
+def test_merge_at_the_budget_boundary_counts_truncated_sentences():
+    budget = count_tokens(BASE) + count_tokens(FIRST)
+    deduper = ChunkDeduper(mode="merge", threshold=0.5, max_tokens=budget)
+
+    kept = deduper.dedupe([BASE, f"{BASE} {FIRST} {SECOND}"])
+
+    assert kept == [(0, f"{BASE} {FIRST}")]
+    assert count_tokens(kept[0][1]) == budget
+    assert deduper.report()["truncated_sentences"] == 1
+
+
+def test_contained_keeps_progressive_build_slides():
+    bullets = [
+        "Collect the raw training data from every source system",
+        "Clean and label the examples before any training run",
+        "Train the baseline model and record its validation score",
+        "Compare every new model against the recorded baseline",
+    ]
+    slides = ["\n".join(bullets[:n]) for n in range(2, len(bullets) + 1)]
+    recap = slides[-1]
+
+    deduper = ChunkDeduper(mode="contained", threshold=0.5)
+    kept = deduper.dedupe(slides + [recap])
+
+    assert [index for index, _ in kept] == [0, 1, 2]
+    assert deduper.report()["dropped"] == 1
@@ -0,0 +1,69 @@
+import os
+import time
+
+from utils.disk_cache import DiskCache, hash_key
+
+
+def _age(cache, key, seconds):
+    path = cache.path_for(key)
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_put_and_get(tmp_path):
+    cache = DiskCache(tmp_path)
+    key = hash_key("prompt", 1)
+
+    assert cache.get_json(key) is None
+    cache.put_json(key, {"answer": 42})
+    cache.put_bytes(hash_key("raw"), b"abc")
+
+    assert cache.get_json(key) == {"answer": 42}
+    assert cache.get_bytes(hash_key("raw")) == b"abc"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    keys = [hash_key(i) for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put_bytes(key, b"x" * 100)
+        _age(cache, key, age)
+
+    # A hit makes the oldest entry the most recent one
+    assert cache.get_path(keys[0])
+    cache.put_bytes(hash_key("new"), b"x" * 100)
+
+    assert cache.get_path(keys[1]) is None
+    assert all(cache.get_path(k) for k in (keys[0], keys[2], hash_key("new")))
+    assert cache.stats()["bytes"] == 300
+
+
+def test_overwrite_counts_the_key_once(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=250)
+    cache.evict()  # size known from here on
+    key, other = hash_key("a"), hash_key("b")
+
+    cache.put_bytes(key, b"x" * 100)
+    cache.put_bytes(key, b"y" * 120)
+    assert cache.stats()["bytes"] == 120
+
+    # Would have crossed max_bytes with the old entry counted twice
+    cache.put_bytes(other, b"z" * 100)
+    assert cache.stats()["bytes"] == 220
+    assert cache.stats()["evictions"] == 0
+    assert cache.get_bytes(key) == b"y" * 120
+
+
+def test_put_file_overwrite(tmp_path):
+    cache = DiskCache(tmp_path / "cache", max_bytes=1000)
+    cache.evict()
+    key = hash_key("frame")
+    for size in (300, 200):
+        src = tmp_path / f"frame_{size}.png"
+        src.write_bytes(b"p" * size)
+        cache.put_file(key, src, keep=True)
+
+    assert cache.stats()["bytes"] == 200
+    assert src.exists()
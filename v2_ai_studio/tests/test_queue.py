@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+import worker.runner as runner
+from worker.queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.sqlite3"))
+
+
+def _age(queue, task_id, seconds):
+    with closing(queue._connect()) as conn:
+        conn.execute(
+            "UPDATE tasks SET updated_at = updated_at - ? WHERE id = ?",
+            (seconds, task_id)
+        )
+
+
+def test_stale_task_is_requeued_until_max_attempts(queue):
+    task_id = queue.enqueue("job", "tts", {}, max_attempts=2)
+
+    for attempt in (1, 2):
+        assert queue.claim("tts", "w1")["attempts"] == attempt
+        _age(queue, task_id, 3600)
+        queue.requeue_stale(max_age=60)
+
+    task = queue.get(task_id)
+    assert task["status"] == "failed"
+    assert task["error"]
+
+
+def test_requeue_counts_only_requeued(queue):
+    retried = queue.enqueue("job", "tts", {}, max_attempts=3)
+    exhausted = queue.enqueue("job", "tts", {}, max_attempts=1)
+    queue.claim("tts", "w1")
+    queue.claim("tts", "w1")
+    _age(queue, retried, 3600)
+    _age(queue, exhausted, 3600)
+
+    assert queue.requeue_stale(max_age=60) == 1
+    assert queue.get(retried)["status"] == "queued"
+    assert queue.get(exhausted)["status"] == "failed"
+
+
+def test_requeued_worker_cannot_overwrite_new_owner(queue):
+    task_id = queue.enqueue("job", "tts", {})
+    queue.claim("tts", "w1")
+    _age(queue, task_id, 3600)
+    queue.requeue_stale(max_age=60)
+    queue.claim("tts", "w2")
+
+    assert not queue.complete(task_id, {"by": "w1"}, "w1")
+    assert not queue.fail(task_id, "late", "w1")
+    assert queue.complete(task_id, {"by": "w2"}, "w2")
+
+    task = queue.get(task_id)
+    assert task["status"] == "done"
+    assert task["result"] == {"by": "w2"}
+
+
+def test_slots_run_tasks_concurrently(queue, monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def stage(payload):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.3)
+        with lock:
+            active[0] -= 1
+        return {"n": payload["n"]}
+
+    monkeypatch.setitem(runner.STAGES, "tts", stage)
+    monkeypatch.setattr(runner, "_stop", False)
+    ids = [queue.enqueue("job", "tts", {"n": n}) for n in range(4)]
+
+    def stop_when_done():
+        while not all(queue.get(i)["status"] == "done" for i in ids):
+            time.sleep(0.05)
+        runner._request_stop(None, None)
+
+    threading.Thread(target=stop_when_done, daemon=True).start()
+    runner._serve(queue, "w1", ["tts"], 0.05, 4, set())
+
+    assert peak[0] == 4
+    assert [queue.get(i)["result"] for i in ids] == [{"n": n} for n in range(4)]
+
+
+def test_worker_stats_come_from_live_workers(queue):
+    queue.heartbeat("w1", ["tts", "align"], stats={"whisper": {"loaded": True}})
+    queue.heartbeat("w2", ["video"])
+    assert queue.worker_stats() == {"w1": {"whisper": {"loaded": True}}}
+
+    queue.unregister("w1")
+    assert queue.worker_stats() == {}
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+
+import pytest
+from groq import AsyncGroq, Groq
+
+import llm.groq_client as groq_client
+from benchmarks.mock_groq import start_server
+from llm.scheduler import LLMScheduler, TokenBucket
+
+
+@pytest.fixture
+def mock_groq(monkeypatch):
+    """
+    Points groq_client at a fresh mock server and a fresh scheduler.
+    Returns start(**server_kwargs, scheduler=...) → (counters, scheduler).
+    """
+    servers = []
+
+    def start(scheduler: LLMScheduler | None = None, **kwargs):
+        kwargs.setdefault("latency", 0.0)
+        kwargs.setdefault("injected_retry_after", 0.01)
+        server, counters = start_server(**kwargs)
+        servers.append(server)
+
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        scheduler = scheduler or LLMScheduler(rpm=0, tpm=0)
+        monkeypatch.setattr(groq_client, "client", Groq(api_key="mock", base_url=base_url, max_retries=0))
+        monkeypatch.setattr(groq_client, "async_client", AsyncGroq(api_key="mock", base_url=base_url, max_retries=0))
+        monkeypatch.setattr(groq_client, "scheduler", scheduler)
+        monkeypatch.setattr(groq_client, "GROQ_BACKOFF_SECONDS", 0.01)
+        return counters, scheduler
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+
+
+# ---------------- BUCKETS ----------------
+
+def test_resize_enables_an_unlimited_bucket_full():
+    bucket = TokenBucket(0)
+    assert not bucket.enabled
+
+    bucket.resize(30000, time.monotonic())
+    assert bucket.enabled
+    assert bucket.capacity == bucket.level == 30000
+
+
+def test_resize_never_raises_the_level():
+    now = time.monotonic()
+    bucket = TokenBucket(6000)
+    bucket.take(5000, now)
+
+    bucket.resize(30000, now)
+    assert bucket.capacity == 30000
+    assert bucket.level == pytest.approx(1000, abs=5)
+
+
+def test_limit_header_sets_token_capacity():
+    scheduler = LLMScheduler(rpm=0, tpm=0)
+    scheduler.observe_headers({
+        "x-ratelimit-limit-tokens": "250000",
+        "x-ratelimit-remaining-tokens": "249000",
+    })
+    assert scheduler.tokens.capacity == 250000
+    assert scheduler.tokens.level == pytest.approx(249000, abs=5)
+
+
+def test_configured_tpm_is_a_ceiling():
+    scheduler = LLMScheduler(rpm=0, tpm=5000)
+    scheduler.observe_headers({"x-ratelimit-limit-tokens": "250000"})
+    assert scheduler.tokens.capacity == 5000
+
+
+def test_requests_limit_header_is_not_a_per_minute_limit():
+    # Groq reports requests per DAY in x-ratelimit-limit-requests
+    scheduler = LLMScheduler(rpm=0, tpm=0)
+    scheduler.observe_headers({"x-ratelimit-limit-requests": "14400"})
+    assert not scheduler.requests.enabled
+
+
+# ---------------- AGAINST THE MOCK ----------------
+
+def test_capacity_follows_the_server(mock_groq):
+    counters, scheduler = mock_groq(rpm=0, tpm=100000)
+
+    assert groq_client.generate("hello", use_cache=False) == "mock completion"
+    assert scheduler.tokens.capacity == 100000
+
+
+def test_injected_429s_are_retried(mock_groq, monkeypatch):
+    random.seed(7)
+    monkeypatch.setattr(groq_client, "GROQ_MAX_RETRIES", 30)
+    counters, scheduler = mock_groq(rpm=0, tpm=0, fail_rate=0.5)
+
+    answers = [groq_client.generate(f"prompt {i}", use_cache=False) for i in range(10)]
+
+    assert answers == ["mock completion"] * 10
+    assert counters["rate_limited"] > 0
+    assert scheduler.counters["rate_limited"] == counters["rate_limited"]
+    assert scheduler.counters["admitted"] == counters["requests"]
+
+
+def test_injected_429s_are_retried_async(mock_groq, monkeypatch):
+    random.seed(11)
+    monkeypatch.setattr(groq_client, "GROQ_MAX_RETRIES", 30)
+    counters, scheduler = mock_groq(rpm=0, tpm=0, fail_rate=0.5)
+
+    async def run():
+        return await asyncio.gather(*(
+            groq_client.agenerate(f"prompt {i}", use_cache=False) for i in range(8)
+        ))
+
+    assert asyncio.run(run()) == ["mock completion"] * 8
+    assert counters["rate_limited"] > 0
+    assert scheduler.counters["rate_limited"] == counters["rate_limited"]
+
+
+def test_exhausted_window_pauses_before_the_429(mock_groq):
+    # 2 requests per 1 s window: the third call must wait for the reset
+    # announced in the headers instead of hitting the limit
+    counters, scheduler = mock_groq(rpm=2, tpm=0, window=1.0)
+
+    started = time.monotonic()
+    for i in range(3):
+        assert groq_client.generate(f"prompt {i}", use_cache=False) == "mock completion"
+
+    assert time.monotonic() - started >= 0.8
+    assert counters["rate_limited"] == 0
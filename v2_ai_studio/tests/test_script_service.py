@@ -0,0 +1,24 @@
+from pptx import Presentation
+
+from services.script_service import prepare_slides
+
+
+def _deck(path, titles):
+    prs = Presentation()
+    for title in titles:
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = title
+        slide.placeholders[1].text = f"{title} keeps the training pipeline reproducible"
+    prs.save(path)
+    return str(path)
+
+
+def test_same_upload_hash_reuses_prepared_slides(tmp_path):
+    path = _deck(tmp_path / "deck.pptx", ["Setup", "Deploy", "Scale"])
+    first = prepare_slides(path, content_hash="a" * 64)
+
+    # A different file under the same content hash is never read
+    other = _deck(tmp_path / "other.pptx", ["Monitor"])
+    assert prepare_slides(other, content_hash="a" * 64) == first
+    assert len(prepare_slides(other, content_hash="b" * 64)) == 1
+    assert len(prepare_slides(other)) == 1
@@ -0,0 +1,148 @@
+import httpx
+import pytest
+from groq import BadRequestError
+
+import llm.structured as structured
+from llm.diagram_planner import PLAN_SCHEMA
+from llm.structured import extract_json, generate_json, validate
+
+
+def _bad_request(body: dict) -> BadRequestError:
+    response = httpx.Response(400, request=httpx.Request("POST", "http://test"))
+    return BadRequestError(f"Error code: 400 - {body}", response=response, body=body)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    state = {"error": None}
+
+    def generate(prompt, **kwargs):
+        if "response_format" in kwargs:
+            raise state["error"]
+        return '{"ok": true}'
+
+    monkeypatch.setattr(structured, "generate", generate)
+    monkeypatch.setattr(structured, "_json_mode_available", True)
+    return state
+
+
+def test_unrelated_bad_request_keeps_json_mode(backend):
+    backend["error"] = _bad_request({"error": {
+        "message": "Please reduce the length of the messages",
+        "code": "context_length_exceeded",
+    }})
+    with pytest.raises(BadRequestError):
+        structured._ask("prompt", json_mode=True)
+    assert structured._json_mode_available
+
+
+def test_unsupported_response_format_disables_json_mode(backend):
+    backend["error"] = _bad_request({"error": {
+        "message": "response_format `json_object` is not supported with this model",
+        "param": "response_format",
+    }})
+    assert structured._ask("prompt", json_mode=True) == '{"ok": true}'
+    assert not structured._json_mode_available
+
+
+def test_failed_generation_is_returned_for_repair(backend):
+    backend["error"] = _bad_request({"error": {
+        "message": "Failed to generate JSON",
+        "failed_generation": '{"ok": true',
+    }})
+    assert structured._ask("prompt", json_mode=True) == '{"ok": true'
+    assert structured._json_mode_available
+
+
+# ---------------- extract_json ----------------
+
+def test_plain_json_is_not_repaired():
+    assert extract_json('{"a": 1}') == ({"a": 1}, False)
+
+
+def test_fenced_json():
+    answer = 'Here you go:\n```json\n{"a": [1, 2],}\n```\nAnything else?'
+    assert extract_json(answer) == ({"a": [1, 2]}, True)
+
+
+def test_leading_prose_with_brackets():
+    assert extract_json('Note [1]: {"a": 1}') == ({"a": 1}, True)
+
+
+def test_trailing_text():
+    assert extract_json('{"a": true} Hope this helps [see above]') == ({"a": True}, True)
+
+
+def test_python_literals():
+    assert extract_json('{"a": None, "b": True}') == ({"a": None, "b": True}, True)
+
+
+def test_truncated_output_drops_the_unfinished_element():
+    value, repaired = extract_json('Plan: {"nodes": [{"id": "a"}, {"id": "b", "lab')
+    assert repaired
+    assert value == {"nodes": [{"id": "a"}, {"id": "b"}]}
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("I cannot help with that.")
+
+
+# ---------------- validate ----------------
+
+SCHEMA = {
+    "type": "object",
+    "required": ["items"],
+    "properties": {
+        "items": {"type": "array", "minItems": 1, "items": {"type": "string"}}
+    }
+}
+
+
+def test_validate():
+    assert validate({"items": ["x"]}, SCHEMA) == []
+    assert validate({}, SCHEMA) == ["$: missing required key 'items'"]
+    assert validate({"items": []}, SCHEMA) == ["$.items: needs at least 1 items"]
+    assert validate({"items": [1]}, SCHEMA) == ["$.items[0]: expected string, got int"]
+
+
+def test_plan_schema_accepts_bare_node_list():
+    assert validate([{"id": "a", "label": "A"}], PLAN_SCHEMA) == []
+    assert validate({"nodes": [{"id": "a", "label": "A"}]}, PLAN_SCHEMA) == []
+    assert validate({"edges": []}, PLAN_SCHEMA)
+
+
+# ---------------- generate_json ----------------
+
+@pytest.fixture
+def answers(monkeypatch):
+    queue, prompts = [], []
+
+    def generate(prompt, **kwargs):
+        prompts.append(prompt)
+        return queue.pop(0)
+
+    monkeypatch.setattr(structured, "generate", generate)
+    return queue, prompts
+
+
+def test_repairable_answer_needs_no_rerequest(answers):
+    queue, prompts = answers
+    queue.append('```json\n{"items": ["x",]}\n```')
+    assert generate_json("p", SCHEMA, "test", json_mode=False) == {"items": ["x"]}
+    assert len(prompts) == 1
+
+
+def test_invalid_answer_is_rerequested_with_problems(answers):
+    queue, prompts = answers
+    queue.extend(['{"items": []}', '{"items": ["x"]}'])
+    assert generate_json("p", SCHEMA, "test", json_mode=False) == {"items": ["x"]}
+    assert len(prompts) == 2
+    assert "needs at least 1 items" in prompts[1]
+
+
+def test_still_invalid_after_rerequests_returns_none(answers):
+    queue, prompts = answers
+    queue.extend(["no json", '{"items": [1]}'])
+    assert generate_json("p", SCHEMA, "test", max_rerequests=1, json_mode=False) is None
+    assert len(prompts) == 2
@@ -0,0 +1,68 @@
+# tts/aligner.py
+
+import re
+
+# ---------------- TEXT SPLITTING ----------------
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+# Extra weight (in syllables) for the pause after punctuation
+PAUSE_WEIGHT = {",": 0.5, ";": 0.75, ":": 0.75, ".": 1.0, "!": 1.0, "?": 1.0}
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+
+
+def syllable_count(word: str) -> int:
+    """
+    Vowel-group heuristic. Digits/symbols fall back to character length.
+    """
+    w = re.sub(r"[^a-z]", "", word.lower())
+    if not w:
+        return max(1, len(re.sub(r"\W", "", word)) // 2)
+
+    count = len(VOWEL_GROUPS.findall(w))
+    if w.endswith("e") and not w.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def word_weight(word: str) -> float:
+    return syllable_count(word) + PAUSE_WEIGHT.get(word[-1], 0.0)
+
+# ---------------- ALIGNMENT ----------------
+
+def spread_words(
+    text: str,
+    start: float,
+    end: float,
+    first_id: int = 0
+) -> list[dict]:
+    """
+    Distributes the words of `text` over [start, end] proportionally
+    to their syllable weight. Same schema as Whisper alignment:
+    {"id", "word", "start", "end"}.
+    """
+    tokens = text.split()
+    if not tokens:
+        return []
+
+    weights = [word_weight(t) for t in tokens]
+    total = sum(weights)
+    span = max(end - start, 0.0)
+
+    words = []
+    t = start
+    for i, (token, weight) in enumerate(zip(tokens, weights)):
+        duration = span * weight / total
+        words.append({
+            "id": first_id + i,
+            "word": token,
+            "start": round(t, 2),
+            "end": round(t + duration, 2)
+        })
+        t += duration
+
+    return words
@@ -1,14 +1,23 @@
 # tts/audio_generator.py
 
+import io
+import logging
 import os
 import uuid
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 
-from gtts import gTTS
-from faster_whisper import WhisperModel
 from mutagen.mp3 import MP3
 
+from tts.aligner import split_sentences, spread_words
+from tts.backends import get_backend
+from tts.whisper_pool import whisper_pool
+from utils.disk_cache import DiskCache, hash_key
+from utils.tracing import bind, span, traced
+
+logger = logging.getLogger(__name__)
+
 # ---------------- PATHS ----------------
 
 AUDIO_DIR = "static/audio"
@@ -17,17 +26,33 @@ META_DIR = "static/audio_meta"
 os.makedirs(AUDIO_DIR, exist_ok=True)
 os.makedirs(META_DIR, exist_ok=True)
 
-# ---------------- WHISPER MODEL ----------------
-# base is fine for alignment, but lock params for stability
-
-whisper_model = WhisperModel(
-    "base",
-    device="cpu",
-    compute_type="int8",
-    cpu_threads=2,
-    num_workers=1
+# ---------------- ALIGNMENT MODE ----------------
+# "fast"    → synthesize per sentence, measure each segment, spread words
+#             by syllable weight (no ASR pass)
+# "whisper" → full Whisper word alignment (slower, higher accuracy)
+
+ALIGNMENT_MODE = os.getenv("ALIGNMENT_MODE", "fast")
+
+# ---------------- SEGMENTS ----------------
+# Narration is synthesized per segment (sentence or slide) concurrently.
+# Segments are cached by text hash, so editing one slide only
+# re-synthesizes that slide's segments.
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 4))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", 512))
+
+segment_cache = DiskCache(
+    TTS_CACHE_DIR,
+    max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".mp3"
 )
 
+SLIDE_MARKER = re.compile(r"(Slide\s+\d+\s*:)", re.IGNORECASE)
+
+# ---------------- WHISPER MODEL ----------------
+# Shared, lazily loaded pool (see tts/whisper_pool.py)
+
 # ---------------- MAIN ----------------
 
 def clean_script_for_tts(script: str) -> str:
@@ -36,31 +61,74 @@ def clean_script_for_tts(script: str) -> str:
     """
     return re.sub(r"Slide\s+\d+\s*:?", "", script, flags=re.IGNORECASE)
 
-def script_to_audio(script: str) -> dict:
-    if not script or not script.strip():
-        raise ValueError("Empty script cannot be converted to audio")
 
-    audio_id = uuid.uuid4().hex
-    audio_file = f"{audio_id}.mp3"
-    meta_file = f"{audio_id}.json"
+def split_script_by_slide(script: str) -> list[str]:
+    """
+    Slide texts without markers, split exactly like
+    app.ui_routes.parse_slides_from_script.
+    """
+    parts = SLIDE_MARKER.split(script)
 
-    audio_path = os.path.join(AUDIO_DIR, audio_file)
-    meta_path = os.path.join(META_DIR, meta_file)
+    if len(parts) == 1:
+        return [script.strip()]
 
-    # 1️⃣ TEXT → SPEECH (gTTS)
-    tts = gTTS(
-        text=script,
-        lang="en",
-        slow=False
-    )
-    tts.save(audio_path)
+    return [
+        parts[i + 1].strip() if i + 1 < len(parts) else ""
+        for i in range(1, len(parts), 2)
+    ]
 
-    # 2️⃣ AUDIO DURATION
-    audio = MP3(audio_path)
-    duration = round(audio.info.length, 2)
 
-    # 3️⃣ WHISPER WORD ALIGNMENT
-    segments, _ = whisper_model.transcribe(
+def synthesize_segment(text: str, backend) -> tuple[bytes, float]:
+    """
+    TEXT → SPEECH for one segment, through the segment cache.
+    Returns MP3 bytes and their duration.
+    """
+    key = hash_key("tts", backend.name, getattr(backend, "lang", ""), text)
+
+    data = segment_cache.get_bytes(key)
+    if data is None:
+        with span(f"tts_{backend.name}"):
+            data = backend.synthesize(text)
+        segment_cache.put_bytes(key, data)
+
+    return data, MP3(io.BytesIO(data)).info.length
+
+
+def slide_units(text: str, alignment: str) -> list[str]:
+    """
+    Speech segments of one slide: sentences (fast) or the whole slide (whisper).
+    """
+    pieces = split_sentences(text) if alignment == "fast" else [text]
+    return [p for p in pieces if p.strip()]
+
+
+def prewarm_slide(
+    text: str,
+    alignment: str | None = None,
+    backend: str | None = None
+):
+    """
+    Best effort: synthesizes one slide's segments into the segment cache
+    while the rest of the script is still being generated, so the later
+    synthesize_script call for the same text is mostly cache hits.
+    """
+    try:
+        tts_backend = get_backend(backend)
+        for unit in slide_units(text.strip(), alignment or ALIGNMENT_MODE):
+            synthesize_segment(unit, tts_backend)
+    except Exception as e:
+        logger.warning(f"TTS prewarm failed: {e!r}")
+
+
+def synthesize_segments(texts: list[str], backend) -> list[tuple[bytes, float]]:
+    with ThreadPoolExecutor(max_workers=max(1, TTS_WORKERS)) as pool:
+        # map() keeps input order
+        return list(pool.map(bind(lambda t: synthesize_segment(t, backend)), texts))
+
+
+@traced("whisper")
+def align_whisper(audio_path: str) -> list[dict]:
+    segments, _ = whisper_pool.transcribe(
         audio_path,
         beam_size=5,
         word_timestamps=True,
@@ -95,15 +163,127 @@ def script_to_audio(script: str) -> dict:
 
             order += 1
 
-    # 4️⃣ SAFETY SORT (IMPORTANT)
+    return words
+
+
+@traced("tts")
+def synthesize_script(
+    script: str,
+    alignment: str | None = None,
+    backend: str | None = None,
+    audio_dir: str = AUDIO_DIR
+) -> dict:
+    """
+    TTS stage: segments → speech (concurrent, cached) → one MP3.
+
+    Returns JSON-serialisable state for align_script:
+    audio path, per-segment offsets and per-slide offsets.
+    """
+    if not script or not script.strip():
+        raise ValueError("Empty script cannot be converted to audio")
+
+    alignment = alignment or ALIGNMENT_MODE
+    if alignment not in ("fast", "whisper"):
+        raise ValueError(f"Unknown alignment mode: {alignment}")
+
+    tts_backend = get_backend(backend)
+
+    audio_id = uuid.uuid4().hex
+    audio_path = os.path.join(audio_dir, f"{audio_id}.mp3")
+
+    # 1️⃣ SEGMENTS: sentences (fast) or whole slides (whisper), per slide
+    slide_texts = split_script_by_slide(script)
+    units = []  # (slide_index, text)
+    for slide_index, text in enumerate(slide_texts):
+        units.extend((slide_index, p) for p in slide_units(text, alignment))
+
+    if not units:
+        raise ValueError("Script has no speakable text")
+
+    # 2️⃣ TEXT → SPEECH (concurrent, cached) + concatenation
+    synthesized = synthesize_segments([t for _, t in units], tts_backend)
+
+    segments = []
+    slide_times = [
+        {"slide_index": i, "start": None, "end": None}
+        for i in range(len(slide_texts))
+    ]
+    offset = 0.0
+
+    with open(audio_path, "wb") as f:
+        for (slide_index, text), (data, seg_duration) in zip(units, synthesized):
+            f.write(data)  # MP3 frames concatenate cleanly
+
+            segments.append({
+                "slide_index": slide_index,
+                "text": text,
+                "start": offset,
+                "end": offset + seg_duration
+            })
+
+            times = slide_times[slide_index]
+            if times["start"] is None:
+                times["start"] = round(offset, 2)
+            offset += seg_duration
+            times["end"] = round(offset, 2)
+
+    # Slides without speakable text collapse onto their neighbour's boundary
+    last_end = 0.0
+    for times in slide_times:
+        if times["start"] is None:
+            times["start"] = times["end"] = last_end
+        last_end = times["end"]
+
+    return {
+        "audio_id": audio_id,
+        "audio_path": audio_path,
+        "alignment": alignment,
+        "tts_backend": tts_backend.name,
+        "segments": segments,
+        "slides": slide_times
+    }
+
+
+@traced("align")
+def align_script(synth: dict, meta_dir: str = META_DIR) -> dict:
+    """
+    Alignment stage: word timestamps for a synthesize_script result.
+    """
+    audio_id = synth["audio_id"]
+    audio_path = synth["audio_path"]
+    alignment = synth["alignment"]
+    meta_path = os.path.join(meta_dir, f"{audio_id}.json")
+
+    if alignment == "fast":
+        # 3️⃣ DURATION-BASED WORD ALIGNMENT
+        words = []
+        for seg in synth["segments"]:
+            words.extend(spread_words(
+                seg["text"],
+                seg["start"],
+                seg["end"],
+                first_id=len(words)
+            ))
+    else:
+        # 3️⃣ WHISPER WORD ALIGNMENT
+        words = align_whisper(audio_path)
+
+    # 4️⃣ AUDIO DURATION
+    audio = MP3(audio_path)
+    duration = round(audio.info.length, 2)
+
+    # 5️⃣ SAFETY SORT (IMPORTANT)
     words.sort(key=lambda x: x["start"])
 
-    # 5️⃣ SAVE METADATA
+    # 6️⃣ SAVE METADATA
     with open(meta_path, "w") as f:
         json.dump(
             {
                 "audio_id": audio_id,
+                "alignment": alignment,
+                "tts_backend": synth["tts_backend"],
                 "duration": duration,
+                "slides": synth["slides"],
                 "words": words
             },
             f,
@@ -112,7 +292,25 @@ def script_to_audio(script: str) -> dict:
 
     return {
         "audio_id": audio_id,
-        "audio_url": f"/static/audio/{audio_file}",
+        "audio_path": audio_path,
+        "audio_url": "/" + audio_path.replace("\\", "/"),
         "timestamps": words,   # 🔥 frontend uses this
+        "slides": synth["slides"],
         "duration": duration
     }
+
+
+def script_to_audio(
+    script: str,
+    alignment: str | None = None,
+    backend: str | None = None,
+    audio_dir: str = AUDIO_DIR,
+    meta_dir: str = META_DIR
+) -> dict:
+    synth = synthesize_script(
+        script,
+        alignment=alignment,
+        backend=backend,
+        audio_dir=audio_dir
+    )
+    return align_script(synth, meta_dir=meta_dir)
@@ -0,0 +1,69 @@
+# tts/backends.py
+
+import io
+import os
+import time
+
+from gtts import gTTS
+
+# ---------------- CONFIG ----------------
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+TTS_LANG = os.getenv("TTS_LANG", "en")
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono: 96-byte frames of 576 samples
+# (24 ms each). An all-zero payload decodes to silence.
+_SILENT_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+_SILENT_FRAME_SECONDS = 0.024
+
+
+class GTTSBackend:
+    """
+    Google Translate TTS (network).
+    """
+    name = "gtts"
+
+    def __init__(self, lang: str = TTS_LANG):
+        self.lang = lang
+
+    def synthesize(self, text: str) -> bytes:
+        buf = io.BytesIO()
+        gTTS(text=text, lang=self.lang, slow=False).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class OfflineBackend:
+    """
+    Local stand-in: silent MP3 whose length follows the speaking rate.
+    Deterministic, no network — for tests and benchmarks.
+    """
+    name = "offline"
+
+    def __init__(
+        self,
+        words_per_second: float = 2.5,
+        latency: float = float(os.getenv("TTS_OFFLINE_LATENCY", 0.0))
+    ):
+        self.words_per_second = words_per_second
+        self.latency = latency
+
+    def synthesize(self, text: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+
+        seconds = max(len(text.split()), 1) / self.words_per_second
+        frames = max(1, round(seconds / _SILENT_FRAME_SECONDS))
+        return _SILENT_FRAME * frames
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "offline": OfflineBackend,
+}
+
+
+def get_backend(name: str | None = None):
+    name = name or TTS_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return BACKENDS[name]()
@@ -0,0 +1,146 @@
+# tts/whisper_pool.py
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# ---------------- CONFIG ----------------
+# N independent model instances; each gets an even share of the host's
+# cores. A caller checks out a whole instance, so WHISPER_INSTANCES is
+# the concurrency. Callers queue for a free instance and are rejected
+# once the queue is WHISPER_MAX_QUEUE deep (backpressure instead of
+# unbounded waits).
+
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL", "base")
+WHISPER_INSTANCES = int(os.getenv("WHISPER_INSTANCES", 1))
+WHISPER_MAX_QUEUE = int(os.getenv("WHISPER_MAX_QUEUE", 8))
+WHISPER_ACQUIRE_TIMEOUT = float(os.getenv("WHISPER_ACQUIRE_TIMEOUT", 300))
+
+
+class WhisperPoolBusy(RuntimeError):
+    pass
+
+
+def threads_per_instance(instances: int) -> int:
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(1, cores // max(1, instances))
+
+
+class WhisperPool:
+    def __init__(
+        self,
+        model_size: str = WHISPER_MODEL_SIZE,
+        instances: int = WHISPER_INSTANCES,
+        max_queue: int = WHISPER_MAX_QUEUE
+    ):
+        self.model_size = model_size
+        self.instances = max(1, instances)
+        self.max_queue = max_queue
+        self.cpu_threads = threads_per_instance(self.instances)
+
+        self._free = queue.Queue()
+        self._lock = threading.Lock()  # counters only, never held while loading
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+        self.waiting = 0
+        self.in_use = 0
+        self.served = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    # ---------------- LOADING ----------------
+
+    def load(self):
+        """
+        Loads all instances once. Only the load lock is held meanwhile,
+        so stats() and /health keep answering.
+        """
+        if self._loaded:
+            return
+
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            from faster_whisper import WhisperModel
+
+            for _ in range(self.instances):
+                self._free.put(WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type="int8",
+                    cpu_threads=self.cpu_threads
+                ))
+
+            with self._lock:
+                self._loaded = True
+
+    # ---------------- ACQUIRE ----------------
+
+    @contextmanager
+    def model(self, timeout: float = WHISPER_ACQUIRE_TIMEOUT):
+        self.load()
+
+        with self._lock:
+            if self.waiting >= self.max_queue and self._free.empty():
+                self.rejected += 1
+                raise WhisperPoolBusy(
+                    f"Alignment queue full ({self.waiting} waiting)"
+                )
+            self.waiting += 1
+
+        started = time.perf_counter()
+        try:
+            model = self._free.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.waiting -= 1
+                self.rejected += 1
+            raise WhisperPoolBusy("Timed out waiting for a Whisper model")
+
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.total_wait += time.perf_counter() - started
+
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                self.served += 1
+            self._free.put(model)
+
+    def transcribe(self, audio_path: str, **kwargs):
+        """
+        Runs transcription on a pooled model. Segments are materialized
+        before the model goes back to the pool (faster-whisper is lazy).
+        """
+        with self.model() as model:
+            segments, info = model.transcribe(audio_path, **kwargs)
+            return list(segments), info
+
+    # ---------------- METRICS ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "instances": self.instances,
+                "cpu_threads": self.cpu_threads,
+                "loaded": self._loaded,
+                "queue_depth": self.waiting,
+                "in_use": self.in_use,
+                "served": self.served,
+                "rejected": self.rejected,
+                "avg_wait_s": round(self.total_wait / self.served, 3) if self.served else 0.0,
+            }
+
+
+whisper_pool = WhisperPool()
+
+
+def preload():
+    whisper_pool.load()
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+
+def hash_key(*parts) -> str:
+    """
+    Stable SHA-256 key for any JSON-serialisable parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _link_or_copy(src: str | Path, dest: str | Path):
+    """
+    Atomically places src at dest: a hardlink when both are on one
+    filesystem, a copy otherwise. Either way dest outlives eviction of src.
+    """
+    dest = Path(dest)
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+class DiskCache:
+    """
+    Content-addressed blob store on local disk.
+
+    - One file per key: <directory>/<key[:2]>/<key><suffix>
+    - LRU by file mtime (touched on every hit)
+    - Bounded by total bytes, optional TTL in seconds
+    - Safe to share between processes (atomic writes, no index file)
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl: float | None = None,
+        suffix: str = ".bin"
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.suffix = suffix
+
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    # ---------------- PATHS ----------------
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def _entries(self) -> list[Path]:
+        return [p for p in self.directory.glob(f"*/*{self.suffix}") if p.is_file()]
+
+    def _size_of(self, path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _expired(self, path: Path) -> bool:
+        if not self.ttl:
+            return False
+        return time.time() - path.stat().st_mtime > self.ttl
+
+    # ---------------- READ ----------------
+
+    def get_path(self, key: str) -> Path | None:
+        path = self.path_for(key)
+
+        try:
+            if self._expired(path):
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            os.utime(path)  # 🔁 LRU touch
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def get_bytes(self, key: str) -> bytes | None:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def export(self, key: str, dest: str | Path) -> Path | None:
+        """
+        Places the entry at dest (hardlink or copy), or None on a miss.
+        Callers keep dest even if the entry is evicted later.
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            _link_or_copy(path, dest)
+        except FileNotFoundError:
+            return None  # evicted between lookup and link
+        return Path(dest)
+
+    def get_json(self, key: str):
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    # ---------------- WRITE ----------------
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        replaced = self._size_of(path)
+        os.replace(tmp, path)
+
+        self._record_write(len(data), replaced)
+        return path
+
+    def put_json(self, key: str, value) -> Path:
+        return self.put_bytes(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def put_file(self, key: str, src: str | Path, keep: bool = False) -> Path:
+        """
+        Moves an already-written file into the cache
+        (keep=True: links or copies it, src stays in place).
+        """
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replaced = self._size_of(path)
+        if keep:
+            _link_or_copy(src, path)
+        else:
+            os.replace(src, path)
+
+        self._record_write(path.stat().st_size, replaced)
+        return path
+
+    def _record_write(self, size: int, replaced: int = 0):
+        # An overwritten key only adds the difference
+        with self._lock:
+            self.writes += 1
+            if self._size is not None:
+                self._size += size - replaced
+            over = self._size is None or self._size > self.max_bytes
+
+        if over:
+            self.evict()
+
+    # ---------------- EVICTION ----------------
+
+    def evict(self):
+        """
+        Drops expired entries, then least-recently-used entries
+        until the cache fits in max_bytes.
+        """
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        now = time.time()
+        total = 0
+        kept = []
+        removed = 0
+
+        for mtime, size, p in entries:
+            if self.ttl and now - mtime > self.ttl:
+                p.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept.append((mtime, size, p))
+                total += size
+
+        kept.sort()  # oldest first
+        for mtime, size, p in kept:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._size = total
+            self.evictions += removed
+
+    def clear(self):
+        for p in self._entries():
+            p.unlink(missing_ok=True)
+        with self._lock:
+            self._size = 0
+
+    # ---------------- STATS ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
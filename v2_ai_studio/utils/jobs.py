@@ -0,0 +1,97 @@
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+# ---------------- LAYOUT ----------------
+# uploads/<job_id>/                 raw uploads (never served)
+# static/jobs/<job_id>/frames/      scratch diagram renders
+# static/jobs/<job_id>/audio/       narration MP3
+# static/jobs/<job_id>/audio_meta/  alignment metadata
+# static/jobs/<job_id>/video/       final video
+
+UPLOADS_ROOT = Path("uploads")
+JOBS_ROOT = Path("static/jobs")
+JOB_TTL_HOURS = float(os.getenv("JOB_TTL_HOURS", 24))
+
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobWorkspace:
+    """
+    Isolated directories for one request, so concurrent jobs never
+    share or clobber each other's files.
+    """
+
+    def __init__(self, job_id: str | None = None):
+        if job_id is None:
+            job_id = uuid.uuid4().hex
+        elif not JOB_ID_RE.match(job_id):
+            raise ValueError("Invalid job id")
+
+        self.job_id = job_id
+        self.root = JOBS_ROOT / job_id
+        self.uploads = UPLOADS_ROOT / job_id
+        self.frames = self.root / "frames"
+        self.audio = self.root / "audio"
+        self.meta = self.root / "audio_meta"
+        self.video = self.root / "video"
+        self.video_path = self.video / "final.mp4"
+
+    def create(self) -> "JobWorkspace":
+        for d in (self.uploads, self.frames, self.audio, self.meta, self.video):
+            d.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def url(self, path: str | Path) -> str:
+        return "/" + Path(path).as_posix()
+
+    @property
+    def video_url(self) -> str:
+        return self.url(self.video_path)
+
+    def remove_uploads(self):
+        shutil.rmtree(self.uploads, ignore_errors=True)
+
+    def remove(self):
+        self.remove_uploads()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def new_job() -> JobWorkspace:
+    prune_jobs()
+    return JobWorkspace().create()
+
+
+def get_job(job_id: str) -> JobWorkspace:
+    job = JobWorkspace(job_id)
+    if not job.exists():
+        raise ValueError("Unknown or expired job")
+    return job
+
+
+def prune_jobs(max_age_hours: float = JOB_TTL_HOURS):
+    """
+    Removes job workspaces untouched for longer than max_age_hours.
+    """
+    if not max_age_hours:
+        return
+
+    cutoff = time.time() - max_age_hours * 3600
+
+    for root in (JOBS_ROOT, UPLOADS_ROOT):
+        if not root.is_dir():
+            continue
+        for d in root.iterdir():
+            if not (d.is_dir() and JOB_ID_RE.match(d.name)):
+                continue
+            try:
+                if d.stat().st_mtime < cutoff:
+                    shutil.rmtree(d, ignore_errors=True)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,338 @@
+# utils/tracing.py
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+# ---------------- TRACING ----------------
+# span("name") times a stage. Every span feeds the process-wide
+# Prometheus histograms (rendered as text on /metrics, no client library
+# needed) and, when a job trace is active, that job's timing breakdown.
+#
+# The active trace lives in a ContextVar: asyncio tasks and
+# asyncio.to_thread / run_in_threadpool carry it along; plain thread
+# pools need bind(fn) at submit time.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple = (),
+        buckets: tuple = DURATION_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}"
+                    )
+                lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "ai_studio_stage_seconds",
+    "Wall time per pipeline stage.",
+    ("stage",)
+)
+STAGE_ERRORS = Counter(
+    "ai_studio_stage_errors_total",
+    "Stages that raised.",
+    ("stage",)
+)
+LLM_TOKENS = Counter(
+    "ai_studio_llm_tokens_total",
+    "LLM tokens reported by the API (response.usage).",
+    ("kind",)
+)
+
+REGISTRY = [STAGE_SECONDS, STAGE_ERRORS, LLM_TOKENS]
+
+
+def register(metric):
+    """
+    Adds a module's own Counter / Histogram to /metrics.
+    """
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- JOB TRACES ----------------
+
+class Trace:
+    """
+    Spans and token usage of one job (thread-safe).
+    """
+
+    def __init__(self, job_id: str | None = None):
+        self.job_id = job_id
+        self.started = time.perf_counter()
+        self.spans = []  # (name, offset, seconds, error)
+        self.tokens = {"prompt": 0, "completion": 0}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, seconds: float, error: bool = False):
+        with self._lock:
+            self.spans.append((name, round(start - self.started, 4), seconds, error))
+
+    def add_tokens(self, prompt: int, completion: int):
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def summary(self) -> dict:
+        """
+        {job_id, total_s, stages: {name: {count, seconds, errors}}, llm_tokens}.
+        Stage seconds are summed over spans, so concurrent spans of one
+        stage can add up to more than total_s.
+        """
+        stages = {}
+        with self._lock:
+            for name, _, seconds, error in self.spans:
+                stage = stages.setdefault(name, {"count": 0, "seconds": 0.0, "errors": 0})
+                stage["count"] += 1
+                stage["seconds"] += seconds
+                stage["errors"] += error
+            tokens = dict(self.tokens)
+
+        for stage in stages.values():
+            stage["seconds"] = round(stage["seconds"], 3)
+
+        return {
+            "job_id": self.job_id,
+            "total_s": round(time.perf_counter() - self.started, 3),
+            "stages": stages,
+            "llm_tokens": tokens,
+        }
+
+    def server_timing(self) -> str:
+        """
+        Stage totals as a Server-Timing header value (milliseconds).
+        """
+        return ", ".join(
+            f"{name};dur={stage['seconds'] * 1000:.1f}"
+            for name, stage in self.summary()["stages"].items()
+        )
+
+
+current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+@contextmanager
+def trace(job_id: str | None = None) -> Iterator[Trace]:
+    """
+    Collects every span of the enclosed work into a new Trace.
+    """
+    job_trace = Trace(job_id)
+    token = current_trace.set(job_trace)
+    try:
+        yield job_trace
+    finally:
+        current_trace.reset(token)
+
+
+def observe(name: str, start: float, seconds: float, error: bool = False):
+    """
+    Records an already-measured span (start is a perf_counter value).
+    """
+    STAGE_SECONDS.observe(seconds, stage=name)
+    if error:
+        STAGE_ERRORS.inc(stage=name)
+
+    job_trace = current_trace.get()
+    if job_trace is not None:
+        job_trace.add(name, start, seconds, error)
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        observe(name, start, time.perf_counter() - start, error)
+
+
+def traced(name: str):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed(iterable: Iterable, name: str) -> Iterator:
+    """
+    Passes items through, recording only the time spent producing them
+    (e.g. PDF extraction interleaved with cleaning, or a token stream
+    whose consumer does work between items) as one span.
+    """
+    start = time.perf_counter()
+    spent = 0.0
+    error = False
+    iterator = iter(iterable)
+    try:
+        while True:
+            t = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            except Exception:
+                error = True
+                raise
+            finally:
+                spent += time.perf_counter() - t
+            yield item
+    finally:
+        # An abandoned stream releases what it holds (e.g. an LLM slot) now
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        observe(name, start, spent, error)
+
+
+async def atimed(iterable: AsyncIterable, name: str) -> AsyncIterator:
+    """
+    timed() for async iterables.
+    """
+    start = time.perf_counter()
+    spent = 0.0
+    error = False
+    iterator = iterable.__aiter__()
+    try:
+        while True:
+            t = time.perf_counter()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                error = True
+                raise
+            finally:
+                spent += time.perf_counter() - t
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        observe(name, start, spent, error)
+
+
+def bind(fn):
+    """
+    fn bound to the current context, for thread pool submits. Every call
+    runs in its own copy, so the result is safe to map() over a pool.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def record_tokens(usage):
+    """
+    Counts prompt / completion tokens of an API usage object (or None).
+    """
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", None) or 0
+    completion = getattr(usage, "completion_tokens", None) or 0
+
+    LLM_TOKENS.inc(prompt, kind="prompt")
+    LLM_TOKENS.inc(completion, kind="completion")
+
+    job_trace = current_trace.get()
+    if job_trace is not None:
+        job_trace.add_tokens(prompt, completion)
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import uuid
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# ---------------- LIMITS ----------------
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", 50))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+async def save_upload(
+    file: UploadFile,
+    dest_dir: str,
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> dict:
+    """
+    Streams an upload to disk in fixed-size chunks.
+
+    - Never holds more than one chunk in memory
+    - Computes the SHA-256 of the content in the same pass (the key
+      of the prepared slides cache, services/script_service.py)
+    - Rejects oversized uploads as early as possible
+
+    Returns {"path", "sha256", "size"}.
+    """
+    # Starlette knows the size once the multipart part is spooled
+    size_hint = getattr(file, "size", None)
+    if size_hint is not None and size_hint > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    filename = os.path.basename(file.filename or "upload")
+    path = os.path.join(dest_dir, f"{uuid.uuid4()}_{filename}")
+
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(
+                        f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+                    )
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return {
+        "path": path,
+        "sha256": digest.hexdigest(),
+        "size": size
+    }
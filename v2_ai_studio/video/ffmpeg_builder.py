@@ -0,0 +1,116 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from video.timeline import frame_timeline
+
+TARGET_SIZE = (1280, 720)
+FPS = 24
+X264_PRESET = os.getenv("X264_PRESET", "veryfast")
+
+
+def ffmpeg_bin() -> str:
+    """
+    FFMPEG_BIN, else ffmpeg on PATH, else the binary bundled with
+    imageio-ffmpeg (installed alongside MoviePy).
+    """
+    configured = os.getenv("FFMPEG_BIN")
+    if configured:
+        return configured
+
+    found = shutil.which("ffmpeg")
+    if found:
+        return found
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        raise RuntimeError("ffmpeg not found (set FFMPEG_BIN)")
+
+
+def quote_path(path: str) -> str:
+    return "'" + os.path.abspath(path).replace("'", r"'\''") + "'"
+
+
+def write_concat_list(timeline: list[tuple[str, float]], list_path: str):
+    """
+    ffconcat script: every still with its hold time. The last file is
+    repeated so its duration is honoured by the demuxer.
+    """
+    lines = ["ffconcat version 1.0"]
+    for frame_file, seconds in timeline:
+        lines.append(f"file {quote_path(frame_file)}")
+        lines.append(f"duration {seconds:.3f}")
+    lines.append(f"file {quote_path(timeline[-1][0])}")
+
+    Path(list_path).write_text("\n".join(lines) + "\n")
+
+
+def encode_stills(
+    timeline: list[tuple[str, float]],
+    output_path: str,
+    audio_path: str | None = None,
+    audio_codec: str = "aac",
+    threads: int | None = None
+):
+    """
+    One ffmpeg pass: concat demuxer → scale → x264 (stillimage tuning),
+    audio muxed in the same pass.
+    """
+    total = sum(seconds for _, seconds in timeline)
+    w, h = TARGET_SIZE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, "frames.ffconcat")
+        write_concat_list(timeline, list_path)
+
+        cmd = [
+            ffmpeg_bin(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+        ]
+        if audio_path:
+            cmd += ["-i", audio_path]
+
+        cmd += [
+            "-vf", f"scale={w}:{h},format=yuv420p",
+            "-r", str(FPS),
+            "-c:v", "libx264",
+            "-preset", X264_PRESET,
+            "-tune", "stillimage",
+        ]
+        if threads:
+            cmd += ["-threads", str(threads)]
+        if audio_path:
+            cmd += ["-map", "0:v:0", "-map", "1:a:0", "-c:a", audio_codec]
+
+        cmd += ["-t", f"{total:.3f}", output_path]
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+
+
+def build_video_ffmpeg(
+    slides: list[dict],
+    audio_path: str,
+    output_path: str
+):
+    timeline = frame_timeline(slides)
+
+    if not timeline:
+        print("[WARN] No frames found — video not created")
+        return None
+
+    Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+
+    encode_stills(
+        timeline,
+        output_path,
+        audio_path=audio_path if audio_path and os.path.exists(audio_path) else None
+    )
+
+    return output_path
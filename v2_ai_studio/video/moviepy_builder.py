@@ -3,48 +3,33 @@ from pathlib import Path
 
 from moviepy import ImageClip, AudioFileClip, concatenate_videoclips
 
+from video.ffmpeg_builder import build_video_ffmpeg
+from video.segment_builder import build_video_segmented
+from video.timeline import frame_timeline
+from utils.tracing import span
+
 OUTPUT_VIDEO = "static/videos/final_demo.mp4"
 TARGET_SIZE = (1280, 720)
 FPS = 24
 
+# "moviepy"   → compose every frame through Python
+# "ffmpeg"    → concat demuxer + x264 stillimage, audio muxed in one pass
+# "segmented" → per-slide ffmpeg segments in a process pool (cached),
+#               joined with stream copy
+VIDEO_ENGINE = os.getenv("VIDEO_ENGINE", "moviepy")
 
-def build_video_from_frames(
+
+def build_video_moviepy(
     slides: list[dict],
     audio_path: str,
     output_path: str = OUTPUT_VIDEO
 ):
-    """
-    Builds a slide-synced video:
-    - Multiple frames per slide
-    - Frame duration derived from audio timestamps
-    - Fully MoviePy 2.x compatible
-    """
-
-    clips = []
-
-    for slide in slides:
-        frames = slide.get("frames", [])
-        start = slide.get("start", 0)
-        end = slide.get("end", start + 1)
-
-        duration = max(0.5, end - start)
-
-        if not frames:
-            continue
-
-        per_frame_duration = duration / len(frames)
-
-        for frame_path in frames:
-            frame_file = frame_path.lstrip("/")
-            if not os.path.exists(frame_file):
-                continue
-
-            clip = (
-                ImageClip(frame_file)
-                .with_duration(per_frame_duration)
-                .resized(TARGET_SIZE)
-            )
-            clips.append(clip)
+    clips = [
+        ImageClip(frame_file)
+        .with_duration(per_frame_duration)
+        .resized(TARGET_SIZE)
+        for frame_file, per_frame_duration in frame_timeline(slides)
+    ]
 
     if not clips:
         print("[WARN] No frames found — video not created")
@@ -68,3 +53,30 @@ def build_video_from_frames(
     )
 
     return output_path
+
+
+VIDEO_ENGINES = {
+    "moviepy": build_video_moviepy,
+    "ffmpeg": build_video_ffmpeg,
+    "segmented": build_video_segmented,
+}
+
+
+def build_video_from_frames(
+    slides: list[dict],
+    audio_path: str,
+    output_path: str = OUTPUT_VIDEO,
+    engine: str | None = None
+):
+    """
+    Builds a slide-synced video:
+    - Multiple frames per slide
+    - Frame duration derived from audio timestamps
+    - Engine selected by VIDEO_ENGINE (moviepy | ffmpeg | segmented)
+    """
+    engine = engine or VIDEO_ENGINE
+    if engine not in VIDEO_ENGINES:
+        raise ValueError(f"Unknown video engine: {engine}")
+
+    with span(f"video_{engine}"):
+        return VIDEO_ENGINES[engine](slides, audio_path, output_path)
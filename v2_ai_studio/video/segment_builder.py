@@ -0,0 +1,154 @@
+import hashlib
+import multiprocessing
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from utils.disk_cache import DiskCache, hash_key
+from video.ffmpeg_builder import (
+    FPS,
+    TARGET_SIZE,
+    X264_PRESET,
+    encode_stills,
+    ffmpeg_bin,
+    quote_path,
+)
+from video.timeline import frame_timeline
+
+# ---------------- CONFIG ----------------
+# Every slide is an independent segment: encoded in parallel, cached by
+# (frame contents, durations, encoder settings), then joined with stream
+# copy. Re-rendering after a one-slide edit re-encodes only that slide.
+
+VIDEO_SEGMENT_WORKERS = int(os.getenv("VIDEO_SEGMENT_WORKERS", os.cpu_count() or 2))
+VIDEO_SEGMENT_CACHE_DIR = os.getenv("VIDEO_SEGMENT_CACHE_DIR", "cache/video_segments")
+VIDEO_SEGMENT_CACHE_MAX_MB = int(os.getenv("VIDEO_SEGMENT_CACHE_MAX_MB", 1024))
+
+# Never fork the (threaded) server process: workers start fresh
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+segment_cache = DiskCache(
+    VIDEO_SEGMENT_CACHE_DIR,
+    max_bytes=VIDEO_SEGMENT_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".mp4"
+)
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def snap_to_frames(timeline: list[tuple[str, float]]) -> list[tuple[str, float]]:
+    """
+    Rounds each hold time to whole output frames (min 1), so segments
+    concatenate without per-slide timestamp drift.
+    """
+    return [
+        (frame_file, max(1, round(seconds * FPS)) / FPS)
+        for frame_file, seconds in timeline
+    ]
+
+
+def segment_key(timeline: list[tuple[str, float]]) -> str:
+    return hash_key(
+        "segment",
+        [(_file_digest(f), round(d, 4)) for f, d in timeline],
+        TARGET_SIZE,
+        FPS,
+        X264_PRESET
+    )
+
+
+def _encode_segment(timeline: list[tuple[str, float]], output_path: str, threads: int) -> str:
+    """
+    Process-pool task: one silent slide segment.
+    """
+    encode_stills(timeline, output_path, threads=threads)
+    return output_path
+
+
+def concat_segments(
+    segment_paths: list[str],
+    output_path: str,
+    audio_path: str | None = None,
+    duration: float | None = None
+):
+    """
+    Lossless join (stream copy) + narration muxed in the same pass.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, "segments.ffconcat")
+        lines = ["ffconcat version 1.0"] + [
+            f"file {quote_path(p)}" for p in segment_paths
+        ]
+        Path(list_path).write_text("\n".join(lines) + "\n")
+
+        cmd = [
+            ffmpeg_bin(), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+        ]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac"]
+
+        cmd += ["-c:v", "copy"]
+        if duration:
+            cmd += ["-t", f"{duration:.3f}"]
+        cmd += [output_path]
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg concat failed: {result.stderr.strip()}")
+
+
+def build_video_segmented(
+    slides: list[dict],
+    audio_path: str,
+    output_path: str,
+    workers: int = VIDEO_SEGMENT_WORKERS
+):
+    timelines = [
+        snap_to_frames(frame_timeline([slide]))
+        for slide in slides
+    ]
+    timelines = [t for t in timelines if t]
+
+    if not timelines:
+        print("[WARN] No frames found — video not created")
+        return None
+
+    Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+
+    keys = [segment_key(t) for t in timelines]
+    segment_paths = [segment_cache.get_path(k) for k in keys]
+    missing = [i for i, p in enumerate(segment_paths) if p is None]
+
+    if missing:
+        workers = max(1, min(workers, len(missing)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                ProcessPoolExecutor(max_workers=workers, mp_context=MP_CONTEXT) as pool:
+            futures = {
+                i: pool.submit(
+                    _encode_segment,
+                    timelines[i],
+                    os.path.join(tmp, f"segment_{i}.mp4"),
+                    threads
+                )
+                for i in missing
+            }
+            for i, future in futures.items():
+                segment_paths[i] = segment_cache.put_file(keys[i], future.result())
+
+    concat_segments(
+        [str(p) for p in segment_paths],
+        output_path,
+        audio_path=audio_path if audio_path and os.path.exists(audio_path) else None,
+        duration=sum(d for t in timelines for _, d in t)
+    )
+
+    return output_path
@@ -0,0 +1,31 @@
+import os
+
+
+def frame_timeline(slides: list[dict]) -> list[tuple[str, float]]:
+    """
+    (frame_file, seconds) for every existing frame, in playback order.
+
+    Each slide's duration (end - start, min 0.5s) is split evenly
+    across its frames.
+    """
+    timeline = []
+
+    for slide in slides:
+        frames = slide.get("frames", [])
+        start = slide.get("start", 0)
+        end = slide.get("end", start + 1)
+
+        duration = max(0.5, end - start)
+
+        if not frames:
+            continue
+
+        per_frame_duration = duration / len(frames)
+
+        for frame_path in frames:
+            frame_file = frame_path.lstrip("/")
+            if not os.path.exists(frame_file):
+                continue
+            timeline.append((frame_file, per_frame_duration))
+
+    return timeline
@@ -0,0 +1,371 @@
+# worker/queue.py
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable
+
+# ---------------- CONFIG ----------------
+# Durable local queue: one SQLite file, WAL mode, no external broker.
+# Tasks survive web/worker crashes. Workers heartbeat every
+# WORKER_HEARTBEAT_SECONDS, refreshing their own row and the task they
+# are running; a task whose heartbeat stopped for TASK_STALE_SECONDS
+# (its worker died) is handed back to the queue.
+
+QUEUE_DB = os.getenv("JOB_QUEUE_DB", "cache/job_queue.sqlite3")
+WORKER_HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", 10))
+WORKER_STALE_SECONDS = float(os.getenv("WORKER_STALE_SECONDS", 60))
+TASK_STALE_SECONDS = float(os.getenv("TASK_STALE_SECONDS", 300))
+RETRY_BACKOFF_SECONDS = float(os.getenv("RETRY_BACKOFF_SECONDS", 5))
+
+# Max tasks of a stage running at once, across all worker processes
+STAGE_MAX_IN_FLIGHT = {
+    "tts": int(os.getenv("TTS_MAX_IN_FLIGHT", 4)),
+    "align": int(os.getenv("ALIGN_MAX_IN_FLIGHT", 2)),
+    "video": int(os.getenv("VIDEO_MAX_IN_FLIGHT", 1)),
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id        TEXT NOT NULL,
+    stage         TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    result        TEXT,
+    error         TEXT,
+    status        TEXT NOT NULL DEFAULT 'queued',
+    priority      INTEGER NOT NULL DEFAULT 5,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    available_at  REAL NOT NULL,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    worker        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim
+    ON tasks (stage, status, priority, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks (job_id);
+CREATE TABLE IF NOT EXISTS workers (
+    id            TEXT PRIMARY KEY,
+    stages        TEXT NOT NULL,
+    heartbeat_at  REAL NOT NULL,
+    stats         TEXT
+);
+"""
+
+
+class TaskFailed(RuntimeError):
+    pass
+
+
+class NoWorkers(RuntimeError):
+    pass
+
+
+def _row(row: sqlite3.Row | None) -> dict | None:
+    if row is None:
+        return None
+    task = dict(row)
+    task["payload"] = json.loads(task["payload"])
+    task["result"] = json.loads(task["result"]) if task["result"] else None
+    return task
+
+
+class JobQueue:
+    def __init__(self, path: str = QUEUE_DB):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            # Queue files created before workers reported stats
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(workers)")}
+            if "stats" not in columns:
+                conn.execute("ALTER TABLE workers ADD COLUMN stats TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------------- PRODUCER ----------------
+
+    def enqueue(
+        self,
+        job_id: str,
+        stage: str,
+        payload: dict,
+        priority: int = PRIORITY_NORMAL,
+        max_attempts: int = 3
+    ) -> int:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO tasks (job_id, stage, payload, priority, max_attempts,
+                                   available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, stage, json.dumps(payload), priority, max_attempts, now, now, now)
+            )
+            return cur.lastrowid
+
+    # ---------------- CONSUMER ----------------
+
+    def claim(self, stage: str, worker: str) -> dict | None:
+        """
+        Atomically takes the best queued task of a stage, unless the
+        stage is already at its in-flight limit.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            running = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE stage = ? AND status = 'running'",
+                (stage,)
+            ).fetchone()[0]
+            if running >= STAGE_MAX_IN_FLIGHT.get(stage, 1):
+                conn.execute("COMMIT")
+                return None
+
+            row = conn.execute(
+                """
+                SELECT * FROM tasks
+                WHERE stage = ? AND status = 'queued' AND available_at <= ?
+                ORDER BY priority, id
+                LIMIT 1
+                """,
+                (stage, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                """
+                UPDATE tasks
+                SET status = 'running', attempts = attempts + 1,
+                    worker = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (worker, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return self.get(row["id"])
+
+    def complete(self, task_id: int, result: dict, worker: str) -> bool:
+        """
+        Stores the result, unless the task was requeued and is no longer
+        this worker's (returns False then).
+        """
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                """
+                UPDATE tasks SET status = 'done', result = ?, error = NULL, updated_at = ?
+                WHERE id = ? AND status = 'running' AND worker = ?
+                """,
+                (json.dumps(result), time.time(), task_id, worker)
+            )
+            return cur.rowcount > 0
+
+    def fail(self, task_id: int, error: str, worker: str) -> bool:
+        """
+        Retries with exponential backoff until max_attempts, then marks
+        failed. Like complete(), only applies to the worker's own task.
+        """
+        task = self.get(task_id)
+        now = time.time()
+
+        with closing(self._connect()) as conn:
+            if task["attempts"] < task["max_attempts"]:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** (task["attempts"] - 1)
+                cur = conn.execute(
+                    """
+                    UPDATE tasks SET status = 'queued', error = ?,
+                                     available_at = ?, updated_at = ?
+                    WHERE id = ? AND status = 'running' AND worker = ?
+                    """,
+                    (error, now + delay, now, task_id, worker)
+                )
+            else:
+                cur = conn.execute(
+                    """
+                    UPDATE tasks SET status = 'failed', error = ?, updated_at = ?
+                    WHERE id = ? AND status = 'running' AND worker = ?
+                    """,
+                    (error, now, task_id, worker)
+                )
+            return cur.rowcount > 0
+
+    def cancel(self, task_id: int) -> bool:
+        """
+        Withdraws a task nobody waits for anymore, if no worker took it yet.
+        """
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), task_id)
+            )
+            return cur.rowcount > 0
+
+    def requeue_stale(self, max_age: float = TASK_STALE_SECONDS) -> int:
+        """
+        Crash recovery: running tasks without a heartbeat for max_age go
+        back to the queue. Their attempt counts, so a task that keeps
+        killing its worker is marked failed after max_attempts.
+        Returns the number requeued.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                """
+                UPDATE tasks SET status = 'queued', available_at = ?, updated_at = ?
+                WHERE status = 'running' AND updated_at < ? AND attempts < max_attempts
+                """,
+                (now, now, now - max_age)
+            )
+            requeued = cur.rowcount
+            conn.execute(
+                """
+                UPDATE tasks SET status = 'failed', updated_at = ?,
+                                 error = COALESCE(error, 'Worker died while running the task')
+                WHERE status = 'running' AND updated_at < ?
+                """,
+                (now, now - max_age)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return requeued
+
+    # ---------------- WORKERS ----------------
+
+    def heartbeat(
+        self,
+        worker: str,
+        stages: list[str],
+        task_ids: Iterable[int] = (),
+        stats: dict | None = None
+    ):
+        """
+        Marks the worker alive and the tasks it is running too. stats
+        (e.g. its Whisper pool) is published for /health.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                INSERT INTO workers (id, stages, heartbeat_at, stats) VALUES (?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET stages = excluded.stages,
+                                               heartbeat_at = excluded.heartbeat_at,
+                                               stats = excluded.stats
+                """,
+                (worker, ",".join(stages), now, json.dumps(stats) if stats else None)
+            )
+            conn.executemany(
+                "UPDATE tasks SET updated_at = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                [(now, task_id, worker) for task_id in task_ids]
+            )
+
+    def unregister(self, worker: str):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker,))
+
+    def live_workers(self, stage: str, max_age: float = WORKER_STALE_SECONDS) -> int:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT stages FROM workers WHERE heartbeat_at >= ?",
+                (time.time() - max_age,)
+            ).fetchall()
+        return sum(stage in r["stages"].split(",") for r in rows)
+
+    def worker_stats(self, max_age: float = WORKER_STALE_SECONDS) -> dict:
+        """
+        Stats last reported by each live worker, by worker id.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, stats FROM workers WHERE heartbeat_at >= ? AND stats IS NOT NULL",
+                (time.time() - max_age,)
+            ).fetchall()
+        return {r["id"]: json.loads(r["stats"]) for r in rows}
+
+    def require_workers(self, *stages: str):
+        """
+        Raises NoWorkers unless every stage has a live worker, so callers
+        fail fast instead of waiting out their timeout.
+        """
+        missing = [s for s in stages if not self.live_workers(s)]
+        if missing:
+            raise NoWorkers(f"No worker is running stage(s): {', '.join(missing)}")
+
+    # ---------------- STATUS ----------------
+
+    def get(self, task_id: int) -> dict | None:
+        with closing(self._connect()) as conn:
+            return _row(conn.execute(
+                "SELECT * FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone())
+
+    def job_tasks(self, job_id: str) -> list[dict]:
+        with closing(self._connect()) as conn:
+            return [
+                _row(r) for r in conn.execute(
+                    "SELECT * FROM tasks WHERE job_id = ? ORDER BY id", (job_id,)
+                ).fetchall()
+            ]
+
+    def stage_counts(self) -> dict:
+        with closing(self._connect()) as conn:
+            counts = {}
+            for r in conn.execute(
+                "SELECT stage, status, COUNT(*) AS n FROM tasks GROUP BY stage, status"
+            ).fetchall():
+                counts.setdefault(r["stage"], {})[r["status"]] = r["n"]
+            return counts
+
+    def wait(self, task_id: int, timeout: float, poll: float = 0.2) -> dict:
+        """
+        Blocks until the task is done; raises TaskFailed / TimeoutError.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            task = self.get(task_id)
+            if task["status"] == "done":
+                return task
+            if task["status"] == "failed":
+                raise TaskFailed(task["error"] or f"Task {task_id} failed")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Task {task_id} still {task['status']}")
+            time.sleep(poll)
+
+
+_queue = None
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
@@ -0,0 +1,166 @@
+# worker/runner.py
+"""
+Worker process for the SQLite job queue.
+
+Run from the project root, one process per stage group, e.g.:
+    python -m worker.runner --stages tts,align
+    python -m worker.runner --stages video
+
+Each process runs several tasks at once, one per slot thread (--slots,
+default: the largest in-flight limit of its stages). The limits in
+worker/queue.py are global, so extra processes never exceed them.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from worker.queue import get_queue, STAGE_MAX_IN_FLIGHT, WORKER_HEARTBEAT_SECONDS
+from worker.stages import STAGES
+from tts.whisper_pool import preload as preload_whisper, whisper_pool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", 0.5))
+# Tasks one process runs at once, each in its own thread
+# (0: sized from the stages' in-flight limits)
+WORKER_SLOTS = int(os.getenv("WORKER_SLOTS", 0))
+STALE_CHECK_EVERY = 60  # seconds
+
+_stop = False
+
+
+def _request_stop(signum, frame):
+    global _stop
+    _stop = True
+
+
+def run_worker(stages: list[str], poll_interval: float = POLL_INTERVAL, slots: int | None = None):
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages: {unknown}")
+
+    queue = get_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    slots = slots or default_slots(stages)
+
+    logger.info(f"Worker {worker_id} serving stages {stages} with {slots} slot(s)")
+
+    # Pay the model load before the first task instead of inside it
+    if "align" in stages and os.getenv("WHISPER_PRELOAD", "0") == "1":
+        preload_whisper()
+
+    # Heartbeat thread: keeps this worker registered and its running
+    # tasks' updated_at fresh, so a long video encode is never requeued
+    running = set()
+    done = threading.Event()
+
+    # Alignment runs here, not in the web process: /health reads these
+    def stats():
+        return {"whisper": whisper_pool.stats()} if "align" in stages else None
+
+    def heartbeat():
+        while not done.wait(WORKER_HEARTBEAT_SECONDS):
+            try:
+                queue.heartbeat(worker_id, stages, list(running), stats())
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e!r}")
+
+    queue.heartbeat(worker_id, stages, stats=stats())
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        _serve(queue, worker_id, stages, poll_interval, slots, running)
+    finally:
+        done.set()
+        queue.unregister(worker_id)
+
+
+def default_slots(stages: list[str]) -> int:
+    """
+    Enough slots to reach the largest in-flight limit among the stages;
+    claim() still enforces each stage's own limit across all processes.
+    """
+    return max(STAGE_MAX_IN_FLIGHT.get(s, 1) for s in stages)
+
+
+def _serve(queue, worker_id: str, stages: list[str], poll_interval: float, slots: int, running: set):
+    threads = [
+        threading.Thread(
+            target=_serve_slot,
+            args=(queue, worker_id, stages, poll_interval, running),
+            name=f"worker-slot-{i}"
+        )
+        for i in range(slots)
+    ]
+    for t in threads:
+        t.start()
+
+    last_stale_check = 0.0
+    try:
+        while not _stop:
+            if time.monotonic() - last_stale_check > STALE_CHECK_EVERY:
+                requeued = queue.requeue_stale()
+                if requeued:
+                    logger.warning(f"Requeued {requeued} stale task(s)")
+                last_stale_check = time.monotonic()
+            time.sleep(poll_interval)
+    finally:
+        _request_stop(None, None)
+        for t in threads:
+            t.join()
+
+
+def _serve_slot(queue, worker_id: str, stages: list[str], poll_interval: float, running: set):
+    while not _stop:
+        task = None
+        for stage in stages:
+            task = queue.claim(stage, worker_id)
+            if task:
+                break
+
+        if task is None:
+            time.sleep(poll_interval)
+            continue
+
+        started = time.perf_counter()
+        running.add(task["id"])
+        try:
+            result = STAGES[task["stage"]](task["payload"])
+        except Exception as e:
+            logger.error(f"Task {task['id']} ({task['stage']}) failed: {e}")
+            queue.fail(task["id"], f"{e}\n{traceback.format_exc()}", worker_id)
+            continue
+        finally:
+            running.discard(task["id"])
+
+        if not queue.complete(task["id"], result, worker_id):
+            logger.warning(f"Task {task['id']} was requeued meanwhile, result dropped")
+            continue
+        logger.info(
+            f"Task {task['id']} ({task['stage']}) done in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--slots", type=int, default=WORKER_SLOTS)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    run_worker(args.stages.split(","), args.poll_interval, args.slots)
+
+
+if __name__ == "__main__":
+    main()
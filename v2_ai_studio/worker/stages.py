@@ -0,0 +1,48 @@
+# worker/stages.py
+
+import os
+
+from tts.audio_generator import synthesize_script, align_script
+from video.moviepy_builder import build_video_from_frames
+
+# ---------------- STAGE HANDLERS ----------------
+# payload (JSON) → result (JSON). Must be idempotent: a task can be
+# retried after a crash or failure.
+
+
+def run_tts(payload: dict) -> dict:
+    return synthesize_script(
+        payload["script"],
+        alignment=payload.get("alignment"),
+        backend=payload.get("backend"),
+        audio_dir=payload["audio_dir"]
+    )
+
+
+def run_align(payload: dict) -> dict:
+    return align_script(payload["synth"], meta_dir=payload["meta_dir"])
+
+
+def run_video(payload: dict) -> dict:
+    output_path = payload["output_path"]
+    partial_path = output_path + ".part.mp4"
+
+    # Publish atomically: the status endpoint reports the video as ready
+    # as soon as output_path exists
+    video_path = build_video_from_frames(
+        slides=payload["slides"],
+        audio_path=payload["audio_path"],
+        output_path=partial_path
+    )
+    if video_path:
+        os.replace(partial_path, output_path)
+        video_path = output_path
+
+    return {"video_path": video_path}
+
+
+STAGES = {
+    "tts": run_tts,
+    "align": run_align,
+    "video": run_video,
+}